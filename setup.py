@@ -14,7 +14,13 @@ if sys.argv[-1] == 'publish':
 setup(
     name='yellowant',
     version=__version__,
-    install_requires=['pyaml', 'requests>=2.1.0', 'requests_oauthlib>=0.4.0', 'click', 'socketIO-client==0.7.2'],
+    install_requires=['pyaml', 'requests>=2.1.0', 'requests_oauthlib>=0.4.0', 'click', 'socketIO-client==0.7.2',
+                      'futures; python_version < "3"'],
+    extras_require={
+        'async': ['aiohttp>=3.3'],
+        'orjson': ['orjson'],
+        'http2': ['httpx[http2]'],
+    },
     author='Vishwa Krishnakumar',
     author_email='vishwa@yellowant.com',
     license=open('LICENSE').read(),
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""Coroutines used by the AsyncYellowAnt tests, kept out of the test
+modules so that those stay importable on Python 2"""
+
+
+async def get_with_header(api, endpoint, header, params=None):
+    """Calls ``endpoint`` and returns ``header`` of the last call as seen
+    from the calling task"""
+    await api.get(endpoint, params)
+    return api.get_lastfunction_header(header)
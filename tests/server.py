@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:  # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class FakeServer(object):
+    """Local HTTP server answering with canned responses, for clients that
+    do not send their calls through a transport, such as AsyncYellowAnt.
+
+    Responses are registered per path, returned in turn like those of
+    :class:`yellowant.transport.FakeTransport`, and every request is
+    recorded in :attr:`requests` as ``(method, path, headers, body)``.
+
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.delay = 0
+        self._lock = threading.Lock()
+        self._server = _ThreadingHTTPServer(('127.0.0.1', 0),
+                                            self._get_handler())
+        thread = threading.Thread(target=self._server.serve_forever,
+                                  args=(0.01,))
+        thread.daemon = True
+        thread.start()
+        self.api_url = 'http://127.0.0.1:%d/api/%%s' % \
+            self._server.server_address[1]
+
+    def add(self, path, status=200, json=None, body=b'', headers=None):
+        if json is not None:
+            body = _dumps(json)
+        with self._lock:
+            self.routes.setdefault('/api/' + path, []).append(
+                (status, body, headers or {}))
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _respond(self, handler):
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else b''
+        path = handler.path.split('?', 1)[0]
+        with self._lock:
+            self.requests.append((handler.command, handler.path,
+                                  dict(handler.headers), body))
+            responses = self.routes.get(path)
+            if not responses:
+                status, body, headers = 404, b'{}', {}
+            elif len(responses) > 1:
+                status, body, headers = responses.pop(0)
+            else:
+                status, body, headers = responses[0]
+        if self.delay:
+            time.sleep(self.delay)
+        handler.send_response(status)
+        for k, v in headers.items():
+            handler.send_header(k, v)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _get_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def handle_one_request(self):
+                try:
+                    BaseHTTPRequestHandler.handle_one_request(self)
+                except (IOError, OSError):
+                    # the client gave up on the call
+                    self.close_connection = True
+
+            def do_request(self):
+                server._respond(self)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_request
+
+        return Handler
+
+
+def _dumps(obj):
+    return json.dumps(obj).encode('utf-8')
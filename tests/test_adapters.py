@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import socket
+
+import requests
+
+from yellowant import YellowAnt
+from yellowant.adapters import KEEP_ALIVE_SOCKET_OPTIONS, YellowAntHTTPAdapter
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class YellowAntHTTPAdapterTestCase(unittest.TestCase):
+    def test_no_pool_args(self):
+        self.assertIsNone(YellowAntHTTPAdapter.from_client_args(
+            {'timeout': 5}))
+        api = YellowAnt(access_token='token')
+        self.assertNotIsInstance(api.client.get_adapter('https://a/'),
+                                 YellowAntHTTPAdapter)
+
+    def test_pool_args_mount_adapter(self):
+        api = YellowAnt(access_token='token',
+                        client_args={'pool_maxsize': 32, 'timeout': 5})
+        adapter = api.client.get_adapter('https://api.yellowant.com/')
+        self.assertIsInstance(adapter, YellowAntHTTPAdapter)
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertEqual(api.client_args, {'timeout': 5})
+
+    def test_keep_alive(self):
+        adapter = YellowAntHTTPAdapter.from_client_args({'keep_alive': True})
+        self.assertIs(adapter.socket_options, KEEP_ALIVE_SOCKET_OPTIONS)
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+                      adapter.socket_options)
+        self.assertEqual(
+            adapter.poolmanager.connection_pool_kw['socket_options'],
+            KEEP_ALIVE_SOCKET_OPTIONS)
+
+
+class PrewarmTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.api = YellowAnt(access_token='token', transport=self.transport)
+        self.url = self.api.api_url % ''
+
+    def test_opens_connections(self):
+        self.transport.add('HEAD', self.url)
+        self.assertEqual(self.api.prewarm(connections=3), 3)
+        self.assertEqual(len(self.transport.requests), 3)
+
+    def test_ignores_failures(self):
+        self.transport.add('HEAD', self.url,
+                           exception=requests.ConnectionError('refused'))
+        self.assertEqual(self.api.prewarm(connections=2), 0)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from yellowant.archive import MessageArchive
+from yellowant.pagination import PageIterator
+
+from .config import unittest
+
+
+class _Client(object):
+    """Serves ``messages`` in pages, in the order the API would"""
+
+    def __init__(self, newest_first):
+        self.newest_first = newest_first
+        self.messages = []
+        self.pages = []
+
+    def add(self, first, last):
+        self.messages.extend(
+            {'id': i, 'timestamp': i, 'message_text': 'message %d' % i}
+            for i in range(first, last + 1))
+
+    def get_application_messages(self, page, page_size,
+                                 user_integration_id):
+        self.pages.append(page)
+        messages = self.messages[::-1] if self.newest_first \
+            else self.messages
+        return messages[(page - 1) * page_size:page * page_size]
+
+    def iter_application_messages(self, page_size=100, cursor=1, **params):
+        return PageIterator(self.get_application_messages, params,
+                            page_size=page_size, cursor=cursor,
+                            prefetch=False)
+
+
+class MessageArchiveTestCase(unittest.TestCase):
+    def archive(self, newest_first, path=':memory:'):
+        client = _Client(newest_first)
+        client.add(1, 10)
+        archive = MessageArchive(client, path, newest_first=newest_first,
+                                 page_size=3)
+        self.addCleanup(archive.close)
+        return client, archive
+
+    def test_incremental_sync_newest_first(self):
+        client, archive = self.archive(True)
+        self.assertEqual(archive.sync(7), 10)
+        client.add(11, 12)
+        del client.pages[:]
+        self.assertEqual(archive.sync(7), 2)
+        self.assertEqual(client.pages, [1])
+        self.assertEqual(len(archive), 12)
+        self.assertEqual(archive.get_high_water(7), 12)
+
+    def test_incremental_sync_oldest_first_resumes(self):
+        client, archive = self.archive(False)
+        self.assertEqual(archive.sync(7), 10)
+        client.add(11, 15)
+        del client.pages[:]
+        self.assertEqual(archive.sync(7), 5)
+        self.assertEqual(client.pages, [4, 5, 6])
+        self.assertEqual(len(archive), 15)
+
+    def test_failed_sync_rolls_back(self):
+        client, archive = self.archive(False)
+
+        def fail(page, page_size, user_integration_id):
+            if page == 2:
+                raise ValueError('network down')
+            return client.messages[:page_size]
+
+        client.get_application_messages = fail
+        with self.assertRaises(ValueError):
+            archive.sync(7)
+        self.assertEqual(len(archive), 0)
+        self.assertIsNone(archive.get_high_water(7))
+
+    def test_search_and_lookup(self):
+        client, archive = self.archive(True)
+        archive.sync(7)
+        found = archive.search('message 3', user_integration_id=7)
+        self.assertEqual([message['id'] for message in found], [3])
+        self.assertEqual(archive.get_message(7, 4, fetch=False)['id'], 4)
+        self.assertIsNone(archive.get_message(7, 99, fetch=False))
+        self.assertEqual([message['id'] for message in
+                          archive.messages(since=5, until=6)], [6, 5])
+
+    def test_migrates_sync_state(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'archive.db')
+        db = sqlite3.connect(path)
+        db.execute('CREATE TABLE sync_state ('
+                   ' user_integration_id INTEGER PRIMARY KEY,'
+                   ' high_water INTEGER)')
+        db.execute('INSERT INTO sync_state VALUES (7, 8)')
+        db.commit()
+        db.close()
+
+        client, archive = self.archive(False, path)
+        self.assertEqual(archive.sync(7), 2)
+        self.assertEqual(archive.get_high_water(7), 10)
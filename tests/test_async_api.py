@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import io
+
+from yellowant import (
+    AsyncYellowAnt, YellowAntError, YellowAntAuthError,
+    YellowAntRateLimitError
+)
+from yellowant.retry import RetryPolicy
+
+from .config import unittest
+from .server import FakeServer
+
+
+@unittest.skipIf(AsyncYellowAnt is None, 'requires Python 3.7+ and aiohttp')
+class AsyncYellowAntTestCase(unittest.TestCase):
+    def setUp(self):
+        import asyncio
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.server = FakeServer()
+        self.addCleanup(self.server.close)
+        self.api = self.client()
+
+    def client(self, **kwargs):
+        api = AsyncYellowAnt(access_token='token',
+                             api_url=self.server.api_url, **kwargs)
+        self.addCleanup(lambda: self.wait(api.close()))
+        return api
+
+    def wait(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_get(self):
+        self.server.add('user/profile/', json={'id': 1})
+        self.assertEqual(self.wait(self.api.get_user_profile()), {'id': 1})
+        method, path, headers, _ = self.server.requests[-1]
+        self.assertEqual((method, path), ('GET', '/api/user/profile/'))
+        self.assertEqual(headers['Authorization'], 'Bearer token')
+
+    def test_token_type(self):
+        self.server.add('user/profile/', json={'id': 1})
+        api = self.client(token_type='token')
+        self.wait(api.get_user_profile())
+        self.assertEqual(self.server.requests[-1][2]['Authorization'],
+                         'Token token')
+
+    def test_post_params_and_body(self):
+        self.server.add('user/message/', json={'id': 1})
+        self.wait(self.api.add_message(text='hi'))
+        self.assertEqual(self.server.requests[-1][3], b'{"text": "hi"}')
+        self.wait(self.api.post('user/message/', body=b'{"a": 1}'))
+        self.assertEqual(self.server.requests[-1][3], b'{"a": 1}')
+
+    def test_files(self):
+        self.server.add('user/message/', json={'id': 1})
+        self.wait(self.api.post('user/message/', params={
+            'text': 'hi', 'tags': ['a'],
+            'attachment': io.BytesIO(b'file contents')}))
+        _, _, headers, body = self.server.requests[-1]
+        self.assertTrue(headers['Content-Type'].startswith(
+            'multipart/form-data'))
+        self.assertIn(b'file contents', body)
+        self.assertIn(b'["a"]', body)
+
+    def test_error_statuses(self):
+        for status, error_type in ((404, YellowAntError),
+                                   (401, YellowAntAuthError),
+                                   (429, YellowAntRateLimitError)):
+            self.server.routes.clear()
+            self.server.add('user/profile/', status=status,
+                            json={'errors': [{'message': 'nope'}]})
+            with self.assertRaises(error_type) as e:
+                self.wait(self.api.get_user_profile())
+            self.assertEqual(e.exception.error_code, status)
+            self.assertIn('nope', str(e.exception))
+
+    def test_invalid_json(self):
+        self.server.add('user/profile/', body=b'<html>')
+        with self.assertRaises(YellowAntError):
+            self.wait(self.api.get_user_profile())
+
+    def test_connection_errors(self):
+        api = AsyncYellowAnt(access_token='token',
+                             api_url='http://127.0.0.1:1/api/%s')
+        self.addCleanup(lambda: self.wait(api.close()))
+        with self.assertRaises(YellowAntError):
+            self.wait(api.get_user_profile())
+
+    def test_retries(self):
+        self.server.add('user/profile/', status=503)
+        self.server.add('user/profile/', json={'id': 1})
+        api = self.client(retry_policy=RetryPolicy(backoff_factor=0))
+        self.assertEqual(self.wait(api.get_user_profile()), {'id': 1})
+        self.assertEqual(len(self.server.requests), 2)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from yellowant import YellowAnt, YellowAntError
+from yellowant.batch import Batch
+from yellowant.deadline import Deadline, get_deadline
+from yellowant.priority import get_priority, priority
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.api = YellowAnt(access_token='token', transport=self.transport)
+
+    def test_endpoint_methods_return_futures(self):
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+        with self.api.batch(max_workers=2) as batch:
+            futures = [batch.get_user_profile() for _ in range(3)]
+        self.assertEqual([future.result() for future in futures],
+                         [{'id': 1}] * 3)
+
+    def test_failures_do_not_abort_others(self):
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+        with Batch() as batch:
+            batch.submit(self.api.get_user_profile)
+            batch.submit(self.api.get_application_logs)
+            batch.submit(self.api.get_user_profile)
+        results = batch.results()
+        self.assertEqual(results[0], {'id': 1})
+        self.assertIsInstance(results[1], YellowAntError)
+        self.assertEqual(results[2], {'id': 1})
+
+    def test_runs_concurrently(self):
+        barrier = threading.Event()
+        calls = []
+
+        def call():
+            calls.append(True)
+            if len(calls) == 2:
+                barrier.set()
+            return barrier.wait(1)
+        with Batch(max_workers=2) as batch:
+            batch.submit(call)
+            batch.submit(call)
+        self.assertEqual(batch.results(), [True, True])
+
+    def test_unknown_attribute(self):
+        with Batch(self.api) as batch:
+            with self.assertRaises(AttributeError):
+                batch.request
+
+    def test_calls_run_within_deadline_and_priority(self):
+        with Batch() as batch:
+            with Deadline(30) as deadline, priority('bulk'):
+                future = batch.submit(lambda: (get_deadline(), get_priority()))
+            plain = batch.submit(lambda: (get_deadline(), get_priority()))
+        self.assertEqual(future.result(), (deadline, 'bulk'))
+        self.assertEqual(plain.result(), (None, None))
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+import shutil
+import tempfile
+import time
+
+from yellowant import YellowAnt, YellowAntError
+from yellowant.cache import (
+    FileCache, IntegrationCache, MemoryCache, ResponseCache
+)
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class MemoryCacheTestCase(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = MemoryCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+
+    def test_get_or_set(self):
+        cache = MemoryCache(maxsize=2)
+        self.assertEqual(cache.get_or_set('a', lambda: 1), 1)
+        self.assertEqual(cache.get_or_set('a', lambda: 2), 1)
+        cache.set('b', 2)
+        cache.get_or_set('c', lambda: 3)
+        self.assertNotIn('a', cache)
+
+    def test_get_or_set_calls_factory_without_lock(self):
+        cache = MemoryCache()
+        # would deadlock if the factory ran with the lock held
+        self.assertEqual(cache.get_or_set(
+            'a', lambda: cache.get_or_set('b', lambda: 2)), 2)
+
+    def test_prune_idle_entries(self):
+        cache = MemoryCache()
+        cache.set('a', 1)
+        cache.set('b', 2)
+        time.sleep(0.05)
+        cache.set('c', 3)
+        cache.get('a')
+        cache.prune(0.04)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+
+
+class FileCacheTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = FileCache(directory)
+        cache.set('key', {'a': 1})
+        self.assertEqual(FileCache(directory).get('key'), {'a': 1})
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.transport.add('GET', 'user/profile/', json={'id': 1},
+                           headers={'ETag': '"v1"'})
+
+    def client(self, access_token='token', cache=None):
+        return YellowAnt(access_token=access_token, transport=self.transport,
+                         response_cache=cache or self.cache)
+
+    def test_serves_fresh_entries(self):
+        self.cache = ResponseCache(ttls={'user/profile': 60})
+        api = self.client()
+        self.assertEqual(api.get_user_profile(), {'id': 1})
+        self.assertEqual(api.get_user_profile(), {'id': 1})
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_entries_are_per_token(self):
+        self.cache = ResponseCache(ttls={'user/profile': 60})
+        self.client('a').get_user_profile()
+        self.client('b').get_user_profile()
+        self.assertEqual(len(self.transport.requests), 2)
+
+    def test_revalidates_expired_entries(self):
+        self.cache = ResponseCache(ttls={'user/profile': -1})
+        api = self.client()
+        api.get_user_profile()
+        self.transport.reset()
+        self.transport.add('GET', 'user/profile/', status=304)
+        self.assertEqual(api.get_user_profile(), {'id': 1})
+        self.assertEqual(self.transport.requests[-1].headers['If-None-Match'],
+                         '"v1"')
+
+
+class IntegrationCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.transport.add('GET', 'user/integration/1/', json={'v': 1})
+        self.cache = IntegrationCache()
+
+    def client(self, access_token='token'):
+        return YellowAnt(access_token=access_token, transport=self.transport,
+                         integration_cache=self.cache)
+
+    def test_serves_cached_integration(self):
+        api = self.client()
+        self.assertEqual(api.get_user_integration(id=1), {'v': 1})
+        self.assertEqual(api.get_user_integration(id=1), {'v': 1})
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_entries_are_per_token(self):
+        self.client('a').get_user_integration(id=1)
+        self.client('b').get_user_integration(id=1)
+        self.assertEqual(len(self.transport.requests), 2)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_update_writes_through(self):
+        self.transport.add('PATCH', 'user/integration/1/', json={'v': 2})
+        api = self.client()
+        api.get_user_integration(id=1)
+        api.update_user_integration(id=1, v=2)
+        self.assertEqual(api.get_user_integration(id=1), {'v': 2})
+        self.assertEqual(len(self.transport.requests), 2)
+
+    def test_delete_invalidates(self):
+        self.transport.add('DELETE', 'user/integration/1/', json={})
+        api = self.client()
+        other = self.client('other')
+        api.get_user_integration(id=1)
+        other.get_user_integration(id=1)
+        api.delete_user_integration(id=1)
+        self.assertEqual(self.cache.get(1, 'token'), (None, False))
+        self.assertEqual(self.cache.get(1, 'other')[0], {'v': 1})
+
+    def test_failed_delete_invalidates(self):
+        self.transport.add('DELETE', 'user/integration/1/', status=500)
+        api = self.client()
+        api.get_user_integration(id=1)
+        with self.assertRaises(YellowAntError):
+            api.delete_user_integration(id=1)
+        self.assertEqual(self.cache.get(1, 'token'), (None, False))
+
+    def test_control_params_use_the_cache(self):
+        api = self.client()
+        self.assertEqual(api.get_user_integration(id=1, _deadline=5),
+                         {'v': 1})
+        self.assertEqual(api.get_user_integration(id=1, _priority='bulk'),
+                         {'v': 1})
+        self.assertEqual(len(self.transport.requests), 1)
+        self.assertNotIn('_deadline', self.transport.requests[0].url)
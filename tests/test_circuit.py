@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import datetime
+import time
+
+import requests
+
+from yellowant import (
+    YellowAnt, YellowAntError, YellowAntCircuitOpenError,
+    YellowAntDeadlineError, YellowAntRateLimitError
+)
+from yellowant.circuit import CircuitBreaker
+from yellowant.priority import PriorityLanes
+from yellowant.ratelimit import RateLimiter
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class _SlowTransport(FakeTransport):
+    """Waits out the timeout of every call before answering"""
+
+    def send(self, method, url, session=None, **kwargs):
+        time.sleep(kwargs.get('timeout') or 0)
+        return FakeTransport.send(self, method, url, session=session,
+                                  **kwargs)
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.breaker = CircuitBreaker(minimum_calls=2, reset_timeout=0.05)
+        self.api = YellowAnt(access_token='token', transport=self.transport,
+                             circuit_breaker=self.breaker,
+                             priority_lanes=PriorityLanes())
+
+    def fail(self, times, **params):
+        for _ in range(times):
+            with self.assertRaises(YellowAntError):
+                self.api.get_user_profile(**params)
+
+    def test_opens_on_failure_codes(self):
+        self.transport.add('GET', 'user/profile/', status=503)
+        self.fail(2)
+        self.assertEqual(self.breaker.get_state('user/profile'), 'open')
+
+        sent = len(self.transport.requests)
+        with self.assertRaises(YellowAntCircuitOpenError) as e:
+            self.api.get_user_profile()
+        self.assertEqual(e.exception.endpoint, 'user/profile')
+        self.assertEqual(len(self.transport.requests), sent)
+
+    def test_other_endpoints_unaffected(self):
+        self.transport.add('GET', 'user/profile/', status=503)
+        self.transport.add('POST', 'user/message/', json={'id': 1})
+        self.fail(2)
+        self.assertEqual(self.api.add_message(text='hi'), {'id': 1})
+
+    def test_client_errors_are_not_failures(self):
+        self.transport.add('GET', 'user/profile/', status=404)
+        self.fail(4)
+        self.assertEqual(self.breaker.get_state('user/profile'), 'closed')
+
+    def test_caller_errors_are_not_counted(self):
+        self.transport.add('GET', 'user/profile/', json={})
+        self.fail(4, _priority='unknown')
+        self.assertEqual(self.breaker.get_state('user/profile'), 'closed')
+        self.assertEqual(len(self.transport.requests), 0)
+
+    def test_transport_errors_are_failures(self):
+        self.transport.add('GET', 'user/profile/',
+                           exception=requests.ConnectionError('refused'))
+        self.fail(2)
+        self.assertEqual(self.breaker.get_state('user/profile'), 'open')
+
+    def test_half_open_trial_closes_or_reopens(self):
+        self.transport.add('GET', 'user/profile/', status=503)
+        self.fail(2)
+        time.sleep(0.06)
+        self.assertEqual(self.breaker.get_state('user/profile'), 'half-open')
+        self.fail(1)
+        self.assertEqual(self.breaker.get_state('user/profile'), 'open')
+
+        time.sleep(0.06)
+        self.transport.reset()
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+        self.assertEqual(self.api.get_user_profile(), {'id': 1})
+        self.assertEqual(self.breaker.get_state('user/profile'), 'closed')
+
+    def test_trial_slot_given_back_on_unencodable_params(self):
+        self.transport.add('POST', 'user/message/', status=503)
+        for _ in range(2):
+            with self.assertRaises(YellowAntError):
+                self.api.add_message(text='hi')
+        time.sleep(0.06)
+
+        with self.assertRaises(TypeError):
+            self.api.add_message(data={'at': datetime.datetime.now()})
+        self.transport.reset()
+        self.transport.add('POST', 'user/message/', json={'id': 1})
+        self.assertEqual(self.api.add_message(text='hi'), {'id': 1})
+        self.assertEqual(self.breaker.get_state('user/message'), 'closed')
+
+    def test_client_side_rate_limit_is_not_counted(self):
+        self.transport.add('GET', 'user/profile/', status=503)
+        self.fail(2)
+        time.sleep(0.06)
+
+        limiter = RateLimiter(rate=1, max_wait=0)
+        api = YellowAnt(access_token='token', transport=self.transport,
+                        circuit_breaker=self.breaker, rate_limiter=limiter)
+        limiter.try_acquire('None:user/profile')
+        sent = len(self.transport.requests)
+        with self.assertRaises(YellowAntRateLimitError):
+            api.get_user_profile()
+        self.assertEqual(len(self.transport.requests), sent)
+        # the trial slot is given back rather than closing the circuit
+        self.assertEqual(self.breaker.get_state('user/profile'), 'half-open')
+        self.fail(1)
+        self.assertEqual(self.breaker.get_state('user/profile'), 'open')
+
+    def test_invalid_json_is_an_outcome(self):
+        self.transport.add('GET', 'user/profile/', status=503)
+        self.fail(2)
+        time.sleep(0.06)
+        self.transport.reset()
+        self.transport.add('GET', 'user/profile/', body=b'<html>')
+        self.fail(1)
+        self.assertEqual(self.breaker.get_state('user/profile'), 'closed')
+
+    def test_deadline_cut_timeouts_are_failures(self):
+        transport = _SlowTransport()
+        transport.add('GET', 'user/profile/',
+                      exception=requests.Timeout('read timed out'))
+        api = YellowAnt(access_token='token', transport=transport,
+                        circuit_breaker=self.breaker)
+        for _ in range(2):
+            with self.assertRaises(YellowAntDeadlineError):
+                api.get_user_profile(_deadline=0.01)
+        self.assertEqual(self.breaker.get_state('user/profile'), 'open')
+
+    def test_deadline_exceeded_before_sending_is_not_counted(self):
+        self.transport.add('GET', 'user/profile/', json={})
+        self.fail(4, _deadline=0)
+        self.assertEqual(self.breaker.get_state('user/profile'), 'closed')
+
+    def test_reset(self):
+        self.transport.add('GET', 'user/profile/', status=503)
+        self.fail(2)
+        self.breaker.reset()
+        self.assertEqual(self.breaker.get_state('user/profile'), 'closed')
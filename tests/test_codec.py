@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from yellowant import YellowAnt, YellowAntError, codec
+from yellowant.codec import JSONCodec, OrjsonCodec, orjson
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class CodecTestCase(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(codec.set_codec, codec.get_codec())
+
+    def test_set_codec_by_name(self):
+        codec.set_codec('json')
+        self.assertIsInstance(codec.get_codec(), JSONCodec)
+        with self.assertRaises(YellowAntError):
+            codec.set_codec('yaml')
+
+    def test_json_codec(self):
+        json_codec = JSONCodec()
+        self.assertEqual(json_codec.dumps_bytes({'a': u'\xe9'}),
+                         b'{"a": "\\u00e9"}')
+        self.assertEqual(json_codec.loads(b'{"a": 1}'), {'a': 1})
+        with self.assertRaises(ValueError):
+            json_codec.loads('{')
+
+
+@unittest.skipIf(orjson is None, 'orjson is not installed')
+class OrjsonCodecTestCase(unittest.TestCase):
+    def setUp(self):
+        self.codec = OrjsonCodec()
+        self.addCleanup(codec.set_codec, codec.get_codec())
+
+    def test_round_trip(self):
+        encoded = self.codec.dumps_bytes({'a': [1, u'\xe9'], 2: None})
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(self.codec.loads(encoded),
+                         {'a': [1, u'\xe9'], '2': None})
+        self.assertEqual(self.codec.dumps({'a': 1}), '{"a":1}')
+
+    def test_falls_back_to_json(self):
+        self.assertEqual(self.codec.dumps_bytes({'a': 2 ** 70}),
+                         b'{"a": 1180591620717411303424}')
+        self.assertEqual(self.codec.dumps({'a': 1}, indent=None),
+                         '{"a": 1}')
+
+    def test_bad_input(self):
+        with self.assertRaises(ValueError):
+            self.codec.loads(b'{')
+
+    def test_client_uses_codec(self):
+        codec.set_codec('orjson')
+        transport = FakeTransport()
+        transport.add('POST', 'user/message/', json={'id': 1})
+        api = YellowAnt(access_token='token', transport=transport)
+        self.assertEqual(api.add_message(text='hi'), {'id': 1})
+        self.assertEqual(transport.requests[-1].body, b'{"text":"hi"}')
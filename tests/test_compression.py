@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import gzip
+import io
+import zlib
+
+from yellowant import YellowAnt, YellowAntError
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class RequestCompressionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.transport.add('POST', 'user/message/', json={'id': 1})
+
+    def client(self, **kwargs):
+        return YellowAnt(access_token='token', transport=self.transport,
+                         **kwargs)
+
+    def test_gzip(self):
+        api = self.client(request_compression='gzip',
+                          compression_threshold=10)
+        api.add_message(text='x' * 100)
+        request = self.transport.requests[-1]
+        self.assertEqual(request.headers['Content-Encoding'], 'gzip')
+        body = gzip.GzipFile(fileobj=io.BytesIO(request.body)).read()
+        self.assertEqual(body, b'{"text": "' + b'x' * 100 + b'"}')
+
+    def test_deflate_pre_encoded_body(self):
+        api = self.client(request_compression='deflate',
+                          compression_threshold=10)
+        api.post('user/message/', body=b'{"text": "' + b'x' * 100 + b'"}')
+        request = self.transport.requests[-1]
+        self.assertEqual(request.headers['Content-Encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(request.body),
+                         b'{"text": "' + b'x' * 100 + b'"}')
+
+    def test_small_bodies_not_compressed(self):
+        api = self.client(request_compression='gzip')
+        api.add_message(text='hi')
+        request = self.transport.requests[-1]
+        self.assertNotIn('Content-Encoding', request.headers)
+        self.assertEqual(request.body, b'{"text": "hi"}')
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(YellowAntError):
+            self.client(request_compression='br')
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from yellowant import YellowAnt, YellowAntDeadlineError, AsyncYellowAnt
+from yellowant.concurrency import AdaptiveLimiter
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class AdaptiveLimiterTestCase(unittest.TestCase):
+    def test_acquire_blocks_at_limit(self):
+        limiter = AdaptiveLimiter(initial=2)
+        self.assertTrue(limiter.acquire())
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire(timeout=0.01))
+        self.assertEqual(limiter.in_flight, 2)
+
+        limiter.release(0.01)
+        self.assertTrue(limiter.acquire(timeout=0.01))
+
+    def test_backs_off_on_overload(self):
+        limiter = AdaptiveLimiter(initial=8, min_limit=2)
+        limiter.acquire()
+        limiter.release(0.01, overloaded=True)
+        self.assertEqual(limiter.limit, 4)
+
+        # a burst of failures only backs off once per baseline latency
+        limiter.acquire()
+        limiter.release(0.01, overloaded=True)
+        self.assertEqual(limiter.limit, 4)
+
+        time.sleep(0.02)
+        for _ in range(2):
+            limiter.acquire()
+            limiter.release(0.01, overloaded=True)
+            time.sleep(0.02)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_grows_while_healthy_under_load(self):
+        limiter = AdaptiveLimiter(initial=2, max_limit=3)
+        for _ in range(20):
+            limiter.acquire()
+            limiter.acquire()
+            limiter.release(0.01)
+            limiter.release(0.01)
+        self.assertEqual(limiter.limit, 3)
+
+    def test_does_not_grow_when_idle(self):
+        limiter = AdaptiveLimiter(initial=10)
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(0.01)
+        self.assertEqual(limiter.limit, 10)
+
+    def test_backs_off_on_latency_inflation(self):
+        limiter = AdaptiveLimiter(initial=8, short_window=1)
+        for latency in (0.01, 0.01, 0.5):
+            limiter.acquire()
+            limiter.release(latency)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_priority_order(self):
+        limiter = AdaptiveLimiter(initial=1)
+        limiter.acquire()
+        order = []
+
+        def wait(priority):
+            limiter.acquire(priority=priority)
+            order.append(priority)
+            limiter.release(0.01)
+
+        threads = []
+        for priority in (1, 0):
+            thread = threading.Thread(target=wait, args=(priority,))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.05)
+        limiter.release(0.01)
+        for thread in threads:
+            thread.join(1)
+        self.assertEqual(order, [0, 1])
+
+    def test_client_releases_slots(self):
+        transport = FakeTransport()
+        transport.add('GET', 'user/profile/', json={'id': 1})
+        transport.add('POST', 'user/message/', status=503)
+        limiter = AdaptiveLimiter(initial=4)
+        api = YellowAnt(access_token='token', transport=transport,
+                        concurrency_limiter=limiter)
+        api.get_user_profile()
+        self.assertEqual(limiter.in_flight, 0)
+        self.assertEqual(limiter.limit, 4)
+
+        with self.assertRaises(Exception):
+            api.add_message(text='hi')
+        self.assertEqual(limiter.in_flight, 0)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_client_deadline_while_waiting(self):
+        transport = FakeTransport()
+        transport.add('GET', 'user/profile/', json={'id': 1})
+        limiter = AdaptiveLimiter(initial=1)
+        limiter.acquire()
+        api = YellowAnt(access_token='token', transport=transport,
+                        concurrency_limiter=limiter)
+        with self.assertRaises(YellowAntDeadlineError):
+            api.get_user_profile(_deadline=0.02)
+        self.assertEqual(len(transport.requests), 0)
+
+
+@unittest.skipIf(AsyncYellowAnt is None, 'requires Python 3.7+ and aiohttp')
+class AsyncAdaptiveLimiterTestCase(unittest.TestCase):
+    def setUp(self):
+        import asyncio
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_acquire_and_release(self):
+        import asyncio
+        from yellowant.async_api import AsyncAdaptiveLimiter
+        limiter = AsyncAdaptiveLimiter(initial=2)
+        run = self.loop.run_until_complete
+        self.assertTrue(run(limiter.acquire()))
+        self.assertTrue(run(limiter.acquire()))
+        self.assertFalse(run(limiter.acquire(timeout=0.01)))
+
+        waiting = self.loop.create_task(limiter.acquire())
+        run(asyncio.sleep(0.01))
+        self.assertFalse(waiting.done())
+        run(limiter.release(0.01))
+        self.assertTrue(run(waiting))
+        self.assertEqual(limiter.in_flight, 2)
+        self.assertEqual(limiter._waiting, {0: 0})
+
+    def test_backs_off_on_overload(self):
+        from yellowant.async_api import AsyncAdaptiveLimiter
+        limiter = AsyncAdaptiveLimiter(initial=8)
+        self.loop.run_until_complete(limiter.acquire())
+        self.loop.run_until_complete(limiter.release(0.01, overloaded=True))
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.in_flight, 0)
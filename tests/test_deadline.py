@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from yellowant import AsyncYellowAnt, YellowAnt, YellowAntDeadlineError
+from yellowant.deadline import Deadline, get_deadline
+from yellowant.ratelimit import RateLimiter
+from yellowant.retry import RetryPolicy
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+from .server import FakeServer
+
+
+class _RecordingTransport(FakeTransport):
+    """Records the timeout of every call"""
+
+    def __init__(self):
+        FakeTransport.__init__(self)
+        self.timeouts = []
+
+    def send(self, method, url, session=None, **kwargs):
+        self.timeouts.append(kwargs.get('timeout'))
+        return FakeTransport.send(self, method, url, session=session,
+                                  **kwargs)
+
+
+class DeadlineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = _RecordingTransport()
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+
+    def test_closest_deadline_wins(self):
+        self.assertIsNone(get_deadline())
+        with Deadline(10) as outer:
+            with Deadline(60):
+                self.assertIs(get_deadline(), outer)
+            with Deadline(1) as inner:
+                self.assertIs(get_deadline(), inner)
+            self.assertIs(get_deadline(), outer)
+        self.assertIsNone(get_deadline())
+
+    def test_deadlines_are_per_thread(self):
+        seen = []
+        with Deadline(10):
+            thread = threading.Thread(
+                target=lambda: seen.append(get_deadline()))
+            thread.start()
+            thread.join(1)
+        self.assertEqual(seen, [None])
+
+    def test_get_timeout(self):
+        deadline = Deadline(1)
+        self.assertLessEqual(deadline.get_timeout(), 1)
+        self.assertEqual(deadline.get_timeout(0.5), 0.5)
+        self.assertLessEqual(deadline.get_timeout(5), 1)
+        connect, read = deadline.get_timeout((0.1, None))
+        self.assertEqual(connect, 0.1)
+        self.assertLessEqual(read, 1)
+
+    def test_coerce(self):
+        deadline = Deadline(1)
+        self.assertIs(Deadline.coerce(deadline), deadline)
+        self.assertEqual(Deadline.coerce(2).timeout, 2)
+
+    def test_caps_request_timeout(self):
+        api = YellowAnt(access_token='token', transport=self.transport,
+                        client_args={'timeout': 30})
+        api.get_user_profile(_deadline=2)
+        self.assertLessEqual(self.transport.timeouts[-1], 2)
+
+        api.get_user_profile()
+        self.assertEqual(self.transport.timeouts[-1], 30)
+
+    def test_deadline_parameter_is_not_sent(self):
+        api = YellowAnt(access_token='token', transport=self.transport)
+        api.get_user_profile(_deadline=2)
+        self.assertNotIn('_deadline', self.transport.requests[-1].url)
+
+    def test_expired_deadline_sends_nothing(self):
+        api = YellowAnt(access_token='token', transport=self.transport)
+        with self.assertRaises(YellowAntDeadlineError):
+            api.get_user_profile(_deadline=0)
+        self.assertEqual(self.transport.requests, [])
+
+    def test_covers_retries(self):
+        self.transport.reset()
+        self.transport.add('GET', 'user/profile/', status=503,
+                           headers={'Retry-After': '5'})
+        api = YellowAnt(access_token='token', transport=self.transport,
+                        retry_policy=RetryPolicy(jitter=False))
+        with self.assertRaises(Exception) as e:
+            api.get_user_profile(_deadline=0.5)
+        # waiting 5 seconds for a retry would overrun the deadline
+        self.assertEqual(e.exception.error_code, 503)
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_bounds_rate_limit_waits(self):
+        limiter = RateLimiter(rate=0.5)
+        api = YellowAnt(access_token='token', transport=self.transport,
+                        rate_limiter=limiter)
+        api.get_user_profile()
+        started = time.time()
+        with self.assertRaises(YellowAntDeadlineError):
+            api.get_user_profile(_deadline=0.2)
+        # fails fast, as the next token is 2 seconds away
+        self.assertLess(time.time() - started, 0.1)
+        self.assertEqual(len(self.transport.requests), 1)
+
+
+@unittest.skipIf(AsyncYellowAnt is None, 'requires Python 3.7+ and aiohttp')
+class AsyncDeadlineTestCase(unittest.TestCase):
+    def setUp(self):
+        import asyncio
+        from .coroutines import get_with_header
+        self.get_with_header = get_with_header
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.server = FakeServer()
+        self.addCleanup(self.server.close)
+
+    def client(self, **kwargs):
+        api = AsyncYellowAnt(access_token='token',
+                             api_url=self.server.api_url, **kwargs)
+        self.addCleanup(lambda: self.wait(api.close()))
+        return api
+
+    def wait(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_keeps_last_call(self):
+        self.server.add('user/profile/', json={'id': 1},
+                        headers={'x-rate-limit-remaining': '9'})
+        api = self.client()
+        self.assertEqual(self.wait(self.get_with_header(
+            api, 'user/profile/', 'x-rate-limit-remaining',
+            {'_deadline': 5})), '9')
+        self.assertNotIn('_deadline', self.server.requests[-1][1])
+
+    def test_caps_attempt_timeout(self):
+        self.server.add('user/profile/', json={'id': 1})
+        self.server.delay = 0.5
+        api = self.client(client_args={'timeout': 30})
+        started = time.time()
+        with self.assertRaises(YellowAntDeadlineError):
+            self.wait(api.get_user_profile(_deadline=0.1))
+        self.assertLess(time.time() - started, 0.4)
+
+    def test_expired_deadline_sends_nothing(self):
+        self.server.add('user/profile/', json={'id': 1})
+        with self.assertRaises(YellowAntDeadlineError):
+            self.wait(self.client().get_user_profile(_deadline=0))
+        self.assertEqual(self.server.requests, [])
+
+    def test_skips_retries_overrunning_deadline(self):
+        self.server.add('user/profile/', status=503,
+                        headers={'Retry-After': '5'})
+        api = self.client(retry_policy=RetryPolicy(jitter=False))
+        with self.assertRaises(Exception) as e:
+            self.wait(api.get_user_profile(_deadline=0.5))
+        self.assertEqual(e.exception.error_code, 503)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_bounds_rate_limit_waits(self):
+        self.server.add('user/profile/', json={'id': 1})
+        api = self.client(rate_limiter=RateLimiter(rate=0.5))
+        self.wait(api.get_user_profile())
+        started = time.time()
+        with self.assertRaises(YellowAntDeadlineError):
+            self.wait(api.get_user_profile(_deadline=0.2))
+        self.assertLess(time.time() - started, 0.1)
+        self.assertEqual(len(self.server.requests), 1)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import json
+
+from yellowant import YellowAnt, YellowAntError
+from yellowant.deadline import get_deadline
+from yellowant.fanout import MessageBroadcast
+from yellowant.messageformat import MessageClass
+from yellowant.priority import get_priority
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class _RecordingTransport(FakeTransport):
+    def __init__(self):
+        FakeTransport.__init__(self)
+        self.contexts = []
+
+    def send(self, method, url, session=None, **kwargs):
+        self.contexts.append((get_deadline(), get_priority()))
+        return FakeTransport.send(self, method, url, session=session,
+                                  **kwargs)
+
+
+class MessageBroadcastTestCase(unittest.TestCase):
+    def test_body_for(self):
+        broadcast = MessageBroadcast({'message_text': u'caf\xe9',
+                                      'requester_application': 1},
+                                     extra='x')
+        self.assertEqual(json.loads(broadcast.body_for(7).decode('utf-8')),
+                         {'message_text': u'caf\xe9', 'extra': 'x',
+                          'requester_application': 7})
+
+    def test_body_for_empty_message(self):
+        broadcast = MessageBroadcast({}, target_key='id')
+        self.assertEqual(json.loads(broadcast.body_for('x').decode('utf-8')),
+                         {'id': 'x'})
+
+    def test_message_class(self):
+        message = MessageClass()
+        message.message_text = 'Build #42 failed'
+        body = json.loads(MessageBroadcast(message).body_for(3)
+                          .decode('utf-8'))
+        self.assertEqual(body['message_text'], 'Build #42 failed')
+        self.assertEqual(body['requester_application'], 3)
+
+    def test_send(self):
+        transport = FakeTransport()
+        transport.add('POST', 'user/message/', json={'id': 1})
+        api = YellowAnt(access_token='token', transport=transport)
+        results = api.broadcast_message({'message_text': 'hi'}, [1, 2])
+        self.assertEqual(results, [{'id': 1}, {'id': 1}])
+        self.assertEqual(sorted(json.loads(request.body.decode('utf-8'))
+                                ['requester_application']
+                                for request in transport.requests), [1, 2])
+
+    def test_send_requires_client(self):
+        with self.assertRaises(YellowAntError):
+            MessageBroadcast({}).send([1])
+
+    def test_control_params_apply_to_the_calls(self):
+        transport = _RecordingTransport()
+        transport.add('POST', 'user/message/', json={'id': 1})
+        api = YellowAnt(access_token='token', transport=transport)
+        api.broadcast_message({'message_text': 'hi'}, [1, 2],
+                              _priority='bulk', _deadline=5)
+        for request in transport.requests:
+            self.assertEqual(sorted(json.loads(request.body.decode('utf-8'))),
+                             ['message_text', 'requester_application'])
+        self.assertEqual(len(transport.contexts), 2)
+        for deadline, lane in transport.contexts:
+            self.assertIsNotNone(deadline)
+            self.assertEqual(lane, 'bulk')
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import gc
+import threading
+import weakref
+
+from yellowant import AsyncYellowAnt, YellowAnt, YellowAntError
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+from .server import FakeServer
+
+
+class LastCallTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.transport.add('GET', 'user/profile/', json={'id': 1},
+                           headers={'x-rate-limit-remaining': '9'})
+        self.api = YellowAnt(access_token='token', transport=self.transport)
+
+    def test_before_any_call(self):
+        with self.assertRaises(YellowAntError):
+            self.api.get_lastfunction_header('x-rate-limit-remaining')
+
+    def test_metadata(self):
+        self.api.get_user_profile()
+        self.assertEqual(
+            self.api.get_lastfunction_header('x-rate-limit-remaining'), '9')
+        metadata = self.api.get_lastfunction_metadata()
+        self.assertEqual(metadata['status_code'], 200)
+        self.assertEqual(metadata['api_call'],
+                         self.api.api_url % 'user/profile/')
+
+    def test_kept_per_thread(self):
+        self.api.get_user_profile()
+        seen = []
+
+        def other_thread():
+            try:
+                self.api.get_lastfunction_header('x-rate-limit-remaining')
+            except YellowAntError as e:
+                seen.append(e)
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join(1)
+        self.assertIsInstance(seen[0], YellowAntError)
+        self.assertEqual(
+            self.api.get_lastfunction_header('x-rate-limit-remaining'), '9')
+
+
+@unittest.skipIf(AsyncYellowAnt is None, 'requires Python 3.7+ and aiohttp')
+class AsyncLastCallTestCase(unittest.TestCase):
+    def setUp(self):
+        import asyncio
+        from .coroutines import get_with_header
+        self.get_with_header = get_with_header
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.server = FakeServer()
+        self.addCleanup(self.server.close)
+        self.server.add('a/', json={}, headers={'x-name': 'a'})
+        self.server.add('b/', json={}, headers={'x-name': 'b'})
+        self.api = AsyncYellowAnt(access_token='token',
+                                  api_url=self.server.api_url)
+        self.addCleanup(lambda: self.loop.run_until_complete(
+            self.api.close()))
+
+    def test_kept_per_task(self):
+        import asyncio
+        self.api._last_call = {'headers': {'x-name': 'main'}}
+        tasks = [self.loop.create_task(self.get_with_header(
+            self.api, endpoint, 'x-name')) for endpoint in ('a/', 'b/')]
+        results = self.loop.run_until_complete(asyncio.gather(*tasks))
+        self.assertEqual(results, ['a', 'b'])
+        self.assertEqual(self.api.get_lastfunction_header('x-name'), 'main')
+
+    def test_clients_are_not_kept_alive(self):
+        api = AsyncYellowAnt(access_token='token')
+        api._last_call = {'headers': {}}
+        self.api._last_call = {'headers': {'x-name': 'main'}}
+        client = weakref.ref(api)
+        del api
+        gc.collect()
+        self.assertIsNone(client())
+        self.assertEqual(self.api.get_lastfunction_header('x-name'), 'main')
+
+    def test_one_context_variable_for_all_clients(self):
+        import contextvars
+        self.api._last_call = {'headers': {}}
+        size = len(contextvars.copy_context())
+        for _ in range(3):
+            AsyncYellowAnt(access_token='token')._last_call = {'headers': {}}
+        self.assertEqual(len(contextvars.copy_context()), size)
+
+
+class LastCallCaptureTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.transport.add('GET', 'user/profile/', json={'id': 1},
+                           headers={'x-rate-limit-remaining': '9'})
+
+    def client(self, last_call_capture):
+        return YellowAnt(access_token='token', transport=self.transport,
+                         last_call_capture=last_call_capture)
+
+    def test_lazy_content_is_decoded_when_read(self):
+        api = self.client('lazy')
+        api.get_user_profile()
+        self.assertNotIn('content', api._last_call)
+        self.assertEqual(api.get_lastfunction_metadata()['content'],
+                         '{"id": 1}')
+        self.assertEqual(
+            api.get_lastfunction_header('x-rate-limit-remaining'), '9')
+
+    def test_full_content_is_decoded_eagerly(self):
+        api = self.client('full')
+        api.get_user_profile()
+        self.assertEqual(api._last_call['content'], '{"id": 1}')
+
+    def test_headers_only(self):
+        api = self.client('headers')
+        api.get_user_profile()
+        metadata = api.get_lastfunction_metadata()
+        self.assertIsNone(metadata['content'])
+        self.assertEqual(metadata['status_code'], 200)
+        self.assertEqual(
+            api.get_lastfunction_header('x-rate-limit-remaining'), '9')
+
+    def test_unknown_mode(self):
+        with self.assertRaises(YellowAntError):
+            self.client('body')
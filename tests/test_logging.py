@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import logging
+
+import requests
+
+from yellowant import YellowAnt, YellowAntError, YellowAntRateLimitError
+from yellowant.ratelimit import RateLimiter
+from yellowant.retry import RetryPolicy
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class LoggingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.records = []
+        handler = logging.Handler()
+        handler.emit = self.records.append
+        logger = logging.getLogger('yellowant')
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        self.transport = FakeTransport()
+
+    def client(self, **kwargs):
+        return YellowAnt(access_token='token', transport=self.transport,
+                         **kwargs)
+
+
+class SlowCallLogTestCase(LoggingTestCase):
+    def test_logs_response(self):
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+        self.client(slow_call_threshold=0).get_user_profile()
+        record = self.records[-1]
+        self.assertEqual(record.endpoint, 'user/profile')
+        self.assertEqual(record.status_code, 200)
+        self.assertEqual(record.retries, 0)
+        self.assertIsNone(record.error)
+
+    def test_fast_calls_not_logged(self):
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+        self.client(slow_call_threshold=60).get_user_profile()
+        self.assertEqual(self.records, [])
+
+    def test_logs_transport_errors(self):
+        self.transport.add('GET', 'user/profile/',
+                           exception=requests.Timeout('timed out'))
+        with self.assertRaises(YellowAntError):
+            self.client(slow_call_threshold=0).get_user_profile()
+        record = self.records[-1]
+        self.assertIsNone(record.status_code)
+        self.assertEqual(record.error, 'Timeout')
+
+    def test_logs_the_error_of_the_last_attempt(self):
+        self.transport.add('GET', 'user/profile/',
+                           exception=requests.ConnectionError('reset'))
+        api = self.client(slow_call_threshold=0,
+                          retry_policy=RetryPolicy(backoff_factor=0),
+                          rate_limiter=RateLimiter(rate=1, max_wait=0))
+        with self.assertRaises(YellowAntRateLimitError):
+            api.get_user_profile()
+        record = self.records[-1]
+        self.assertEqual(record.retries, 1)
+        self.assertEqual(record.error, 'YellowAntRateLimitError')
+
+
+class RateLimitHeadroomLogTestCase(LoggingTestCase):
+    def test_logs_low_headroom(self):
+        self.transport.add('GET', 'user/profile/', json={'id': 1},
+                           headers={'x-rate-limit-remaining': '3'})
+        self.client(rate_limit_headroom=5).get_user_profile()
+        record = self.records[-1]
+        self.assertEqual(record.endpoint, 'user/profile')
+        self.assertEqual(record.remaining, 3)
+
+    def test_enough_headroom(self):
+        self.transport.add('GET', 'user/profile/', json={'id': 1},
+                           headers={'x-rate-limit-remaining': '30'})
+        self.client(rate_limit_headroom=5).get_user_profile()
+        self.assertEqual(self.records, [])
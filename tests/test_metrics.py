@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import requests
+
+from yellowant import (
+    AsyncYellowAnt, YellowAnt, YellowAntError, YellowAntDeadlineError
+)
+from yellowant.concurrency import AdaptiveLimiter
+from yellowant.metrics import Metrics
+from yellowant.retry import RetryPolicy
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+from .server import FakeServer
+
+
+class MetricsTestCase(unittest.TestCase):
+    def test_render(self):
+        metrics = Metrics(buckets=(0.1, 1))
+        event = metrics.start('get', 'https://a/user/profile/',
+                              'user/profile')
+        metrics.finish(event, 200, 12)
+        event = metrics.start('post', 'https://a/user/message/',
+                              'user/message', 5, attempt=1)
+        metrics.finish(event, error=requests.Timeout())
+        lines = metrics.render().splitlines()
+        self.assertIn('yellowant_requests_total{endpoint="user/profile",'
+                      'method="GET",status="200"} 1', lines)
+        self.assertIn('yellowant_exceptions_total{endpoint="user/message",'
+                      'method="POST",exception="Timeout"} 1', lines)
+        self.assertIn('yellowant_retries_total{endpoint="user/message",'
+                      'method="POST"} 1', lines)
+        self.assertIn('yellowant_request_bytes_total{endpoint="user/message",'
+                      'method="POST"} 5', lines)
+        self.assertIn('yellowant_response_bytes_total{endpoint="user/profile",'
+                      'method="GET"} 12', lines)
+        self.assertIn('yellowant_request_duration_seconds_bucket{endpoint='
+                      '"user/profile",method="GET",le="+Inf"} 1', lines)
+        self.assertIn('yellowant_request_duration_seconds_count{endpoint='
+                      '"user/profile",method="GET"} 1', lines)
+        self.assertIn('# TYPE yellowant_request_duration_seconds histogram',
+                      lines)
+
+    def test_escapes_labels(self):
+        metrics = Metrics(prefix='ya')
+        metrics.finish(metrics.start('get', 'u', 'a"b\\c'), 200)
+        self.assertIn('ya_requests_total{endpoint="a\\"b\\\\c",method="GET",'
+                      'status="200"} 1', metrics.render().splitlines())
+
+    def test_reset(self):
+        metrics = Metrics()
+        metrics.finish(metrics.start('get', 'u', 'e'), 200)
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()['requests'], {})
+
+
+class ClientMetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.metrics = Metrics()
+        self.events = []
+        self.metrics.on_response(self.events.append)
+
+    def client(self, **kwargs):
+        return YellowAnt(access_token='token', transport=self.transport,
+                         metrics=self.metrics, **kwargs)
+
+    def test_records_every_attempt(self):
+        self.transport.add('GET', 'user/profile/', status=503)
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+        requests_seen = []
+        self.metrics.on_request(requests_seen.append)
+        self.client(retry_policy=RetryPolicy(backoff_factor=0)) \
+            .get_user_profile()
+        self.assertEqual([event['attempt'] for event in requests_seen],
+                         [0, 1])
+        self.assertEqual([event['status_code'] for event in self.events],
+                         [503, 200])
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['retries'], {('user/profile', 'GET'): 1})
+
+    def test_records_transport_errors(self):
+        self.transport.add('GET', 'user/profile/',
+                           exception=requests.ConnectionError('refused'))
+        with self.assertRaises(YellowAntError):
+            self.client().get_user_profile()
+        self.assertEqual(self.events[-1]['error'].__class__,
+                         requests.ConnectionError)
+        self.assertEqual(self.metrics.snapshot()['exceptions'], {
+            ('user/profile', 'GET', 'ConnectionError'): 1})
+
+    def test_records_other_errors(self):
+        limiter = AdaptiveLimiter(initial=1)
+        limiter.acquire()
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+        with self.assertRaises(YellowAntDeadlineError):
+            self.client(concurrency_limiter=limiter).get_user_profile(
+                _deadline=0.01)
+        # no fake response registered
+        with self.assertRaises(YellowAntError):
+            self.client().get_application_logs()
+        self.assertEqual(self.metrics.snapshot()['exceptions'], {
+            ('user/profile', 'GET', 'YellowAntDeadlineError'): 1,
+            ('user/logs', 'GET', 'YellowAntError'): 1})
+        self.assertEqual(len(self.events), 2)
+
+
+@unittest.skipIf(AsyncYellowAnt is None, 'requires Python 3.7+ and aiohttp')
+class AsyncClientMetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        import asyncio
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.server = FakeServer()
+        self.addCleanup(self.server.close)
+        self.server.add('user/profile/', json={'id': 1})
+        self.metrics = Metrics()
+        self.api = AsyncYellowAnt(access_token='token',
+                                  api_url=self.server.api_url,
+                                  metrics=self.metrics)
+        self.addCleanup(lambda: self.loop.run_until_complete(
+            self.api.close()))
+
+    def test_records_responses(self):
+        self.loop.run_until_complete(self.api.get_user_profile())
+        self.assertEqual(self.metrics.snapshot()['requests'], {
+            ('user/profile', 'GET', 200): 1})
+
+    def test_records_cancelled_attempts(self):
+        import asyncio
+        self.server.delay = 0.5
+        with self.assertRaises(asyncio.TimeoutError):
+            self.loop.run_until_complete(asyncio.wait_for(
+                self.api.get_user_profile(), 0.05))
+        self.assertEqual(self.metrics.snapshot()['exceptions'], {
+            ('user/profile', 'GET', 'CancelledError'): 1})
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import shutil
+import tempfile
+
+from yellowant.mirror import LogMirror
+from yellowant.pagination import PageIterator
+
+from .config import unittest
+
+
+class _Client(object):
+    """Serves ``logs`` in pages, in the order the API would"""
+
+    def __init__(self, newest_first):
+        self.newest_first = newest_first
+        self.logs = []
+        self.pages = []
+
+    def add(self, first, last):
+        self.logs.extend({'id': i, 'timestamp': i}
+                         for i in range(first, last + 1))
+
+    def get_application_logs(self, page, page_size):
+        self.pages.append(page)
+        logs = self.logs[::-1] if self.newest_first else self.logs
+        return logs[(page - 1) * page_size:page * page_size]
+
+    def iter_application_logs(self, page_size=100, cursor=1, **params):
+        return PageIterator(self.get_application_logs, params,
+                            page_size=page_size, cursor=cursor,
+                            prefetch=False)
+
+
+class LogMirrorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def mirror(self, newest_first):
+        client = _Client(newest_first)
+        client.add(1, 10)
+        return client, LogMirror(client, self.directory,
+                                 newest_first=newest_first, page_size=3)
+
+    def test_incremental_sync_newest_first(self):
+        client, mirror = self.mirror(True)
+        self.assertEqual(mirror.sync(), 10)
+        client.add(11, 12)
+        del client.pages[:]
+        self.assertEqual(mirror.sync(), 2)
+        self.assertEqual(client.pages, [1])
+        self.assertEqual([log['id'] for log in mirror.read()],
+                         list(range(1, 13)))
+        self.assertEqual(len(mirror), 12)
+        self.assertEqual(mirror.high_water, 12)
+
+    def test_incremental_sync_oldest_first_resumes(self):
+        client, mirror = self.mirror(False)
+        self.assertEqual(mirror.sync(), 10)
+        self.assertEqual(mirror.get_state()['cursor'], 4)
+
+        client.add(11, 15)
+        del client.pages[:]
+        self.assertEqual(mirror.sync(), 5)
+        # resumed from the last page instead of paging from page 1
+        self.assertEqual(client.pages, [4, 5, 6])
+        self.assertEqual([log['id'] for log in mirror.read()],
+                         list(range(1, 16)))
+
+    def test_nothing_new(self):
+        client, mirror = self.mirror(True)
+        mirror.sync()
+        self.assertEqual(mirror.sync(), 0)
+        self.assertEqual(len(mirror.get_state()['segments']), 1)
+
+    def test_read_time_range(self):
+        client, mirror = self.mirror(True)
+        mirror.sync()
+        client.add(11, 20)
+        mirror.sync()
+        self.assertEqual([log['id'] for log in mirror.read(since=9,
+                                                           until=12)],
+                         [9, 10, 11, 12])
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from yellowant import YellowAnt
+from yellowant.deadline import Deadline, get_deadline
+from yellowant.pagination import PageIterator
+from yellowant.priority import priority
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class _Pages(object):
+    """Fake list endpoint serving ``items`` in pages"""
+
+    def __init__(self, items):
+        self.items = items
+        self.calls = []
+
+    def __call__(self, page, page_size, **params):
+        self.calls.append(dict(params, page=page))
+        return self.items[(page - 1) * page_size:page * page_size]
+
+
+class PageIteratorTestCase(unittest.TestCase):
+    def test_iterates_every_page(self):
+        fetch = _Pages(list(range(7)))
+        self.assertEqual(list(PageIterator(fetch, page_size=3)),
+                         list(range(7)))
+        self.assertEqual([call['page'] for call in fetch.calls], [1, 2, 3])
+
+    def test_stops_on_empty_page(self):
+        fetch = _Pages(list(range(6)))
+        self.assertEqual(len(list(PageIterator(fetch, page_size=3))), 6)
+        self.assertEqual([call['page'] for call in fetch.calls], [1, 2, 3])
+
+    def test_dict_pages(self):
+        pages = [{'results': [1, 2], 'next': 'more'},
+                 {'results': [3], 'next': None}]
+        iterator = PageIterator(lambda page, page_size: pages[page - 1],
+                                page_size=2)
+        self.assertEqual(list(iterator), [1, 2, 3])
+
+    def test_resumes_from_cursor(self):
+        fetch = _Pages(list(range(7)))
+        iterator = PageIterator(fetch, page_size=3, prefetch=False)
+        pages = iterator.pages()
+        next(pages)
+        next(pages)
+        self.assertEqual(iterator.cursor, 2)
+
+        resumed = PageIterator(fetch, page_size=3, cursor=iterator.cursor)
+        self.assertEqual(list(resumed), [3, 4, 5, 6])
+
+    def test_prefetches_next_page(self):
+        fetched = threading.Event()
+        fetch = _Pages(list(range(6)))
+
+        def fetch_and_signal(page, page_size):
+            items = fetch(page, page_size)
+            if page == 2:
+                fetched.set()
+            return items
+
+        pages = PageIterator(fetch_and_signal, page_size=3).pages()
+        self.assertEqual(next(pages), [0, 1, 2])
+        # page 2 is fetched while page 1 is still being consumed
+        self.assertTrue(fetched.wait(1))
+
+    def test_no_prefetch(self):
+        fetch = _Pages(list(range(6)))
+        pages = PageIterator(fetch, page_size=3, prefetch=False).pages()
+        next(pages)
+        self.assertEqual(len(fetch.calls), 1)
+
+    def test_deadline_covers_every_page(self):
+        fetch = _Pages(list(range(6)))
+        with Deadline(5) as deadline:
+            list(PageIterator(fetch, page_size=3))
+        self.assertTrue(all(call['_deadline'] is deadline
+                            for call in fetch.calls))
+
+        fetch.calls = []
+        list(PageIterator(fetch, {'_deadline': 5}, page_size=3))
+        deadlines = set(id(call['_deadline']) for call in fetch.calls)
+        self.assertEqual(len(deadlines), 1)
+        self.assertIsNone(get_deadline())
+
+    def test_priority_applies_to_every_page(self):
+        fetch = _Pages(list(range(6)))
+        with priority('bulk'):
+            list(PageIterator(fetch, page_size=3))
+        self.assertEqual(set(call['_priority'] for call in fetch.calls),
+                         set(['bulk']))
+
+    def test_client_iterator(self):
+        transport = FakeTransport()
+        transport.add('GET', 'user/logs/', json=[{'id': 1}, {'id': 2}])
+        transport.add('GET', 'user/logs/', json=[{'id': 3}])
+        api = YellowAnt(access_token='token', transport=transport)
+        logs = list(api.iter_application_logs(page_size=2))
+        self.assertEqual([log['id'] for log in logs], [1, 2, 3])
+        self.assertIn('page=2', transport.requests[-1].url)
+        self.assertIn('page_size=2', transport.requests[-1].url)
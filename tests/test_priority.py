@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from yellowant import YellowAnt, YellowAntError
+from yellowant.priority import Lane, PriorityLanes, get_priority, priority
+from yellowant.ratelimit import RateLimiter
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class _RecordingTransport(FakeTransport):
+    def __init__(self):
+        FakeTransport.__init__(self)
+        self.sessions = []
+
+    def send(self, method, url, session=None, **kwargs):
+        self.sessions.append(session)
+        return FakeTransport.send(self, method, url, session=session,
+                                  **kwargs)
+
+
+class PriorityTestCase(unittest.TestCase):
+    def test_nested_priorities(self):
+        self.assertIsNone(get_priority())
+        with priority('bulk'):
+            with priority('interactive'):
+                self.assertEqual(get_priority(), 'interactive')
+            self.assertEqual(get_priority(), 'bulk')
+        self.assertIsNone(get_priority())
+
+    def test_get_lane(self):
+        lanes = PriorityLanes()
+        self.assertEqual(lanes.get_lane().name, 'interactive')
+        self.assertEqual(lanes.get_lane('bulk').rate_share, 0.3)
+        with self.assertRaises(YellowAntError):
+            lanes.get_lane('urgent')
+        with self.assertRaises(YellowAntError):
+            PriorityLanes([Lane('bulk')])
+
+    def test_lane_sessions(self):
+        lanes = PriorityLanes()
+        api = YellowAnt(access_token='token')
+        interactive, bulk = lanes.get_lane(), lanes.get_lane('bulk')
+        self.assertIs(lanes.get_session(api.client, interactive), api.client)
+        session = lanes.get_session(api.client, bulk)
+        self.assertIsNot(session, api.client)
+        self.assertIs(lanes.get_session(api.client, bulk), session)
+        self.assertEqual(session.get_adapter('https://a/')._pool_maxsize, 4)
+        self.assertEqual(session.headers, api.client.headers)
+        lanes.close()
+
+
+class ClientPriorityTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = _RecordingTransport()
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+        self.limiter = RateLimiter(rate=10)
+        self.api = YellowAnt(app_key='app', access_token='token',
+                             transport=self.transport,
+                             rate_limiter=self.limiter,
+                             priority_lanes=PriorityLanes())
+
+    def test_calls_use_lane_session(self):
+        self.api.get_user_profile()
+        self.api.get_user_profile(_priority='bulk')
+        with priority('bulk'):
+            self.api.get_user_profile()
+        interactive, bulk, nested = self.transport.sessions
+        self.assertIs(interactive, self.api.client)
+        self.assertIsNot(bulk, self.api.client)
+        self.assertIs(nested, bulk)
+        self.assertNotIn('_priority', self.transport.requests[1].url)
+
+    def test_lanes_get_rate_shares(self):
+        self.api.get_user_profile(_priority='bulk')
+        buckets = self.limiter.store._buckets
+        self.assertEqual(sorted(buckets), ['app:user/profile@bulk'])
+        # a bucket of 0.3 * 10 tokens, one of them taken
+        self.assertAlmostEqual(buckets['app:user/profile@bulk']['tokens'], 2,
+                               places=1)
+        self.api.get_user_profile()
+        self.assertAlmostEqual(
+            buckets['app:user/profile@interactive']['tokens'], 6, places=1)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import time
+
+from yellowant import YellowAnt, YellowAntRateLimitError
+from yellowant.ratelimit import FileBucketStore, RateLimiter, fcntl
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    def test_bucket_refills(self):
+        limiter = RateLimiter(rate=100, capacity=2)
+        self.assertEqual(limiter.try_acquire('app:user/message'), 0)
+        self.assertEqual(limiter.try_acquire('app:user/message'), 0)
+        wait = limiter.try_acquire('app:user/message')
+        self.assertTrue(0 < wait <= 0.01)
+        time.sleep(wait)
+        self.assertEqual(limiter.try_acquire('app:user/message'), 0)
+
+    def test_per_family_rates(self):
+        limiter = RateLimiter(rate=10, rates={'user/message': 1})
+        self.assertEqual(limiter.try_acquire('app:user/message'), 0)
+        self.assertGreater(limiter.try_acquire('app:user/message'), 0.5)
+        self.assertEqual(limiter.try_acquire('app:user/profile'), 0)
+
+    def test_acquire_waits(self):
+        limiter = RateLimiter(rate=50, capacity=1)
+        limiter.acquire('key')
+        self.assertGreater(limiter.acquire('key'), 0)
+
+    def test_max_wait(self):
+        limiter = RateLimiter(rate=1, max_wait=0.1)
+        limiter.acquire('key')
+        with self.assertRaises(YellowAntRateLimitError) as e:
+            limiter.acquire('key')
+        self.assertIsNone(e.exception.error_code)
+        self.assertIn('Client side', str(e.exception))
+        self.assertNotIn('API returned', str(e.exception))
+
+    def test_seeded_from_headers(self):
+        limiter = RateLimiter(rate=10)
+        limiter.update_from_headers('key', {'x-rate-limit-remaining': '0',
+                                            'x-rate-limit-reset': '30'})
+        self.assertGreater(limiter.try_acquire('key'), 29)
+
+        limiter.update_from_headers('other', {'x-rate-limit-remaining': '1'})
+        self.assertEqual(limiter.try_acquire('other'), 0)
+        self.assertGreater(limiter.try_acquire('other'), 0)
+
+    def test_client_checks_limiter(self):
+        transport = FakeTransport()
+        transport.add('GET', 'user/profile/', json={'id': 1})
+        api = YellowAnt(app_key='app', access_token='token',
+                        transport=transport,
+                        rate_limiter=RateLimiter(rate=1, max_wait=0))
+        api.get_user_profile()
+        with self.assertRaises(YellowAntRateLimitError):
+            api.get_user_profile()
+        self.assertEqual(len(transport.requests), 1)
+
+
+@unittest.skipIf(fcntl is None, 'requires fcntl')
+class FileBucketStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'ratelimit.json')
+
+    def test_shared_between_limiters(self):
+        first = RateLimiter(rate=1, store=FileBucketStore(self.path))
+        second = RateLimiter(rate=1, store=FileBucketStore(self.path))
+        self.assertEqual(first.try_acquire('key'), 0)
+        self.assertGreater(second.try_acquire('key'), 0)
+
+    def test_corrupt_file(self):
+        with open(self.path, 'w') as f:
+            f.write('{')
+        limiter = RateLimiter(rate=1, store=FileBucketStore(self.path))
+        self.assertEqual(limiter.try_acquire('key'), 0)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from yellowant.registry import YellowAntRegistry
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class YellowAntRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+
+    def test_clients_share_one_session(self):
+        registry = YellowAntRegistry(transport=self.transport)
+        first, second = registry.get('a'), registry.get('b')
+        self.assertIsNot(first, second)
+        self.assertIs(first.client, second.client)
+        self.assertIs(registry.get('a'), first)
+
+    def test_each_client_sends_its_token(self):
+        registry = YellowAntRegistry(transport=self.transport)
+        registry.get('a').get_user_profile()
+        registry.get('b').get_user_profile()
+        self.assertEqual([request.headers['Authorization']
+                          for request in self.transport.requests],
+                         ['Bearer a', 'Bearer b'])
+
+    def test_evicts_least_recently_used(self):
+        registry = YellowAntRegistry(max_clients=2, transport=self.transport)
+        registry.get('a')
+        registry.get('b')
+        registry.get('a')
+        registry.get('c')
+        self.assertIn('a', registry)
+        self.assertNotIn('b', registry)
+        self.assertEqual(len(registry), 2)
+
+    def test_drops_idle_clients(self):
+        registry = YellowAntRegistry(idle_timeout=0.03,
+                                     transport=self.transport)
+        registry.get('a')
+        time.sleep(0.05)
+        registry.get('b')
+        self.assertNotIn('a', registry)
+        self.assertIn('b', registry)
+
+    def test_discard_and_clear(self):
+        registry = YellowAntRegistry(transport=self.transport)
+        registry.get('a')
+        registry.get('b')
+        registry.discard('a')
+        self.assertNotIn('a', registry)
+        registry.clear()
+        self.assertEqual(len(registry), 0)
+
+    def test_concurrent_lookups_share_one_client(self):
+        registry = YellowAntRegistry(transport=self.transport)
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(
+            registry.get('a'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(1)
+        self.assertTrue(all(client is registry.get('a')
+                            for client in clients))
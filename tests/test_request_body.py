@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import io
+
+from yellowant import YellowAnt, YellowAntError
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class RequestBodyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.transport.add('POST', 'user/message/', json={'id': 1})
+        self.api = YellowAnt(access_token='token', transport=self.transport)
+
+    def test_params_are_encoded(self):
+        self.api.add_message(text='hi')
+        self.assertEqual(self.transport.requests[-1].body, b'{"text": "hi"}')
+
+    def test_pre_encoded_body(self):
+        self.api.post('user/message/', params=b'{"a": 1}')
+        self.assertEqual(self.transport.requests[-1].body, b'{"a": 1}')
+
+    def test_json_text_params(self):
+        self.api.post('user/message/', params=u'{"a": "\xe9"}')
+        self.assertEqual(self.transport.requests[-1].body,
+                         u'{"a": "\xe9"}'.encode('utf-8'))
+
+    def test_body_argument(self):
+        self.api.post('user/message/', body=bytearray(b'{"a": 1}'))
+        self.assertEqual(self.transport.requests[-1].body, b'{"a": 1}')
+
+    def test_body_parameter(self):
+        self.api.add_message(_body='{"a": 1}')
+        self.assertEqual(self.transport.requests[-1].body, b'{"a": 1}')
+
+    def test_body_with_get(self):
+        with self.assertRaises(YellowAntError):
+            self.api.get('user/profile/', params=b'{}')
+
+    def test_files_are_sent_as_form_fields(self):
+        self.api.post('user/message/', params={
+            'text': 'hi', 'tags': ['a'],
+            'attachment': io.BytesIO(b'file contents')})
+        request = self.transport.requests[-1]
+        self.assertTrue(request.headers['Content-Type'].startswith(
+            'multipart/form-data'))
+        self.assertIn(b'file contents', request.body)
+        self.assertIn(b'["a"]', request.body)
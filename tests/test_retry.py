@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import time
+
+import requests
+
+from yellowant import YellowAnt, YellowAntError, YellowAntRateLimitError
+from yellowant.retry import RetryPolicy
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(max_retries=2, backoff_factor=1,
+                                  jitter=False, budget=10)
+
+    def test_rate_limits_always_retried(self):
+        self.assertEqual(self.policy.get_retry_delay('POST', 0, 0,
+                                                     status_code=429), 1)
+
+    def test_gateway_errors_only_for_idempotent_methods(self):
+        self.assertEqual(self.policy.get_retry_delay('GET', 0, 0,
+                                                     status_code=503), 1)
+        self.assertIsNone(self.policy.get_retry_delay('POST', 0, 0,
+                                                      status_code=503))
+        self.assertIsNone(self.policy.get_retry_delay('GET', 0, 0,
+                                                      status_code=404))
+
+    def test_connection_errors(self):
+        self.assertEqual(self.policy.get_retry_delay(
+            'DELETE', 0, 0, connection_error=True), 1)
+        self.assertIsNone(self.policy.get_retry_delay(
+            'PATCH', 0, 0, connection_error=True))
+
+    def test_exponential_backoff(self):
+        self.assertEqual(self.policy.get_backoff(0), 1)
+        self.assertEqual(self.policy.get_backoff(3), 8)
+        self.assertLessEqual(RetryPolicy(max_backoff=3).get_backoff(10), 3)
+
+    def test_max_retries_and_budget(self):
+        self.assertIsNone(self.policy.get_retry_delay('GET', 2, 0,
+                                                      status_code=503))
+        self.assertIsNone(self.policy.get_retry_delay('GET', 0, 9.5,
+                                                      status_code=503))
+
+    def test_retry_after_headers(self):
+        self.assertEqual(self.policy.get_retry_delay(
+            'GET', 0, 0, status_code=429, headers={'Retry-After': '4'}), 4)
+        reset = str(int(time.time()) + 5)
+        delay = self.policy.parse_retry_after({'X-Rate-Limit-Reset': reset})
+        self.assertTrue(3 <= delay <= 5)
+        self.assertIsNone(self.policy.parse_retry_after({}))
+
+
+class ClientRetryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.api = YellowAnt(access_token='token', transport=self.transport,
+                             retry_policy=RetryPolicy(backoff_factor=0))
+
+    def test_retries_until_success(self):
+        self.transport.add('GET', 'user/profile/', status=503)
+        self.transport.add('GET', 'user/profile/',
+                           exception=requests.ConnectionError('reset'))
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+        self.assertEqual(self.api.get_user_profile(), {'id': 1})
+        self.assertEqual(len(self.transport.requests), 3)
+
+    def test_gives_up_after_max_retries(self):
+        self.transport.add('GET', 'user/profile/', status=429)
+        with self.assertRaises(YellowAntRateLimitError):
+            self.api.get_user_profile()
+        self.assertEqual(len(self.transport.requests), 4)
+
+    def test_post_not_retried_on_gateway_errors(self):
+        self.transport.add('POST', 'user/message/', status=503)
+        self.transport.add('POST', 'user/message/', json={'id': 1})
+        with self.assertRaises(YellowAntError):
+            self.api.add_message(text='hi')
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_no_policy_no_retries(self):
+        self.transport.add('GET', 'user/profile/', status=503)
+        api = YellowAnt(access_token='token', transport=self.transport)
+        with self.assertRaises(YellowAntError):
+            api.get_user_profile()
+        self.assertEqual(len(self.transport.requests), 1)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from yellowant import YellowAnt, YellowAntError, YellowAntDeadlineError
+from yellowant.deadline import Deadline
+from yellowant.singleflight import SingleFlight
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class _SlowTransport(FakeTransport):
+    def send(self, method, url, session=None, **kwargs):
+        time.sleep(0.05)
+        return FakeTransport.send(self, method, url, session=session,
+                                  **kwargs)
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    def setUp(self):
+        self.group = SingleFlight()
+        self.started = threading.Event()
+        self.finish = threading.Event()
+        self.calls = []
+
+    def slow(self, value):
+        self.calls.append(value)
+        self.started.set()
+        self.finish.wait(1)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def run_leader(self, value):
+        results = []
+
+        def leader():
+            try:
+                results.append(self.group.do('key', self.slow, value))
+            except Exception as e:
+                results.append(e)
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        self.started.wait(1)
+        return thread, results
+
+    def test_followers_share_the_result(self):
+        thread, results = self.run_leader({'id': 1})
+        followers = []
+        threads = [threading.Thread(target=lambda: followers.append(
+            self.group.do('key', self.slow, {'id': 2}))) for _ in range(3)]
+        for follower in threads:
+            follower.start()
+        time.sleep(0.02)
+        self.finish.set()
+        for follower in threads + [thread]:
+            follower.join(1)
+
+        self.assertEqual(self.calls, [{'id': 1}])
+        self.assertEqual(followers, [{'id': 1}] * 3)
+        self.assertIs(followers[0], results[0])
+
+    def test_followers_share_the_error(self):
+        thread, _ = self.run_leader(YellowAntError('failed'))
+        errors = []
+
+        def follower():
+            try:
+                self.group.do('key', self.slow, None)
+            except YellowAntError as e:
+                errors.append(e)
+
+        follower_thread = threading.Thread(target=follower)
+        follower_thread.start()
+        time.sleep(0.02)
+        self.finish.set()
+        follower_thread.join(1)
+        thread.join(1)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(str(errors[0]), 'failed')
+
+    def test_calls_after_completion_run_again(self):
+        self.finish.set()
+        self.assertEqual(self.group.do('key', self.slow, 1), 1)
+        self.assertEqual(self.group.do('key', self.slow, 2), 2)
+        self.assertEqual(self.calls, [1, 2])
+
+    def test_follower_deadline(self):
+        thread, _ = self.run_leader(1)
+        started = time.time()
+        with self.assertRaises(YellowAntDeadlineError):
+            with Deadline(0.02):
+                self.group.do('key', self.slow, 2)
+        self.assertLess(time.time() - started, 0.5)
+        self.finish.set()
+        thread.join(1)
+
+    def test_client_coalesces_identical_gets(self):
+        transport = _SlowTransport()
+        transport.add('GET', 'user/profile/', json={'id': 1})
+        api = YellowAnt(access_token='token', transport=transport,
+                        single_flight=True)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            api.get_user_profile())) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(1)
+        self.assertEqual(results, [{'id': 1}] * 5)
+        self.assertEqual(len(transport.requests), 1)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import requests
+
+from yellowant import YellowAnt, YellowAntError, YellowAntRateLimitError
+from yellowant.transport import FakeTransport
+
+from .config import unittest
+
+
+class FakeTransportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.api = YellowAnt(access_token='token', transport=self.transport)
+
+    def test_canned_responses_in_turn(self):
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+        self.transport.add('GET', 'user/profile/', json={'id': 2})
+        self.assertEqual(self.api.get_user_profile(), {'id': 1})
+        self.assertEqual(self.api.get_user_profile(), {'id': 2})
+        self.assertEqual(self.api.get_user_profile(), {'id': 2})
+
+    def test_records_requests(self):
+        self.transport.add('POST', 'user/message/', json={'id': 1})
+        self.api.add_message(text='hi')
+        request = self.transport.requests[-1]
+        self.assertEqual(request.method, 'POST')
+        self.assertEqual(request.body, b'{"text": "hi"}')
+        self.assertEqual(request.headers['Authorization'], 'Bearer token')
+
+    def test_unregistered_route(self):
+        with self.assertRaises(YellowAntError):
+            self.api.get_user_profile()
+
+    def test_exception(self):
+        self.transport.add('GET', 'user/profile/',
+                           exception=requests.ConnectionError('refused'))
+        with self.assertRaises(YellowAntError) as e:
+            self.api.get_user_profile()
+        self.assertIn('refused', str(e.exception))
+
+    def test_error_status(self):
+        self.transport.add('GET', 'user/profile/', status=429,
+                           json={'errors': [{'message': 'slow down'}]})
+        with self.assertRaises(YellowAntRateLimitError):
+            self.api.get_user_profile()
+        metadata = self.api.get_lastfunction_metadata()
+        self.assertEqual(metadata['status_code'], 429)
+        self.assertEqual(metadata['api_error'], 'slow down')
+
+    def test_reset(self):
+        self.transport.add('GET', 'user/profile/', json={'id': 1})
+        self.api.get_user_profile()
+        self.transport.reset()
+        self.assertEqual(self.transport.requests, [])
+        with self.assertRaises(YellowAntError):
+            self.api.get_user_profile()
+
+    def test_any_method(self):
+        self.transport.add(None, 'user/message/', json={'id': 1})
+        self.assertEqual(self.api.add_message(text='hi'), {'id': 1})
+        self.assertEqual(self.api.delete('user/message/'), {'id': 1})
@@ -2,8 +2,15 @@ __author__ = 'Vishwa Krishnakumar <vishwa@yellowant.com>'
 __version__ = '0.0.1'
 
 from .api import YellowAnt
+try:
+    from .async_api import AsyncYellowAnt
+except (SyntaxError, ImportError):  # pragma: no cover
+    # Python 2 has no native coroutines, and Python < 3.7 no contextvars
+    AsyncYellowAnt = None
+from .registry import YellowAntRegistry
+from .retry import RetryPolicy
 from .rtm_client import RTMClient as YellowantRTMClient
 from .exceptions import (
     YellowAntError, YellowAntRateLimitError, YellowAntAuthError,
-    YellowAntStreamError
+    YellowAntStreamError, YellowAntCircuitOpenError, YellowAntDeadlineError
 )
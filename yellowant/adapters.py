@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.adapters
+~~~~~~~~~~~~~~~~~~
+
+This module contains the transport adapter mounted on the client session
+when connection pool sizing or socket options are configured through
+``client_args``.
+"""
+
+import socket
+
+from requests.adapters import HTTPAdapter, DEFAULT_POOLBLOCK, \
+    DEFAULT_POOLSIZE
+from urllib3.connection import HTTPConnection
+
+
+def _keep_alive_socket_options(idle=60, interval=10, count=6):
+    """Returns urllib3 socket options enabling TCP keep-alive probes, so
+    idle pooled connections are not silently dropped by NATs and load
+    balancers"""
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    for name, value in (('TCP_KEEPIDLE', idle), ('TCP_KEEPINTVL', interval),
+                        ('TCP_KEEPCNT', count)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+#: Socket options used when ``client_args['keep_alive']`` is True
+KEEP_ALIVE_SOCKET_OPTIONS = _keep_alive_socket_options()
+
+#: ``client_args`` keys that configure the connection pool
+POOL_ARGS = ('pool_connections', 'pool_maxsize', 'pool_block',
+             'socket_options', 'keep_alive')
+
+
+class YellowAntHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that also forwards socket options to its pool manager"""
+    __attrs__ = HTTPAdapter.__attrs__ + ['socket_options']
+
+    def __init__(self, pool_connections=DEFAULT_POOLSIZE,
+                 pool_maxsize=DEFAULT_POOLSIZE, pool_block=DEFAULT_POOLBLOCK,
+                 socket_options=None, **kwargs):
+        # init_poolmanager is called by HTTPAdapter.__init__
+        self.socket_options = socket_options
+        super(YellowAntHTTPAdapter, self).__init__(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+            pool_block=pool_block, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs['socket_options'] = self.socket_options
+        super(YellowAntHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs['socket_options'] = self.socket_options
+        return super(YellowAntHTTPAdapter, self).proxy_manager_for(*args,
+                                                                   **kwargs)
+
+    @classmethod
+    def from_client_args(cls, client_args):
+        """Builds an adapter from the pool keys of ``client_args``, or
+        returns None when none of them are set"""
+        if not any(k in client_args for k in POOL_ARGS):
+            return None
+        socket_options = client_args.get('socket_options')
+        if socket_options is None and client_args.get('keep_alive'):
+            socket_options = KEEP_ALIVE_SOCKET_OPTIONS
+        return cls(
+            pool_connections=client_args.get('pool_connections',
+                                             DEFAULT_POOLSIZE),
+            pool_maxsize=client_args.get('pool_maxsize', DEFAULT_POOLSIZE),
+            pool_block=client_args.get('pool_block', DEFAULT_POOLBLOCK),
+            socket_options=socket_options)
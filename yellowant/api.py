@@ -12,17 +12,37 @@ dealing with the YellowAnt API
 import warnings
 import re
 import os
+import threading
+import time
 
 import requests
 from requests.auth import HTTPBasicAuth
 from requests_oauthlib import OAuth1, OAuth2
 
 from . import __version__
+from .adapters import YellowAntHTTPAdapter, POOL_ARGS
 from .advisory import YellowAntDeprecationWarning
-from .compat import json, urlencode, parse_qsl, quote_plus, str, is_py2
+from .batch import Batch
+from . import codec
+from .compat import urlencode, parse_qsl, quote_plus, str, is_py2
+from .deadline import Deadline, get_deadline
 from .endpoints import Endpoints
-from .exceptions import YellowAntError, YellowAntAuthError, YellowAntRateLimitError
-from .helpers import _transparent_params
+from .exceptions import YellowAntError, YellowAntAuthError, \
+    YellowAntRateLimitError, YellowAntDeadlineError
+from .fanout import MessageBroadcast
+from .helpers import (
+    _transparent_params, _endpoint_family, _LastCall,
+    LAST_CALL_CAPTURE_MODES, _split_body, _request_key, COMPRESSION_WBITS,
+    BODY_TYPES, _build_request_body, _get_content_loader, _get_retry_delay,
+    _record_response, _raise_for_response, _decode_response, _log_if_slow
+)
+from .pagination import PageIterator
+from .priority import get_priority, priority
+from .singleflight import SingleFlight
+from .transport import RequestsTransport
+
+#: ``client_args`` keys that are set on the session itself
+SESSION_ARGS = ('cert', 'hooks', 'max_redirects', 'proxies')
 
 warnings.simplefilter('always', YellowAntDeprecationWarning)  # For Python 2.7 >
 
@@ -30,7 +50,15 @@ warnings.simplefilter('always', YellowAntDeprecationWarning)  # For Python 2.7 >
 class YellowAnt(Endpoints, object):
     def __init__(self, app_key=None, app_secret=None, access_token=None, redirect_uri = None,
                  token_type='bearer', oauth_version=2, api_version='1.0',
-                 client_args=None, auth_endpoint='authenticate', api_url=None):
+                 client_args=None, auth_endpoint='authenticate', api_url=None,
+                 retry_policy=None, rate_limiter=None,
+                 last_call_capture='lazy', session=None, response_cache=None,
+                 integration_cache=None, single_flight=None,
+                 request_compression=None, compression_threshold=8192,
+                 metrics=None, slow_call_threshold=None,
+                 rate_limit_headroom=None, transport=None,
+                 circuit_breaker=None, concurrency_limiter=None,
+                 priority_lanes=None):
         """Instantiates an instance of YellowAnt. Takes optional parameters for
         authentication and such (see below).
 
@@ -38,6 +66,57 @@ class YellowAnt(Endpoints, object):
         :param app_secret: (optional) Your applications secret key
         :param access_token: (optional) When using **OAuth 2**, provide a
         valid access token if you have one
+        :param client_args: (optional) Session and request settings. Besides
+        ``headers``, ``cert``, ``hooks``, ``max_redirects``, ``proxies``,
+        ``timeout``, ``allow_redirects``, ``stream`` and ``verify`` it accepts
+        the connection pool settings ``pool_connections``, ``pool_maxsize``,
+        ``pool_block``, ``socket_options`` and ``keep_alive`` (enables TCP
+        keep-alive probes)
+        :param retry_policy: (optional) A :class:`yellowant.retry.RetryPolicy`
+        used to transparently retry rate limited and failed calls
+        :param rate_limiter: (optional) A
+        :class:`yellowant.ratelimit.RateLimiter` checked before every call
+        :param last_call_capture: (optional) How much of each response is
+        kept for :meth:`get_lastfunction_metadata`. ``'lazy'`` decodes the
+        body only when ``content`` is read, ``'full'`` decodes it eagerly
+        and ``'headers'`` keeps only headers, status and url
+        :param session: (optional) A ``requests.Session`` shared with other
+        clients. It is used as is, so session level ``client_args`` are
+        ignored and the OAuth token is sent with each request instead
+        :param response_cache: (optional) A
+        :class:`yellowant.cache.ResponseCache` for GET endpoints. Cache hits
+        do not update :meth:`get_lastfunction_header`
+        :param integration_cache: (optional) A
+        :class:`yellowant.cache.IntegrationCache` serving
+        :meth:`get_user_integration`
+        :param single_flight: (optional) True, or a shared
+        :class:`yellowant.singleflight.SingleFlight`, to let concurrent
+        identical GET calls share one HTTP request and its result. Only the
+        thread making the request sees it in :meth:`get_lastfunction_header`
+        :param request_compression: (optional) ``'gzip'`` or ``'deflate'``
+        to compress request bodies, with the matching ``Content-Encoding``
+        :param compression_threshold: (optional) Only bodies of at least
+        this many bytes are compressed
+        :param metrics: (optional) A :class:`yellowant.metrics.Metrics`
+        recording every HTTP attempt
+        :param slow_call_threshold: (optional) Log a warning on the
+        ``yellowant`` logger for calls taking longer than this many seconds,
+        retries included
+        :param rate_limit_headroom: (optional) Log a warning on the
+        ``yellowant`` logger for responses with fewer than this many calls
+        remaining in ``x-rate-limit-remaining``
+        :param transport: (optional) A :class:`yellowant.transport.Transport`
+        sending the HTTP requests, defaults to a
+        :class:`yellowant.transport.RequestsTransport`
+        :param circuit_breaker: (optional) A
+        :class:`yellowant.circuit.CircuitBreaker` failing calls to unhealthy
+        endpoints fast
+        :param concurrency_limiter: (optional) A
+        :class:`yellowant.concurrency.AdaptiveLimiter` bounding the number of
+        concurrent requests
+        :param priority_lanes: (optional) A
+        :class:`yellowant.priority.PriorityLanes` giving calls of each
+        priority their own connection pool and rate limit share
 
         """
 
@@ -51,6 +130,30 @@ class YellowAnt(Endpoints, object):
         self.app_secret = app_secret
         self.redirect_uri = redirect_uri
         self.access_token = access_token
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        if last_call_capture not in LAST_CALL_CAPTURE_MODES:
+            raise YellowAntError('last_call_capture must be one of %s.' %
+                                 ', '.join(LAST_CALL_CAPTURE_MODES))
+        self.last_call_capture = last_call_capture
+        self.response_cache = response_cache
+        self.integration_cache = integration_cache
+        if single_flight is True:
+            single_flight = SingleFlight()
+        self.single_flight = single_flight or None
+        if request_compression not in (None,) + tuple(COMPRESSION_WBITS):
+            raise YellowAntError('request_compression must be one of %s.' %
+                                 ', '.join(sorted(COMPRESSION_WBITS)))
+        self.request_compression = request_compression
+        self.compression_threshold = compression_threshold
+        self.metrics = metrics
+        self.slow_call_threshold = slow_call_threshold
+        self.rate_limit_headroom = rate_limit_headroom
+        self.transport = transport if transport is not None \
+            else RequestsTransport()
+        self.circuit_breaker = circuit_breaker
+        self.concurrency_limiter = concurrency_limiter
+        self.priority_lanes = priority_lanes
 
         # OAuth 1
         self.request_token_url = self.api_url % 'oauth/request_token'
@@ -70,42 +173,66 @@ class YellowAnt(Endpoints, object):
             # If they set headers, but didn't include User-Agent
             self.client_args['headers'].update(default_headers)
 
-        auth = None
         token = {'token_type': token_type,
                  'access_token': self.access_token}
         auth = OAuth2(self.app_key, token=token)
 
-        self.client = requests.Session()
-        self.client.auth = auth
-
-        # Make a copy of the client args and iterate over them
-        # Pop out all the acceptable args at this point because they will
-        # Never be used again.
-        client_args_copy = self.client_args.copy()
-        for k, v in client_args_copy.items():
-            if k in ('cert', 'hooks', 'max_redirects', 'proxies'):
-                setattr(self.client, k, v)
-                self.client_args.pop(k)  # Pop, pop!
-
-        # Headers are always present, so we unconditionally pop them and merge
-        # them into the session headers.
-        self.client.headers.update(self.client_args.pop('headers'))
-
-        self._last_call = None
+        self.auth = auth
+        if session is not None:
+            # A shared session is configured once by its owner (see
+            # yellowant.registry), so only per request args are kept and
+            # the auth is sent with every call instead.
+            self.client = session
+            for k in SESSION_ARGS + POOL_ARGS + ('headers',):
+                self.client_args.pop(k, None)
+        else:
+            self.client = requests.Session()
+            self.client.auth = auth
+
+            # Make a copy of the client args and iterate over them
+            # Pop out all the acceptable args at this point because they will
+            # Never be used again.
+            client_args_copy = self.client_args.copy()
+            for k, v in client_args_copy.items():
+                if k in SESSION_ARGS:
+                    setattr(self.client, k, v)
+                    self.client_args.pop(k)  # Pop, pop!
+
+            adapter = YellowAntHTTPAdapter.from_client_args(self.client_args)
+            if adapter is not None:
+                self.client.mount('https://', adapter)
+                self.client.mount('http://', adapter)
+            for k in POOL_ARGS:
+                self.client_args.pop(k, None)
+
+            # Headers are always present, so we unconditionally pop them and
+            # merge them into the session headers.
+            self.client.headers.update(self.client_args.pop('headers'))
+
+        # Metadata of the last call is kept per thread, so one client and its
+        # connection pool can safely be shared by many worker threads
+        self._local = threading.local()
 
     def __repr__(self):
         return '<YellowAnt: %s>' % (self.app_key)
 
-    def _request(self, url, method='GET', params=None, api_call=None):
-        """Internal request method"""
-        method = method.lower()
-        params = params or {}
+    @property
+    def _last_call(self):
+        return getattr(self._local, 'last_call', None)
 
-        func = getattr(self.client, method)
-        params, files = _transparent_params(params)
+    @_last_call.setter
+    def _last_call(self, last_call):
+        self._local.last_call = last_call
 
+    def _request(self, url, method='GET', params=None, api_call=None,
+                 body=None):
+        """Internal request method"""
+        method = method.lower()
+        params, data, files, headers = _build_request_body(
+            method, params, body, self.request_compression,
+            self.compression_threshold)
 
-        requests_args = {}
+        requests_args = {'auth': self.auth}
         for k, v in self.client_args.items():
             # Maybe this should be set as a class variable and only done once?
             if k in ('timeout', 'allow_redirects', 'stream', 'verify'):
@@ -115,74 +242,202 @@ class YellowAnt(Endpoints, object):
             requests_args['params'] = params
         else:
             requests_args.update({
-                'data': json.dumps(params),
+                'data': data,
                 'files': files,
             })
+        if files:
+            # let requests set the multipart content type and boundary
+            headers['content-type'] = None
+        request_bytes = len(data) if isinstance(data, BODY_TYPES) else 0
+
+        family = _endpoint_family(url, self.api_url)
+        cache_key = cache_entry = None
+        if method == 'get' and self.response_cache is not None:
+            cache_key, cache_entry = self.response_cache.lookup(
+                family, url, params, self.access_token)
+            if cache_entry is not None:
+                if self.response_cache.is_fresh(cache_entry):
+                    return self.response_cache.get_content(cache_entry)
+                headers.update(
+                    self.response_cache.conditional_headers(cache_entry))
+        if headers:
+            requests_args['headers'] = headers
+
+        lane = None
+        rate_share = 1.0
+        if self.priority_lanes is not None:
+            lane = self.priority_lanes.get_lane(get_priority())
+            rate_share = lane.rate_share
+
+        rate_limit_key = None
+        if self.rate_limiter is not None:
+            rate_limit_key = '%s:%s' % (self.app_key, family)
+            if lane is not None:
+                rate_limit_key += '@%s' % lane.name
+
+        deadline = get_deadline()
+        retries = 0
+        started = time.time()
         try:
-            response = func(url, **requests_args)
-        except requests.RequestException as e:
-            raise YellowAntError(str(e))
+            while True:
+                # the error ending this attempt, if it does not get a
+                # response
+                failure = None
+                if deadline is not None:
+                    deadline.check()
+                if rate_limit_key is not None:
+                    self.rate_limiter.acquire(
+                        rate_limit_key,
+                        deadline.remaining() if deadline is not None else None,
+                        rate_share)
+                if deadline is not None:
+                    requests_args['timeout'] = deadline.get_timeout(
+                        self.client_args.get('timeout'))
+                event = None
+                if self.metrics is not None:
+                    event = self.metrics.start(method, url, family,
+                                               request_bytes, retries)
+                try:
+                    response = self._send(method, url, requests_args,
+                                          deadline, lane)
+                except BaseException as e:
+                    # every attempt started is finished, whatever the error
+                    if event is not None:
+                        self.metrics.finish(event, error=e)
+                    if not isinstance(e, requests.RequestException):
+                        raise
+                    failure = e
+                    if deadline is not None and deadline.expired:
+                        error = YellowAntDeadlineError(
+                            'Deadline of %ss exceeded: %s' %
+                            (deadline.timeout, e))
+                    else:
+                        delay = _get_retry_delay(
+                            self.retry_policy, method, retries, started,
+                            deadline, connection_error=isinstance(
+                                e, (requests.ConnectionError,
+                                    requests.Timeout)))
+                        error = YellowAntError(str(e)) \
+                            if delay is None else None
+                    if error is not None:
+                        # tells a circuit breaker the endpoint itself failed
+                        error.transport_error = True
+                        raise error
+                else:
+                    _record_response(self, event, family,
+                                     response.status_code, response.headers,
+                                     len(response.content), rate_limit_key,
+                                     rate_share)
+                    if response.status_code <= 304:
+                        break
+                    delay = _get_retry_delay(
+                        self.retry_policy, method, retries, started,
+                        deadline, status_code=response.status_code,
+                        headers=response.headers)
+                    if delay is None:
+                        break
+                retries += 1
+                time.sleep(delay)
+        except BaseException as e:
+            # calls ending without a response are logged with the exception
+            if failure is None:
+                failure = e
+            raise
+        finally:
+            _log_if_slow(self, method, url, family, request_bytes,
+                         response.status_code if failure is None else None,
+                         started, retries, failure)
 
         # create stash for last function intel
-        self._last_call = {
-            'api_call': api_call,
-            'api_error': None,
-            'cookies': response.cookies,
-            'headers': response.headers,
-            'status_code': response.status_code,
-            'url': response.url,
-            'content': response.text,
-        }
+        self._last_call = _LastCall(
+            _get_content_loader(self.last_call_capture,
+                                lambda: response.text),
+            api_call=api_call,
+            api_error=None,
+            cookies=response.cookies,
+            headers=response.headers,
+            status_code=response.status_code,
+            url=response.url,
+        )
 
         # greater than 304 (not modified) is an error
-        if response.status_code > 304:
-            error_message = self._get_error_message(response)
-            self._last_call['api_error'] = error_message
-
-            ExceptionType = YellowAntError
-            if response.status_code == 429:
-                ExceptionType = YellowAntRateLimitError
-            elif response.status_code == 401 or 'Bad Authentication data' \
-                    in error_message:
-                ExceptionType = YellowAntAuthError
-
-            raise ExceptionType(
-                error_message,
-                error_code=response.status_code,
-                retry_after=response.headers.get('X-Rate-Limit-Reset'))
+        _raise_for_response(response.status_code, response.content,
+                            response.headers, self._last_call)
 
-        try:
-            if response.status_code == 204:
-                content = response.content
-            else:
-                content = response.json()
-        except ValueError:
-            raise YellowAntError('Response was not valid JSON. \
-                               Unable to decode.')
+        if response.status_code == 304 and cache_entry is not None:
+            cache_entry = self.response_cache.revalidated(cache_key, family,
+                                                          cache_entry)
+            return self.response_cache.get_content(cache_entry)
 
-        return content
+        content = _decode_response(response.status_code, response.content)
 
-    def _get_error_message(self, response):
-        """Parse and return the first error message"""
+        if cache_key is not None and response.status_code == 200:
+            self.response_cache.store(cache_key, family, response)
 
-        error_message = 'An error occurred processing your request.'
-        try:
-            content = response.json()
-            # {"errors":[{"code":34,"message":"Sorry,
-            # that page does not exist"}]}
-            error_message = content['errors'][0]['message']
-        except TypeError:
-            error_message = content['errors']
-        except ValueError:
-            # bad json data from Twitter for an error
-            pass
-        except (KeyError, IndexError):
-            # missing data so fallback to default message
-            pass
+        return content
 
-        return error_message
+    def _send(self, method, url, requests_args, deadline=None, lane=None):
+        """Sends one attempt through the transport, on the session of its
+        priority lane and within the concurrency limit when configured"""
+        session = self.client
+        if lane is not None:
+            session = self.priority_lanes.get_session(session, lane)
+
+        limiter = self.concurrency_limiter
+        if limiter is None:
+            return self.transport.send(method, url, session=session,
+                                       **requests_args)
+
+        if not limiter.acquire(deadline.remaining() if deadline is not None
+                               else None,
+                               lane.priority if lane is not None else 0):
+            raise YellowAntDeadlineError(
+                'Deadline of %ss exceeded waiting for a request slot.' %
+                deadline.timeout)
+        started = time.time()
+        overloaded = False
+        try:
+            response = self.transport.send(method, url, session=session,
+                                           **requests_args)
+            overloaded = response.status_code in (429, 503)
+            return response
+        except requests.Timeout:
+            overloaded = True
+            raise
+        finally:
+            limiter.release(time.time() - started, overloaded)
+
+    def request(self, endpoint, method='GET', params=None, version='1.1',
+                body=None):
+        """Makes a call to ``endpoint`` and returns the decoded response.
+
+        ``body`` (or ``params`` itself, or the ``_body`` parameter of any
+        Endpoints method) may be pre-serialized JSON as bytes, bytearray,
+        memoryview or text, which is then sent as is instead of ``params``.
+
+        A ``_deadline`` parameter, either seconds or a
+        :class:`yellowant.deadline.Deadline`, caps the total time of the
+        call, retries included. A ``_priority`` parameter names the
+        :class:`yellowant.priority.Lane` the call is sent through.
 
-    def request(self, endpoint, method='GET', params=None, version='1.1'):
+        """
+        if isinstance(params, dict) and '_priority' in params:
+            params = dict(params)
+            lane = params.pop('_priority')
+            if lane is not None:
+                with priority(lane):
+                    return self.request(endpoint, method, params, version,
+                                        body)
+
+        if isinstance(params, dict) and '_deadline' in params:
+            params = dict(params)
+            deadline = params.pop('_deadline')
+            if deadline is not None:
+                with Deadline.coerce(deadline):
+                    return self.request(endpoint, method, params, version,
+                                        body)
+
+        params, body = _split_body(params, body)
         if endpoint.startswith('http://'):
             raise YellowAntError('api.yellowant.com is restricted to SSL/TLS traffic.')
 
@@ -191,34 +446,214 @@ class YellowAnt(Endpoints, object):
         else:
             url = self.api_url % endpoint
 
-        content = self._request(url, method=method, params=params,
-                                api_call=url)
+        breaker = self.circuit_breaker
+        if breaker is not None:
+            family = _endpoint_family(url, self.api_url)
+            breaker.before_call(family)
+
+        try:
+            if self.single_flight is not None and method.upper() == 'GET' \
+                    and body is None:
+                params, _ = _transparent_params(params or {})
+                content = self.single_flight.do(
+                    _request_key(url, params, self.access_token),
+                    self._request, url, method=method, params=params,
+                    api_call=url)
+            else:
+                content = self._request(url, method=method, params=params,
+                                        api_call=url, body=body)
+        except YellowAntError as e:
+            if breaker is not None:
+                breaker.record(family, e)
+            raise
+        except BaseException:
+            # e.g. params that cannot be encoded, which says nothing about
+            # the endpoint's health
+            if breaker is not None:
+                breaker.cancel(family)
+            raise
+        if breaker is not None:
+            breaker.record(family)
 
         return content
 
-    def get(self, endpoint, params=None, version='1'):
+    def get_user_integration(self, **params):
+        """Returns a user integration, from the integration cache when one
+        is configured
+
+        """
+        cache = self.integration_cache
+        # _deadline and _priority only apply to the call, if one is made
+        keys = set(params) - set(['_deadline', '_priority'])
+        if cache is None or keys != set(['id']):
+            return super(YellowAnt, self).get_user_integration(**params)
+
+        integration_id = params['id']
+        integration, fresh = cache.get(integration_id, self.access_token)
+        if integration is None:
+            integration = super(YellowAnt, self).get_user_integration(**params)
+            cache.set(integration_id, integration, self.access_token)
+        elif not fresh and cache.start_refresh(integration_id,
+                                               self.access_token):
+            # serve the stale copy while a fresh one is fetched
+            thread = threading.Thread(target=self._refresh_user_integration,
+                                      args=(integration_id,))
+            thread.daemon = True
+            thread.start()
+        return integration
+
+    def _refresh_user_integration(self, integration_id):
+        cache = self.integration_cache
+        try:
+            cache.set(integration_id, super(YellowAnt, self)
+                      .get_user_integration(id=integration_id),
+                      self.access_token)
+        except YellowAntError:
+            cache.invalidate(integration_id, self.access_token)
+        finally:
+            cache.end_refresh(integration_id, self.access_token)
+
+    def update_user_integration(self, **params):
+        """Updates a user integration, keeping the integration cache
+        coherent
+
+        """
+        if self.integration_cache is None:
+            return super(YellowAnt, self).update_user_integration(**params)
+        try:
+            integration = super(YellowAnt, self).update_user_integration(
+                **params)
+        except YellowAntError:
+            # the update may or may not have been applied
+            self.integration_cache.invalidate(params.get('id'),
+                                              self.access_token)
+            raise
+        if isinstance(integration, dict):
+            self.integration_cache.set(params.get('id'), integration,
+                                       self.access_token)
+        else:
+            self.integration_cache.invalidate(params.get('id'),
+                                              self.access_token)
+        return integration
+
+    def delete_user_integration(self, **params):
+        """Deletes a user integration and drops it from the integration
+        cache
+
+        """
+        if self.integration_cache is None:
+            return super(YellowAnt, self).delete_user_integration(**params)
+        try:
+            return super(YellowAnt, self).delete_user_integration(**params)
+        finally:
+            # after the call, so a concurrent read cannot cache it again
+            self.integration_cache.invalidate(params.get('id'),
+                                              self.access_token)
+
+    def iter_application_logs(self, page_size=100, cursor=1, prefetch=True,
+                              **params):
+        """Iterates over the application logs of every page, see
+        :class:`yellowant.pagination.PageIterator`
+
+        """
+        return PageIterator(self.get_application_logs, params,
+                            page_size=page_size, cursor=cursor,
+                            prefetch=prefetch)
+
+    def iter_application_messages(self, page_size=100, cursor=1,
+                                  prefetch=True, **params):
+        """Iterates over the messages of a user integration on every page,
+        see :class:`yellowant.pagination.PageIterator`
+
+        """
+        return PageIterator(self.get_application_messages, params,
+                            page_size=page_size, cursor=cursor,
+                            prefetch=prefetch)
+
+    def get(self, endpoint, params=None, version='1', body=None):
         """Shortcut for GET requests via :class:`request`"""
-        return self.request(endpoint, params=params, version=version)
+        return self.request(endpoint, params=params, version=version,
+                            body=body)
 
-    def post(self, endpoint, params=None, version='1'):
+    def post(self, endpoint, params=None, version='1', body=None):
         """Shortcut for POST requests via :class:`request`"""
-        return self.request(endpoint, 'POST', params=params, version=version)
+        return self.request(endpoint, 'POST', params=params, version=version,
+                            body=body)
 
-    def delete(self, endpoint, params=None, version='1'):
+    def delete(self, endpoint, params=None, version='1', body=None):
         """Shortcut for POST requests via :class:`request`"""
-        return self.request(endpoint, 'DELETE', params=params, version=version)
+        return self.request(endpoint, 'DELETE', params=params, version=version,
+                            body=body)
 
-    def put(self, endpoint, params=None, version='1'):
+    def put(self, endpoint, params=None, version='1', body=None):
         """Shortcut for POST requests via :class:`request`"""
-        return self.request(endpoint, 'PUT', params=params, version=version)
+        return self.request(endpoint, 'PUT', params=params, version=version,
+                            body=body)
 
-    def patch(self, endpoint, params=None, version='1'):
+    def patch(self, endpoint, params=None, version='1', body=None):
         """Shortcut for POST requests via :class:`request`"""
-        return self.request(endpoint, 'PATCH', params=params, version=version)
+        return self.request(endpoint, 'PATCH', params=params, version=version,
+                            body=body)
+
+    def batch(self, max_workers=8):
+        """Returns a :class:`yellowant.batch.Batch` that runs Endpoints calls
+        on this client concurrently, see its documentation for usage
+
+        :param max_workers: (optional) Maximum number of concurrent calls
+
+        """
+        return Batch(self, max_workers=max_workers)
+
+    def broadcast_message(self, message, user_integration_ids,
+                          webhook_id=None, webhook_name=None, max_workers=8,
+                          **params):
+        """Sends ``message`` to many user integrations concurrently,
+        serializing it only once. Returns the results in order, failed calls
+        are represented by the exception they raised.
+
+        :param message: (required) A :class:`MessageClass` or a message dict
+        :param user_integration_ids: (required) Recipients, see
+        :meth:`yellowant.fanout.MessageBroadcast.send`
+        :param webhook_id: (optional) Send as ``create_webhook_message``
+        :param webhook_name: (optional) Send as ``create_webhook_message``
+
+        """
+        return MessageBroadcast(message, **params).send(
+            user_integration_ids, client=self, webhook_id=webhook_id,
+            webhook_name=webhook_name, max_workers=max_workers)
+
+    def prewarm(self, connections=1, timeout=5):
+        """Opens ``connections`` keep-alive connections to the API host
+        ahead of traffic, so the first calls after a deploy do not pay for
+        TCP and TLS setup. Returns the number of connections opened.
+
+        :param connections: (optional) Number of connections to open, at
+        most ``pool_maxsize`` of them are kept in the pool
+        :param timeout: (optional) Seconds to wait for each connection
+
+        """
+        url = self.api_url % ''
+        opened = []
+
+        def connect():
+            try:
+                self.transport.send('head', url, session=self.client,
+                                    timeout=timeout, allow_redirects=False)
+            except requests.RequestException:
+                return
+            opened.append(True)
+
+        # Concurrent requests make the pool open distinct connections
+        threads = [threading.Thread(target=connect) for _ in range(connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(opened)
 
     def get_lastfunction_header(self, header, default_return_value=None):
-        """Returns a specific header from the last API call
-        This will return None if the header is not present
+        """Returns a specific header from the last API call made by the
+        current thread. This will return None if the header is not present
 
         :param header: (required) The name of the header you want to get
                        the value of
@@ -236,6 +671,18 @@ class YellowAnt(Endpoints, object):
 
         return self._last_call['headers'].get(header, default_return_value)
 
+    def get_lastfunction_metadata(self):
+        """Returns a dict describing the last API call made by the current
+        thread, with the keys ``api_call``, ``api_error``, ``cookies``,
+        ``headers``, ``status_code``, ``url`` and ``content``
+
+        """
+        if self._last_call is None:
+            raise YellowAntError('This function must be called after an API call. \
+                               It delivers call information.')
+
+        return self._last_call.copy()
+
     def get_authentication_tokens(self, callback_url=None):
 
         if self.oauth_version != 1:
@@ -245,7 +692,9 @@ class YellowAnt(Endpoints, object):
         request_args = {}
         if callback_url:
             request_args['oauth_callback'] = callback_url
-        response = self.client.get(self.request_token_url, params=request_args)
+        response = self.transport.send('get', self.request_token_url,
+                                       session=self.client,
+                                       params=request_args)
 
         if response.status_code == 401:
             raise YellowAntAuthError(response.content,
@@ -279,19 +728,15 @@ class YellowAnt(Endpoints, object):
             raise YellowAntError('This method can only be called when your \
                                OAuth version is 1.0.')
 
-        response = self.client.get(self.access_token_url,
-                                   params={'oauth_verifier': oauth_verifier},
-                                   headers={'Content-Type': 'application/\
+        response = self.transport.send('get', self.access_token_url,
+                                       session=self.client,
+                                       params={'oauth_verifier': oauth_verifier},
+                                       headers={'Content-Type': 'application/\
                                    json'})
 
         if response.status_code == 401:
             try:
-                try:
-                    # try to get json
-                    content = response.json()
-                except AttributeError:  # pragma: no cover
-                    # if unicode detected
-                    content = json.loads(response.content)
+                content = codec.loads(response.content)
             except ValueError:
                 content = {}
 
@@ -312,16 +757,16 @@ class YellowAnt(Endpoints, object):
 
         data = {'grant_type': 'authorization_code', 'client_id': self.app_key, 'client_secret': self.app_secret,
                 'code': code, 'redirect_uri': self.redirect_uri}
+        kwargs = {}
+        deadline = get_deadline()
+        if deadline is not None:
+            deadline.check()
+            kwargs['timeout'] = deadline.get_timeout(
+                self.client_args.get('timeout'))
         try:
-            client = requests.Session()
-            response = client.post(self.request_token_url,
-                                        data=data)
-            content = response.content.decode('utf-8')
-            try:
-                content = content.json()
-            except AttributeError:
-                content = json.loads(content)
-                #access_token = content['access_token']
+            response = self.transport.send('post', self.request_token_url,
+                                           data=data, **kwargs)
+            content = codec.loads(response.content)
         except Exception as e:
             raise YellowAntError(str(e))
         else:
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.archive
+~~~~~~~~~~~~~~~~~
+
+This module contains a local SQLite archive of application messages. Each
+user integration is synced incrementally, after which lookups and full
+text searches are answered locally instead of by paging through the API.
+"""
+
+import sqlite3
+import threading
+
+from . import codec
+from .compat import basestring
+from .exceptions import YellowAntError
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS messages ('
+    ' user_integration_id INTEGER NOT NULL,'
+    ' message_id INTEGER NOT NULL,'
+    ' created,'
+    ' text TEXT,'
+    ' data TEXT NOT NULL,'
+    ' PRIMARY KEY (user_integration_id, message_id))',
+    'CREATE INDEX IF NOT EXISTS messages_message_id ON messages (message_id)',
+    'CREATE INDEX IF NOT EXISTS messages_created ON messages (created)',
+    'CREATE INDEX IF NOT EXISTS messages_integration_created'
+    ' ON messages (user_integration_id, created)',
+    'CREATE TABLE IF NOT EXISTS sync_state ('
+    ' user_integration_id INTEGER PRIMARY KEY,'
+    ' high_water INTEGER,'
+    ' cursor INTEGER,'
+    ' page_size INTEGER)',
+)
+
+FTS_SCHEMA = ('CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts'
+              ' USING fts5(text, content=messages, content_rowid=rowid)')
+
+
+class MessageArchive(object):
+    """Archives ``get_application_messages`` into a SQLite database.
+
+    :meth:`sync` downloads the messages of a user integration posted since
+    the previous sync, tracked by the highest message id archived, and
+    stores them page by page in one transaction. When the API returns the
+    oldest messages first, the page to resume from is kept as well so the
+    next sync does not page through the whole history again. Messages
+    are indexed by integration, message id and time, and their text by an
+    FTS5 full text index when the SQLite build supports it; otherwise
+    :meth:`search` falls back to a ``LIKE`` scan.
+
+    archive = MessageArchive(yellowant, '/var/lib/yellowant/messages.db')
+    archive.sync(user_integration_id)
+    for message in archive.search('deploy failed', since='2018-01-01'):
+        print(message['message_text'])
+
+    """
+
+    def __init__(self, client, path, id_key='id', time_key='timestamp',
+                 text_key='message_text', newest_first=True, page_size=100):
+        """
+        :param client: (required) The :class:`YellowAnt` client to sync with
+        :param path: (required) Location of the database, ``:memory:`` for a
+        throwaway archive
+        :param id_key: (optional) Key of the increasing id of a message
+        :param time_key: (optional) Key of the timestamp of a message
+        :param text_key: (optional) Key of the text of a message. The
+        ``title``, ``pretext`` and ``text`` of its attachments are indexed
+        as well.
+        :param newest_first: (optional) Whether the API returns the newest
+        messages first, in which case paging stops at the first archived id
+        :param page_size: (optional) Number of messages requested per page
+
+        """
+        self.client = client
+        self.path = path
+        self.id_key = id_key
+        self.time_key = time_key
+        self.text_key = text_key
+        self.newest_first = newest_first
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            for statement in SCHEMA:
+                self._db.execute(statement)
+            # archives created before the page cursor was kept
+            columns = [row[1] for row in
+                       self._db.execute('PRAGMA table_info(sync_state)')]
+            for column in ('cursor', 'page_size'):
+                if column not in columns:
+                    self._db.execute('ALTER TABLE sync_state ADD COLUMN %s'
+                                     ' INTEGER' % column)
+            try:
+                self._db.execute(FTS_SCHEMA)
+                self.full_text = True
+            except sqlite3.OperationalError:
+                # SQLite was built without FTS5
+                self.full_text = False
+
+    def __repr__(self):
+        return '<MessageArchive: %s>' % self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+
+    def _get_text(self, message):
+        parts = [message.get(self.text_key)]
+        for attachment in message.get('attachments') or []:
+            if isinstance(attachment, dict):
+                parts.extend(attachment.get(key)
+                             for key in ('title', 'pretext', 'text'))
+        return '\n'.join(part for part in parts
+                         if part and isinstance(part, basestring))
+
+    def _store(self, user_integration_id, message):
+        message_id = message[self.id_key]
+        text = self._get_text(message)
+        row = (message.get(self.time_key), text, codec.dumps(message))
+        existing = self._db.execute(
+            'SELECT rowid, text FROM messages'
+            ' WHERE user_integration_id = ? AND message_id = ?',
+            (user_integration_id, message_id)).fetchone()
+        if existing is None:
+            rowid = self._db.execute(
+                'INSERT INTO messages (user_integration_id, message_id,'
+                ' created, text, data) VALUES (?, ?, ?, ?, ?)',
+                (user_integration_id, message_id) + row).lastrowid
+        else:
+            rowid = existing[0]
+            if self.full_text:
+                self._db.execute(
+                    "INSERT INTO messages_fts (messages_fts, rowid, text)"
+                    " VALUES ('delete', ?, ?)", existing)
+            self._db.execute(
+                'UPDATE messages SET created = ?, text = ?, data = ?'
+                ' WHERE rowid = ?', row + (rowid,))
+        if self.full_text:
+            self._db.execute('INSERT INTO messages_fts (rowid, text)'
+                             ' VALUES (?, ?)', (rowid, text))
+
+    def _get_sync_state(self, user_integration_id):
+        row = self._db.execute(
+            'SELECT high_water, cursor, page_size FROM sync_state'
+            ' WHERE user_integration_id = ?',
+            (user_integration_id,)).fetchone()
+        return row or (None, None, None)
+
+    def get_high_water(self, user_integration_id):
+        """Returns the id of the newest message archived for a user
+        integration, None before its first sync"""
+        with self._lock:
+            return self._get_sync_state(user_integration_id)[0]
+
+    def sync(self, user_integration_id):
+        """Downloads and archives the messages of a user integration posted
+        since its last sync. Returns the number of new messages."""
+        count = 0
+        with self._lock, self._db:
+            high_water, cursor, page_size = \
+                self._get_sync_state(user_integration_id)
+            if self.newest_first or page_size != self.page_size:
+                cursor = 1
+            pages = self.client.iter_application_messages(
+                page_size=self.page_size, cursor=cursor or 1,
+                user_integration_id=user_integration_id)
+            newest = high_water
+            for page in pages.pages():
+                messages = [message for message in page
+                            if high_water is None or
+                            message[self.id_key] > high_water]
+                for message in messages:
+                    self._store(user_integration_id, message)
+                    if newest is None or message[self.id_key] > newest:
+                        newest = message[self.id_key]
+                count += len(messages)
+                if self.newest_first and len(messages) < len(page):
+                    break
+            # the last page is read again next time, as it may still grow
+            self._db.execute(
+                'INSERT OR REPLACE INTO sync_state (user_integration_id,'
+                ' high_water, cursor, page_size) VALUES (?, ?, ?, ?)',
+                (user_integration_id, newest,
+                 None if self.newest_first else pages.cursor, self.page_size))
+        return count
+
+    def get_message(self, user_integration_id, message_id, fetch=True):
+        """Returns an archived message. Messages missing from the archive
+        are fetched with ``get_application_message`` and archived, unless
+        ``fetch`` is False, in which case None is returned."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT data FROM messages'
+                ' WHERE user_integration_id = ? AND message_id = ?',
+                (user_integration_id, message_id)).fetchone()
+        if row is not None:
+            return codec.loads(row[0])
+        if not fetch:
+            return None
+
+        message = self.client.get_application_message(
+            user_integration_id=user_integration_id, message_id=message_id)
+        if isinstance(message, dict) and self.id_key in message:
+            with self._lock, self._db:
+                self._store(user_integration_id, message)
+        return message
+
+    def _query(self, where, args, limit):
+        sql = 'SELECT m.data FROM messages m'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY m.created DESC, m.message_id DESC'
+        if limit:
+            sql += ' LIMIT %d' % limit
+        with self._lock:
+            try:
+                rows = self._db.execute(sql, args).fetchall()
+            except sqlite3.OperationalError as e:
+                raise YellowAntError('Invalid archive query: %s' % e)
+        return [codec.loads(row[0]) for row in rows]
+
+    def _filters(self, user_integration_id, since, until):
+        where, args = [], []
+        if user_integration_id is not None:
+            where.append('m.user_integration_id = ?')
+            args.append(user_integration_id)
+        if since is not None:
+            where.append('m.created >= ?')
+            args.append(since)
+        if until is not None:
+            where.append('m.created <= ?')
+            args.append(until)
+        return where, args
+
+    def messages(self, user_integration_id=None, since=None, until=None,
+                 limit=100):
+        """Returns archived messages, newest first
+
+        :param user_integration_id: (optional) Only messages of this
+        integration
+        :param since: (optional) Earliest timestamp to return
+        :param until: (optional) Latest timestamp to return
+        :param limit: (optional) Maximum number of messages, None for all
+
+        """
+        where, args = self._filters(user_integration_id, since, until)
+        return self._query(where, args, limit)
+
+    def search(self, query, user_integration_id=None, since=None,
+               until=None, limit=100):
+        """Returns archived messages whose text matches ``query``, newest
+        first. With FTS5 ``query`` uses the FTS5 query syntax, e.g.
+        ``deploy AND failed``; otherwise it is matched as a substring.
+
+        Other parameters are the same as :meth:`messages`.
+
+        """
+        where, args = self._filters(user_integration_id, since, until)
+        if self.full_text:
+            where.insert(0, 'm.rowid IN (SELECT rowid FROM messages_fts'
+                            ' WHERE messages_fts MATCH ?)')
+            args.insert(0, query)
+        else:
+            where.insert(0, "m.text LIKE ? ESCAPE '\\'")
+            args.insert(0, '%%%s%%' % query.replace('\\', '\\\\')
+                        .replace('%', '\\%').replace('_', '\\_'))
+        return self._query(where, args, limit)
@@ -0,0 +1,466 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.async_api
+~~~~~~~~~~~~~~~~~~~
+
+This module contains an asyncio-native counterpart of :class:`YellowAnt`.
+Every :class:`Endpoints` method is exposed as a coroutine and all calls share
+one pooled aiohttp connector, so a single event loop can keep many calls in
+flight at once. Requires Python 3.7+ and the ``aiohttp`` package.
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from weakref import WeakKeyDictionary
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from . import __version__
+from .compat import urlencode
+from .concurrency import AdaptiveLimiter
+from .endpoints import Endpoints
+from .deadline import Deadline
+from .exceptions import YellowAntError, YellowAntDeadlineError
+from .helpers import (
+    _endpoint_family, _LastCall, LAST_CALL_CAPTURE_MODES, _split_body,
+    COMPRESSION_WBITS, BODY_TYPES, _build_request_body, _get_content_loader,
+    _get_retry_delay, _record_response, _raise_for_response,
+    _decode_response, _log_if_slow
+)
+
+#: Metadata of the last call of every client, kept per task context so
+#: concurrent calls on one event loop do not see each other's headers
+_last_calls = contextvars.ContextVar('yellowant_last_calls', default=None)
+
+
+class AsyncYellowAnt(Endpoints, object):
+    def __init__(self, app_key=None, app_secret=None, access_token=None,
+                 token_type='bearer', api_version='1.0', client_args=None,
+                 api_url=None, connection_limit=100,
+                 connection_limit_per_host=0, retry_policy=None,
+                 rate_limiter=None, last_call_capture='lazy',
+                 request_compression=None, compression_threshold=8192,
+                 metrics=None, slow_call_threshold=None,
+                 rate_limit_headroom=None, concurrency_limiter=None):
+        """Instantiates an instance of AsyncYellowAnt. Takes the same
+        authentication parameters as :class:`YellowAnt`.
+
+        :param access_token: (optional) A valid OAuth 2 access token
+        :param client_args: (optional) Supports ``headers``, ``timeout``,
+        ``verify``, ``allow_redirects`` and ``proxies``
+        :param connection_limit: (optional) Maximum number of pooled
+        connections shared by all calls
+        :param connection_limit_per_host: (optional) Maximum number of pooled
+        connections per host, 0 means no per host limit
+        :param retry_policy: (optional) A :class:`yellowant.retry.RetryPolicy`
+        used to transparently retry rate limited and failed calls
+        :param rate_limiter: (optional) A
+        :class:`yellowant.ratelimit.RateLimiter` checked before every call
+        :param last_call_capture: (optional) How much of each response is
+        kept for :meth:`get_lastfunction_metadata`. ``'lazy'`` decodes the
+        body only when ``content`` is read, ``'full'`` decodes it eagerly
+        and ``'headers'`` keeps only headers, status and url
+        :param request_compression: (optional) ``'gzip'`` or ``'deflate'``
+        to compress request bodies, with the matching ``Content-Encoding``
+        :param compression_threshold: (optional) Only bodies of at least
+        this many bytes are compressed
+        :param metrics: (optional) A :class:`yellowant.metrics.Metrics`
+        recording every HTTP attempt
+        :param slow_call_threshold: (optional) Log a warning on the
+        ``yellowant`` logger for calls taking longer than this many seconds,
+        retries included
+        :param rate_limit_headroom: (optional) Log a warning on the
+        ``yellowant`` logger for responses with fewer than this many calls
+        remaining in ``x-rate-limit-remaining``
+        :param concurrency_limiter: (optional) An
+        :class:`AsyncAdaptiveLimiter` bounding the number of concurrent
+        requests
+
+        Use it as an async context manager, or ``await client.close()`` when
+        done, so the underlying connector is released.
+
+        """
+        if aiohttp is None:
+            raise YellowAntError('AsyncYellowAnt requires the aiohttp package.')
+
+        self.api_version = api_version
+        self.api_url = os.environ.get('YELLOWANT_API_URL') or api_url
+        if self.api_url is None:
+            self.api_url = 'https://api.yellowant.com/api/%s'
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.access_token = access_token
+        self.token_type = token_type
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        if last_call_capture not in LAST_CALL_CAPTURE_MODES:
+            raise YellowAntError('last_call_capture must be one of %s.' %
+                                 ', '.join(LAST_CALL_CAPTURE_MODES))
+        self.last_call_capture = last_call_capture
+        if request_compression not in (None,) + tuple(COMPRESSION_WBITS):
+            raise YellowAntError('request_compression must be one of %s.' %
+                                 ', '.join(sorted(COMPRESSION_WBITS)))
+        self.request_compression = request_compression
+        self.compression_threshold = compression_threshold
+        self.metrics = metrics
+        self.slow_call_threshold = slow_call_threshold
+        self.rate_limit_headroom = rate_limit_headroom
+        self.concurrency_limiter = concurrency_limiter
+
+        self.client_args = dict(client_args or {})
+        self.headers = {'content-type': 'application/json',
+                        'User-Agent': 'YellowAnt-Python' + __version__}
+        self.headers.update(self.client_args.pop('headers', {}))
+        if self.access_token:
+            self.headers['Authorization'] = '%s %s' % (
+                self.token_type.capitalize(), self.access_token)
+
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.client = None
+
+    def __repr__(self):
+        return '<AsyncYellowAnt: %s>' % (self.app_key)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def _last_call(self):
+        last_calls = _last_calls.get()
+        return last_calls.get(self) if last_calls is not None else None
+
+    @_last_call.setter
+    def _last_call(self, last_call):
+        # copied rather than changed in place, as the mapping is shared with
+        # the tasks this context was copied to or from
+        last_calls = WeakKeyDictionary(_last_calls.get() or {})
+        last_calls[self] = last_call
+        _last_calls.set(last_calls)
+
+    def _get_client(self):
+        # The session has to be created from within a running event loop
+        if self.client is None or self.client.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                ssl=None if self.client_args.get('verify', True) else False)
+            timeout = aiohttp.ClientTimeout(
+                total=self.client_args.get('timeout'))
+            self.client = aiohttp.ClientSession(
+                connector=connector, timeout=timeout, headers=self.headers)
+        return self.client
+
+    async def close(self):
+        """Closes the underlying session and its pooled connections"""
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+    async def _request(self, url, method='GET', params=None, api_call=None,
+                       body=None, deadline=None):
+        """Internal request method"""
+        method = method.upper()
+        params, data, files, headers = _build_request_body(
+            method, params, body, self.request_compression,
+            self.compression_threshold)
+        request_bytes = len(data) if isinstance(data, BODY_TYPES) else 0
+
+        requests_args = {
+            'allow_redirects': self.client_args.get('allow_redirects', True),
+            'proxy': self.client_args.get('proxies', {}).get('https'),
+        }
+        if method == 'GET':
+            if params:
+                url = '%s?%s' % (url, urlencode(params, doseq=True))
+        elif files:
+            form = aiohttp.FormData(list(data.items()))
+            for k, v in files.items():
+                form.add_field(k, v)
+            requests_args['data'] = form()
+            # replaces the JSON content type of the session
+            headers['Content-Type'] = requests_args['data'].content_type
+        else:
+            requests_args['data'] = data
+        if headers:
+            requests_args['headers'] = headers
+
+        family = _endpoint_family(url, self.api_url)
+        rate_limit_key = None
+        if self.rate_limiter is not None:
+            rate_limit_key = '%s:%s' % (self.app_key, family)
+
+        retries = 0
+        started = time.time()
+        try:
+            while True:
+                # the error ending this attempt, if it does not get a
+                # response
+                failure = None
+                if deadline is not None:
+                    deadline.check()
+                if rate_limit_key is not None:
+                    await self._acquire_rate_limit(
+                        rate_limit_key,
+                        deadline.remaining() if deadline is not None else None)
+                if deadline is not None:
+                    requests_args['timeout'] = aiohttp.ClientTimeout(
+                        total=deadline.get_timeout(
+                            self.client_args.get('timeout')))
+                event = None
+                if self.metrics is not None:
+                    event = self.metrics.start(method, url, family,
+                                               request_bytes, retries)
+                try:
+                    response, content = await self._send(method, url,
+                                                         requests_args,
+                                                         deadline)
+                except BaseException as e:
+                    # every attempt started is finished, whatever the error
+                    if event is not None:
+                        self.metrics.finish(event, error=e)
+                    if not isinstance(e, (aiohttp.ClientError,
+                                          asyncio.TimeoutError)):
+                        raise
+                    failure = e
+                    if deadline is not None and deadline.expired:
+                        raise YellowAntDeadlineError(
+                            'Deadline of %ss exceeded: %s' %
+                            (deadline.timeout, str(e) or e.__class__.__name__))
+                    delay = _get_retry_delay(
+                        self.retry_policy, method, retries, started, deadline,
+                        connection_error=isinstance(
+                            e, (aiohttp.ClientConnectionError,
+                                asyncio.TimeoutError)))
+                    if delay is None:
+                        raise YellowAntError(str(e) or e.__class__.__name__)
+                else:
+                    _record_response(self, event, family, response.status,
+                                     response.headers, len(content),
+                                     rate_limit_key)
+                    if response.status <= 304:
+                        break
+                    delay = _get_retry_delay(
+                        self.retry_policy, method, retries, started, deadline,
+                        status_code=response.status, headers=response.headers)
+                    if delay is None:
+                        break
+                retries += 1
+                await asyncio.sleep(delay)
+        except BaseException as e:
+            # calls ending without a response are logged with the exception
+            if failure is None:
+                failure = e
+            raise
+        finally:
+            _log_if_slow(self, method, url, family, request_bytes,
+                         response.status if failure is None else None,
+                         started, retries, failure)
+
+        # create stash for last function intel
+        self._last_call = _LastCall(
+            _get_content_loader(self.last_call_capture,
+                                lambda: content.decode('utf-8', 'replace')),
+            api_call=api_call,
+            api_error=None,
+            cookies=response.cookies,
+            headers=response.headers,
+            status_code=response.status,
+            url=str(response.url),
+        )
+
+        # greater than 304 (not modified) is an error
+        _raise_for_response(response.status, content, response.headers,
+                            self._last_call)
+
+        return _decode_response(response.status, content)
+
+    async def _send(self, method, url, requests_args, deadline=None):
+        """Sends one attempt, within the concurrency limit when
+        configured"""
+        limiter = self.concurrency_limiter
+        if limiter is not None and not await limiter.acquire(
+                deadline.remaining() if deadline is not None else None):
+            raise YellowAntDeadlineError(
+                'Deadline of %ss exceeded waiting for a request slot.' %
+                deadline.timeout)
+        started = time.time()
+        overloaded = False
+        try:
+            async with self._get_client().request(
+                    method, url, **requests_args) as response:
+                body = await response.read()
+            overloaded = response.status in (429, 503)
+            return response, body
+        except asyncio.TimeoutError:
+            overloaded = True
+            raise
+        finally:
+            if limiter is not None:
+                await limiter.release(time.time() - started, overloaded)
+
+    async def _acquire_rate_limit(self, key, timeout=None):
+        """Waits, without blocking the event loop, for a rate limit token,
+        for ``timeout`` seconds at most"""
+        waited = 0
+        wait = self.rate_limiter.try_acquire(key)
+        while wait:
+            self.rate_limiter.check_wait(waited + wait, timeout)
+            await asyncio.sleep(wait)
+            waited += wait
+            wait = self.rate_limiter.try_acquire(key)
+
+    async def request(self, endpoint, method='GET', params=None, version='1.1',
+                      body=None):
+        """Makes a call to ``endpoint`` and returns the decoded response,
+        see :meth:`YellowAnt.request`. A ``_deadline`` parameter, a
+        :class:`yellowant.deadline.Deadline` or a number of seconds, caps
+        the whole call, retries and rate limit waits included, and shrinks
+        the timeout of each attempt to the time left. ``_priority`` is
+        accepted for parity with :class:`YellowAnt` and ignored, as the
+        async client has no priority lanes."""
+        deadline = None
+        if isinstance(params, dict) and ('_priority' in params or
+                                          '_deadline' in params):
+            params = dict(params)
+            params.pop('_priority', None)
+            deadline = params.pop('_deadline', None)
+            if deadline is not None:
+                deadline = Deadline.coerce(deadline)
+
+        params, body = _split_body(params, body)
+        if endpoint.startswith('http://'):
+            raise YellowAntError('api.yellowant.com is restricted to SSL/TLS traffic.')
+
+        if endpoint.startswith('https://'):
+            url = endpoint
+        else:
+            url = self.api_url % endpoint
+
+        content = await self._request(url, method=method, params=params,
+                                      api_call=url, body=body,
+                                      deadline=deadline)
+
+        return content
+
+    def get(self, endpoint, params=None, version='1', body=None):
+        """Shortcut for GET requests via :class:`request`"""
+        return self.request(endpoint, params=params, version=version,
+                            body=body)
+
+    def post(self, endpoint, params=None, version='1', body=None):
+        """Shortcut for POST requests via :class:`request`"""
+        return self.request(endpoint, 'POST', params=params, version=version,
+                            body=body)
+
+    def delete(self, endpoint, params=None, version='1', body=None):
+        """Shortcut for DELETE requests via :class:`request`"""
+        return self.request(endpoint, 'DELETE', params=params, version=version,
+                            body=body)
+
+    def put(self, endpoint, params=None, version='1', body=None):
+        """Shortcut for PUT requests via :class:`request`"""
+        return self.request(endpoint, 'PUT', params=params, version=version,
+                            body=body)
+
+    def patch(self, endpoint, params=None, version='1', body=None):
+        """Shortcut for PATCH requests via :class:`request`"""
+        return self.request(endpoint, 'PATCH', params=params, version=version,
+                            body=body)
+
+    def get_lastfunction_header(self, header, default_return_value=None):
+        """Returns a specific header from the last API call made by the
+        current task. This will return None if the header is not present
+
+        :param header: (required) The name of the header you want to get
+                       the value of
+
+        """
+        if self._last_call is None:
+            raise YellowAntError('This function must be called after an API call. \
+                               It delivers header information.')
+
+        return self._last_call['headers'].get(header, default_return_value)
+
+    def get_lastfunction_metadata(self):
+        """Returns a dict describing the last API call made by the current
+        task, see :meth:`YellowAnt.get_lastfunction_metadata`"""
+        if self._last_call is None:
+            raise YellowAntError('This function must be called after an API call. \
+                               It delivers call information.')
+
+        return self._last_call.copy()
+
+
+class AsyncAdaptiveLimiter(AdaptiveLimiter):
+    """asyncio counterpart of :class:`yellowant.concurrency.AdaptiveLimiter`
+    for :class:`AsyncYellowAnt`, with the same AIMD rule. Calls wait for a
+    slot without blocking the event loop. Use one instance per event loop.
+
+    from yellowant.async_api import AsyncYellowAnt, AsyncAdaptiveLimiter
+
+    limiter = AsyncAdaptiveLimiter(initial=8, max_limit=64)
+    yellowant = AsyncYellowAnt(access_token=token,
+                               concurrency_limiter=limiter)
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(AsyncAdaptiveLimiter, self).__init__(*args, **kwargs)
+        # created on first use, from within the running event loop
+        self._condition = None
+
+    def __repr__(self):
+        return '<AsyncAdaptiveLimiter: %d/%d in flight>' % (self.in_flight,
+                                                            int(self.limit))
+
+    def _get_condition(self):
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self, timeout=None, priority=0):
+        """Waits until a call may start. Returns False if ``timeout``
+        seconds pass first.
+
+        :param timeout: (optional) Seconds to wait at most
+        :param priority: (optional) Priority of the call, lower first
+
+        """
+        condition = self._get_condition()
+        async with condition:
+            self._waiting[priority] = self._waiting.get(priority, 0) + 1
+            try:
+                await asyncio.wait_for(condition.wait_for(
+                    lambda: not self._is_blocked(priority)), timeout)
+            except asyncio.TimeoutError:
+                return False
+            else:
+                self.in_flight += 1
+                return True
+            finally:
+                self._waiting[priority] -= 1
+                # a lower priority call may be free to go now
+                condition.notify_all()
+
+    async def release(self, latency, overloaded=False):
+        """Records a finished call and lets a waiting one start
+
+        :param latency: (required) Seconds the call took
+        :param overloaded: (optional) Whether the API signalled overload,
+        e.g. with 429 or 503
+
+        """
+        condition = self._get_condition()
+        async with condition:
+            self._update(latency, overloaded)
+            condition.notify_all()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.batch
+~~~~~~~~~~~~~~~
+
+This module contains a batch executor that runs many API calls concurrently
+on a bounded thread pool, so fanning a webhook event out to N user
+integrations costs about one round trip instead of N.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .deadline import get_deadline
+from .endpoints import Endpoints
+from .priority import get_priority, priority
+
+
+def _call_within(deadline, lane, func, *args, **kwargs):
+    if lane is not None:
+        with priority(lane):
+            return _call_within(deadline, None, func, *args, **kwargs)
+    if deadline is not None:
+        with deadline:
+            return func(*args, **kwargs)
+    return func(*args, **kwargs)
+
+
+class Batch(object):
+    """Queues API calls and runs them concurrently.
+
+    Endpoints methods called on the batch are run against its client and
+    return a ``concurrent.futures.Future``. Calls on any other client,
+    e.g. one per user token, can be queued with :meth:`submit`. Leaving the
+    ``with`` block waits for every call; a failing call never aborts the
+    others. Calls queued within a :class:`yellowant.deadline.Deadline` or a
+    :func:`yellowant.priority.priority` block run within it too.
+
+    with yellowant.batch(max_workers=16) as batch:
+        for user_integration_id in user_integration_ids:
+            batch.add_message(requester_application=user_integration_id,
+                              **message.get_dict())
+    results = batch.results()
+
+    """
+
+    def __init__(self, client=None, max_workers=8):
+        """
+        :param client: (optional) Client that Endpoints methods called on the
+        batch are run against
+        :param max_workers: (optional) Maximum number of concurrent calls
+
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.futures = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __repr__(self):
+        return '<Batch: %d calls>' % len(self.futures)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getattr__(self, name):
+        if self.client is None or not hasattr(Endpoints, name):
+            raise AttributeError(name)
+        func = getattr(self.client, name)
+
+        def submit(*args, **kwargs):
+            return self.submit(func, *args, **kwargs)
+        return submit
+
+    def submit(self, func, *args, **kwargs):
+        """Queues ``func(*args, **kwargs)`` and returns its future"""
+        deadline, lane = get_deadline(), get_priority()
+        if deadline is not None or lane is not None:
+            future = self._executor.submit(_call_within, deadline, lane, func,
+                                           *args, **kwargs)
+        else:
+            future = self._executor.submit(func, *args, **kwargs)
+        self.futures.append(future)
+        return future
+
+    def wait(self, timeout=None):
+        """Blocks until every queued call is done"""
+        wait(self.futures, timeout=timeout)
+
+    def results(self, timeout=None):
+        """Returns the result of every queued call in submission order.
+        Calls that failed are represented by the exception they raised."""
+        self.wait(timeout)
+        results = []
+        for future in self.futures:
+            exception = future.exception(timeout=0)
+            results.append(exception if exception is not None
+                           else future.result())
+        return results
+
+    def close(self):
+        """Waits for every queued call and releases the worker threads"""
+        self._executor.shutdown(wait=True)
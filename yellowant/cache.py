@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.cache
+~~~~~~~~~~~~~~~
+
+This module contains the response cache used by :class:`YellowAnt` for GET
+endpoints whose results rarely change, together with an in-memory LRU and
+an on-disk storage backend.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from . import codec
+from .helpers import _request_key
+
+# os.replace overwrites existing files on every platform, but is Python 3
+_replace = getattr(os, 'replace', os.rename)
+
+
+class MemoryCache(object):
+    """Thread-safe in-memory LRU storage holding at most ``maxsize``
+    entries"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        # key -> (value, time of last use)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            # most recently used entries live at the end
+            self._entries[key] = (entry[0], time.time())
+            return entry[0]
+
+    def get_or_set(self, key, factory):
+        """Returns the value of ``key``, storing ``factory()`` first when
+        there is none. ``factory`` runs without the lock held, so when two
+        threads miss at once both may call it and the first stored wins."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        created = factory()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            value = entry[0] if entry is not None else created
+            self._set(key, value)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._set(key, value)
+
+    def _set(self, key, value):
+        self._entries[key] = (value, time.time())
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def prune(self, max_idle):
+        """Drops the entries not used for more than ``max_idle`` seconds"""
+        expires = time.time() - max_idle
+        with self._lock:
+            while self._entries:
+                key = next(iter(self._entries))
+                if self._entries[key][1] >= expires:
+                    break
+                del self._entries[key]
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileCache(object):
+    """On-disk storage keeping one JSON file per entry in ``directory``,
+    so cached responses survive restarts and are shared between processes"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, '%s.json' % key)
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                return codec.loads(f.read())
+        except (IOError, OSError, ValueError):
+            return None
+
+    def set(self, key, value):
+        # write to a temporary file first so readers never see half an entry
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(codec.dumps(value))
+        _replace(path, self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                self.delete(name[:-len('.json')])
+
+
+class ResponseCache(object):
+    """Caches GET responses per endpoint family for a configurable time.
+
+    Expired entries that carried an ``ETag`` or ``Last-Modified`` header are
+    revalidated with ``If-None-Match``/``If-Modified-Since``, so an
+    unchanged resource only costs a 304. Entries are keyed by url, params
+    and access token, so users never see each other's data.
+
+    from yellowant import YellowAnt
+    from yellowant.cache import ResponseCache, FileCache
+
+    cache = ResponseCache(FileCache('/var/cache/yellowant'),
+                          ttls={'user/profile': 60})
+    yellowant = YellowAnt(access_token=token, response_cache=cache)
+
+    """
+
+    #: Seconds each endpoint family is cached for, unless overridden
+    DEFAULT_TTLS = {
+        'help/languages': 24 * 60 * 60,
+        'help/tos': 24 * 60 * 60,
+        'help/privacy': 24 * 60 * 60,
+        'user/profile': 5 * 60,
+        'application/rate_limit_status': 5,
+    }
+
+    def __init__(self, backend=None, ttls=None, ttl=0):
+        """
+        :param backend: (optional) Storage, defaults to a :class:`MemoryCache`
+        :param ttls: (optional) Per endpoint family TTLs in seconds, merged
+        over :attr:`DEFAULT_TTLS`
+        :param ttl: (optional) TTL of any other GET endpoint, 0 disables
+        caching for them
+
+        """
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttls = dict(self.DEFAULT_TTLS, **(ttls or {}))
+        self.ttl = ttl
+
+    def __repr__(self):
+        return '<ResponseCache: %s>' % self.backend.__class__.__name__
+
+    def get_ttl(self, family):
+        return self.ttls.get(family, self.ttl)
+
+    def lookup(self, family, url, params, access_token):
+        """Returns ``(key, entry)`` for a GET call. ``key`` is None when the
+        endpoint is not cached and ``entry`` is None on a miss."""
+        if not self.get_ttl(family):
+            return None, None
+        key = _request_key(url, params, access_token)
+        return key, self.backend.get(key)
+
+    @staticmethod
+    def is_fresh(entry):
+        return entry['expires'] > time.time()
+
+    @staticmethod
+    def get_content(entry):
+        return codec.loads(entry['body'])
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Returns the headers revalidating a stale ``entry``"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, key, family, response):
+        """Caches a successful response"""
+        if 'no-store' in response.headers.get('Cache-Control', ''):
+            return
+        self.backend.set(key, {
+            'body': response.content.decode('utf-8'),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'expires': time.time() + self.get_ttl(family),
+        })
+
+    def revalidated(self, key, family, entry):
+        """Extends a stale ``entry`` after the server answered 304"""
+        entry = dict(entry, expires=time.time() + self.get_ttl(family))
+        self.backend.set(key, entry)
+        return entry
+
+    def invalidate(self, key=None):
+        """Drops ``key``, or every entry when no key is given"""
+        if key is None:
+            self.backend.clear()
+        else:
+            self.backend.delete(key)
+
+
+class IntegrationCache(object):
+    """Write-through cache of user integrations keyed by integration id
+    and access token.
+
+    :meth:`YellowAnt.get_user_integration` is served from it, while
+    ``update_user_integration`` stores the updated integration and
+    ``delete_user_integration`` drops it, so the cache stays coherent with
+    the changes made through the client. Entries older than ``ttl`` but
+    younger than ``ttl + stale_ttl`` are still returned while a fresh copy
+    is fetched in the background.
+
+    Entries of different access tokens are kept apart, so clients of many
+    users, e.g. those of a :class:`yellowant.registry.YellowAntRegistry`,
+    can share one IntegrationCache.
+
+    """
+
+    def __init__(self, maxsize=1024, ttl=300, stale_ttl=0):
+        """
+        :param maxsize: (optional) Maximum number of integrations kept
+        :param ttl: (optional) Seconds an integration is served without
+        asking the API
+        :param stale_ttl: (optional) Seconds an expired integration may
+        still be served while it is refreshed in the background
+
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = MemoryCache(maxsize)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<IntegrationCache: %d integrations>' % len(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(integration_id, access_token):
+        raw = '%s#%s' % (integration_id, access_token or '')
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, integration_id, access_token=None):
+        """Returns ``(integration, fresh)``; integration is None on a miss
+        or when even the stale window has passed"""
+        entry = self._entries.get(self._key(integration_id, access_token))
+        if entry is None:
+            return None, False
+        age = time.time() - entry[1]
+        if age <= self.ttl:
+            return entry[0], True
+        if age <= self.ttl + self.stale_ttl:
+            return entry[0], False
+        return None, False
+
+    def set(self, integration_id, integration, access_token=None):
+        self._entries.set(self._key(integration_id, access_token),
+                          (integration, time.time()))
+
+    def invalidate(self, integration_id=None, access_token=None):
+        """Drops ``integration_id``, or every entry when no id is given"""
+        if integration_id is None:
+            self._entries.clear()
+        else:
+            self._entries.delete(self._key(integration_id, access_token))
+
+    def start_refresh(self, integration_id, access_token=None):
+        """Returns True if the caller should refresh ``integration_id``,
+        False if another refresh of it is already running"""
+        key = self._key(integration_id, access_token)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, integration_id, access_token=None):
+        with self._lock:
+            self._refreshing.discard(self._key(integration_id, access_token))
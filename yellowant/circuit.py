@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.circuit
+~~~~~~~~~~~~~~~~~
+
+This module contains a per endpoint circuit breaker. While an endpoint
+family is failing, calls to it fail fast with
+:class:`YellowAntCircuitOpenError` instead of each waiting out its timeout,
+so workers stay available for the healthy parts of the API.
+"""
+
+import threading
+import time
+from collections import deque
+
+from .exceptions import YellowAntCircuitOpenError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class _Circuit(object):
+    def __init__(self):
+        self.state = CLOSED
+        self.outcomes = deque()
+        self.opened_at = 0
+        self.trials = 0
+        self.successes = 0
+
+
+class CircuitBreaker(object):
+    """Circuit breaker keyed by endpoint family, e.g. ``user/message``.
+
+    A closed circuit lets calls through and tracks their outcomes over the
+    last ``window`` seconds. Once at least ``minimum_calls`` were made and
+    the share of failures reaches ``failure_threshold``, the circuit opens
+    and calls fail fast for ``reset_timeout`` seconds. It then turns
+    half-open and lets ``half_open_calls`` trial calls through: if they all
+    succeed the circuit closes, a failure opens it again.
+
+    Network errors, timeouts and responses with one of ``failure_codes``
+    are failures, including a timeout cut short by a
+    :class:`yellowant.deadline.Deadline`. Other responses, such as 404 or
+    429, mean the endpoint is up. Errors raised before anything was sent,
+    e.g. bad parameters or a deadline exceeded while waiting, say nothing
+    about the endpoint and are not counted.
+
+    from yellowant import YellowAnt
+    from yellowant.circuit import CircuitBreaker
+
+    yellowant = YellowAnt(access_token=token,
+                          circuit_breaker=CircuitBreaker())
+
+    """
+
+    def __init__(self, failure_threshold=0.5, minimum_calls=10, window=30,
+                 reset_timeout=30, half_open_calls=1,
+                 failure_codes=(500, 502, 503, 504)):
+        """
+        :param failure_threshold: (optional) Share of failed calls, between
+        0 and 1, that opens the circuit
+        :param minimum_calls: (optional) Number of calls in the window
+        before the failure rate is considered
+        :param window: (optional) Seconds of outcomes the failure rate is
+        computed over
+        :param reset_timeout: (optional) Seconds an open circuit fails fast
+        before letting trial calls through
+        :param half_open_calls: (optional) Number of successful trial calls
+        closing a half-open circuit
+        :param failure_codes: (optional) HTTP status codes counted as
+        failures
+
+        """
+        self.failure_threshold = failure_threshold
+        self.minimum_calls = minimum_calls
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.failure_codes = frozenset(failure_codes)
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<CircuitBreaker: %d open>' % sum(
+            1 for circuit in self._circuits.values() if circuit.state != CLOSED)
+
+    def _get_circuit(self, key, now):
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = _Circuit()
+        if circuit.state == OPEN and \
+                now - circuit.opened_at >= self.reset_timeout:
+            circuit.state = HALF_OPEN
+            circuit.trials = circuit.successes = 0
+        return circuit
+
+    def get_state(self, key):
+        """Returns ``'closed'``, ``'open'`` or ``'half-open'``"""
+        with self._lock:
+            return self._get_circuit(key, time.time()).state
+
+    def before_call(self, key):
+        """Raises :class:`YellowAntCircuitOpenError` unless a call to
+        ``key`` may go through"""
+        now = time.time()
+        with self._lock:
+            circuit = self._get_circuit(key, now)
+            if circuit.state == CLOSED:
+                return
+            if circuit.state == HALF_OPEN and \
+                    circuit.trials < self.half_open_calls:
+                circuit.trials += 1
+                return
+            retry_after = max(
+                circuit.opened_at + self.reset_timeout - now, 0)
+        raise YellowAntCircuitOpenError(
+            'Circuit for %s is %s, failing fast.' % (key, circuit.state),
+            endpoint=key, retry_after=retry_after)
+
+    def is_failure(self, error):
+        """Returns whether ``error`` means the endpoint is unhealthy"""
+        if getattr(error, 'transport_error', False):
+            return True
+        return getattr(error, 'error_code', None) in self.failure_codes
+
+    def record(self, key, error=None):
+        """Records the outcome of a call let through by :meth:`before_call`.
+        Errors raised before the endpoint was reached, such as client side
+        rate limit rejections, give back the trial slot instead of counting
+        as an outcome."""
+        if error is not None and not getattr(error, 'transport_error', False) \
+                and not getattr(error, 'response_received', False):
+            # the call never got an answer from the endpoint
+            self.cancel(key)
+            return
+        failed = error is not None and self.is_failure(error)
+        now = time.time()
+        with self._lock:
+            circuit = self._get_circuit(key, now)
+            if circuit.state == HALF_OPEN:
+                if failed:
+                    self._open(circuit, now)
+                    return
+                circuit.successes += 1
+                if circuit.successes >= self.half_open_calls:
+                    circuit.state = CLOSED
+                    circuit.outcomes.clear()
+                return
+            if circuit.state == OPEN:
+                return
+
+            outcomes = circuit.outcomes
+            outcomes.append((now, failed))
+            while outcomes and outcomes[0][0] < now - self.window:
+                outcomes.popleft()
+            if failed and len(outcomes) >= self.minimum_calls:
+                failures = sum(1 for _, f in outcomes if f)
+                if failures >= self.failure_threshold * len(outcomes):
+                    self._open(circuit, now)
+
+    @staticmethod
+    def _open(circuit, now):
+        circuit.state = OPEN
+        circuit.opened_at = now
+        circuit.outcomes.clear()
+
+    def cancel(self, key):
+        """Gives back the trial slot of a call let through by
+        :meth:`before_call` that ended without an outcome, e.g. because it
+        failed before being sent"""
+        with self._lock:
+            circuit = self._get_circuit(key, time.time())
+            if circuit.state == HALF_OPEN and circuit.trials > 0:
+                circuit.trials -= 1
+
+    def reset(self, key=None):
+        """Closes the circuit of ``key``, or every circuit"""
+        with self._lock:
+            if key is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(key, None)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.codec
+~~~~~~~~~~~~~~~
+
+This module contains the JSON codec every encode and decode in the SDK goes
+through. The default is backed by simplejson or the standard library (see
+:mod:`yellowant.compat`), and a faster orjson backed codec can be switched
+on process wide:
+
+from yellowant import codec
+codec.set_codec('orjson')
+"""
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+from .compat import json
+from .exceptions import YellowAntError
+
+
+class JSONCodec(object):
+    """Codec backed by simplejson or the standard library json module"""
+    name = 'json'
+
+    def dumps(self, obj, **kwargs):
+        """Returns ``obj`` encoded as text, ``kwargs`` are passed to
+        ``json.dumps``"""
+        return json.dumps(obj, **kwargs)
+
+    def dumps_bytes(self, obj):
+        """Returns ``obj`` encoded as UTF-8 bytes, ready to be sent"""
+        encoded = self.dumps(obj)
+        if not isinstance(encoded, bytes):
+            encoded = encoded.encode('utf-8')
+        return encoded
+
+    def loads(self, data):
+        """Decodes text or UTF-8 bytes, raising ValueError on bad input"""
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+    def __repr__(self):
+        return '<%s>' % self.__class__.__name__
+
+
+class OrjsonCodec(JSONCodec):
+    """Codec backed by orjson, which encodes straight to bytes.
+
+    Calls with formatting ``kwargs`` (e.g. ``indent``) and objects orjson
+    cannot encode, such as integers beyond 64 bits, fall back to
+    :class:`JSONCodec`.
+
+    """
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise YellowAntError('OrjsonCodec requires the orjson package.')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super(OrjsonCodec, self).dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def dumps_bytes(self, obj):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return json.dumps(obj).encode('utf-8')
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+CODECS = {
+    JSONCodec.name: JSONCodec,
+    OrjsonCodec.name: OrjsonCodec,
+}
+
+_codec = JSONCodec()
+
+
+def get_codec():
+    """Returns the codec in use"""
+    return _codec
+
+
+def set_codec(codec):
+    """Sets the codec used by the whole SDK, either a codec instance or the
+    name of a built-in one (``'json'`` or ``'orjson'``)"""
+    global _codec
+    if not isinstance(codec, JSONCodec):
+        if codec not in CODECS:
+            raise YellowAntError('Unknown codec %r, expected one of %s.' %
+                                 (codec, ', '.join(sorted(CODECS))))
+        codec = CODECS[codec]()
+    _codec = codec
+
+
+def dumps(obj, **kwargs):
+    return _codec.dumps(obj, **kwargs)
+
+
+def dumps_bytes(obj):
+    return _codec.dumps_bytes(obj)
+
+
+def loads(data):
+    return _codec.loads(data)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.concurrency
+~~~~~~~~~~~~~~~~~~~~~
+
+This module contains an adaptive limit on the number of concurrent in
+flight requests. The limit grows additively while calls are fast and
+healthy, and shrinks multiplicatively on rate limiting, 503s and latency
+inflation (AIMD), so the client settles at the throughput the API can take
+without a hand tuned pool size. The asyncio counterpart, for
+:class:`yellowant.async_api.AsyncYellowAnt`, is
+:class:`yellowant.async_api.AsyncAdaptiveLimiter`.
+"""
+
+import threading
+import time
+
+
+class AdaptiveLimiter(object):
+    """AIMD concurrency limiter shared by every thread using a client,
+    including :class:`yellowant.batch.Batch` workers and broadcasts.
+
+    Each completed call that was healthy, while at least half the limit was
+    in use, raises the limit by ``increase / limit``, i.e. by ``increase``
+    per limit's worth of calls. A call answered with 429 or 503 or timing
+    out, or latency inflation, multiplies the limit by ``backoff``, at most
+    once per baseline latency so one burst of failures only backs off once.
+
+    Calls waiting for a slot are let through in ``priority`` order, lower
+    numbers first (see :mod:`yellowant.priority`).
+
+    Latency is inflated when its average over the last ``short_window``
+    calls exceeds ``latency_tolerance`` times the baseline, its average
+    over the last ``long_window`` calls (both exponentially weighted).
+
+    from yellowant import YellowAnt
+    from yellowant.concurrency import AdaptiveLimiter
+
+    limiter = AdaptiveLimiter(initial=8, max_limit=64)
+    yellowant = YellowAnt(access_token=token, concurrency_limiter=limiter)
+
+    """
+
+    def __init__(self, initial=10, min_limit=1, max_limit=100, increase=1.0,
+                 backoff=0.5, latency_tolerance=2.0, short_window=10,
+                 long_window=500):
+        """
+        :param initial: (optional) Starting limit
+        :param min_limit: (optional) Lowest the limit goes
+        :param max_limit: (optional) Highest the limit goes
+        :param increase: (optional) Additive increase per limit's worth of
+        healthy calls
+        :param backoff: (optional) Factor the limit is multiplied by on
+        overload
+        :param latency_tolerance: (optional) Multiple of the baseline
+        latency above which recent latency counts as overload
+        :param short_window: (optional) Number of calls recent latency is
+        averaged over
+        :param long_window: (optional) Number of calls the baseline latency
+        is averaged over
+
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.increase = increase
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self._short_weight = 2.0 / (short_window + 1)
+        self._long_weight = 2.0 / (long_window + 1)
+        self.in_flight = 0
+        self._waiting = {}
+        self.latency = None
+        self.baseline = None
+        self._last_backoff = 0
+        self._condition = threading.Condition()
+
+    def __repr__(self):
+        return '<AdaptiveLimiter: %d/%d in flight>' % (self.in_flight,
+                                                       int(self.limit))
+
+    def _is_blocked(self, priority):
+        if self.in_flight >= int(self.limit):
+            return True
+        # queued calls of a higher priority go first
+        return any(count for waiting, count in self._waiting.items()
+                   if waiting < priority)
+
+    def acquire(self, timeout=None, priority=0):
+        """Blocks until a call may start. Returns False if ``timeout``
+        seconds pass first.
+
+        :param timeout: (optional) Seconds to wait at most
+        :param priority: (optional) Priority of the call, lower first
+
+        """
+        expires = time.time() + timeout if timeout is not None else None
+        with self._condition:
+            self._waiting[priority] = self._waiting.get(priority, 0) + 1
+            try:
+                while self._is_blocked(priority):
+                    if expires is None:
+                        self._condition.wait()
+                        continue
+                    remaining = expires - time.time()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+                self.in_flight += 1
+                return True
+            finally:
+                self._waiting[priority] -= 1
+                # a lower priority call may be free to go now
+                self._condition.notify_all()
+
+    def _update(self, latency, overloaded):
+        """Applies the AIMD rule for a finished call, with the lock held"""
+        now = time.time()
+        in_use = self.in_flight
+        self.in_flight -= 1
+
+        if self.baseline is None:
+            self.latency = self.baseline = latency
+        else:
+            self.latency += (latency - self.latency) * self._short_weight
+            self.baseline += (latency - self.baseline) * self._long_weight
+        inflated = self.latency > self.baseline * self.latency_tolerance
+
+        if overloaded or inflated:
+            if now - self._last_backoff >= self.baseline:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_backoff = now
+        elif in_use >= self.limit / 2:
+            self.limit = min(self.max_limit,
+                             self.limit + self.increase / self.limit)
+
+    def release(self, latency, overloaded=False):
+        """Records a finished call and lets a waiting one start
+
+        :param latency: (required) Seconds the call took
+        :param overloaded: (optional) Whether the API signalled overload,
+        e.g. with 429 or 503
+
+        """
+        with self._condition:
+            self._update(latency, overloaded)
+            self._condition.notify_all()
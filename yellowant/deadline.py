@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.deadline
+~~~~~~~~~~~~~~~~~~
+
+This module contains per operation deadlines. A deadline caps the total
+wall time of everything :class:`YellowAnt` does for an operation, retries,
+rate limit waits and pagination included, and shrinks the timeout of each
+HTTP attempt to the time left.
+"""
+
+import threading
+import time
+
+from .exceptions import YellowAntDeadlineError
+from .helpers import _get_stack
+
+_local = threading.local()
+
+
+def get_deadline():
+    """Returns the closest :class:`Deadline` active in this thread, or
+    None"""
+    stack = _get_stack(_local)
+    if not stack:
+        return None
+    return min(stack, key=lambda deadline: deadline.expires)
+
+
+class Deadline(object):
+    """A point in time by which an operation has to be done.
+
+    Use it as a context manager around any number of calls, or pass it (or
+    a number of seconds) as the ``_deadline`` parameter of any Endpoints
+    method. Nested deadlines never extend an enclosing one.
+
+    from yellowant.deadline import Deadline
+
+    with Deadline(2.5):
+        profile = yellowant.get_user_profile()
+        yellowant.add_message(**message)
+
+    """
+
+    def __init__(self, timeout):
+        """
+        :param timeout: (required) Seconds from now until the deadline
+
+        """
+        self.timeout = timeout
+        self.expires = time.time() + timeout
+
+    def __repr__(self):
+        return '<Deadline: %.3fs left>' % self.remaining()
+
+    def __enter__(self):
+        _get_stack(_local).append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _get_stack(_local).remove(self)
+
+    def remaining(self):
+        """Returns the seconds left, negative once expired"""
+        return self.expires - time.time()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self):
+        """Raises :class:`YellowAntDeadlineError` once expired"""
+        if self.expired:
+            raise YellowAntDeadlineError(
+                'Deadline of %ss exceeded.' % self.timeout)
+
+    def get_timeout(self, timeout=None):
+        """Returns ``timeout``, a requests style timeout of seconds or a
+        ``(connect, read)`` tuple, capped to the time left"""
+        remaining = max(self.remaining(), 0.001)
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining)
+                         for t in timeout)
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    @classmethod
+    def coerce(cls, deadline):
+        """Returns ``deadline`` as a :class:`Deadline`, given one or a
+        number of seconds"""
+        if isinstance(deadline, cls):
+            return deadline
+        return cls(deadline)
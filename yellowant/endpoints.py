@@ -14,6 +14,11 @@ from .advisory import YellowAntDeprecationWarning
 
 
 class Endpoints(object):
+    """YellowAnt API methods. Keyword arguments are sent as the request
+    parameters; a pre-serialized JSON body can be passed as ``_body`` and
+    is then sent as is.
+
+    """
 
     def get_user_profile(self, **params):
         """Returns the profile for the authenticating user.
@@ -56,6 +56,29 @@ class YellowAntRateLimitError(YellowAntError):  # pragma: no cover
         self.retry_after = retry_after
 
 
+class YellowAntCircuitOpenError(YellowAntError):
+    """Raised without calling the API while the circuit breaker of an
+    endpoint is open.
+
+    ``retry_after`` is the number of seconds until trial calls are let
+    through again.
+
+    """
+    def __init__(self, msg, endpoint=None, retry_after=None):
+        YellowAntError.__init__(self, msg)
+
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class YellowAntDeadlineError(YellowAntError):
+    """Raised when the deadline of an operation (see
+    :class:`yellowant.deadline.Deadline`) is exceeded.
+
+    """
+    pass
+
+
 class YellowAntStreamError(YellowAntError):
     """Raised when an invalid response from the Stream API is received"""
     pass
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.fanout
+~~~~~~~~~~~~~~~~
+
+This module contains helpers to send the same message to many user
+integrations. The shared message body is serialized once, and only the
+recipient id is encoded per call.
+"""
+
+from . import codec
+from .batch import Batch, _call_within
+from .deadline import Deadline
+from .exceptions import YellowAntError
+from .helpers import _transparent_params
+from .messageformat import MessageClass
+
+
+class MessageBroadcast(object):
+    """A message serialized once for many recipients.
+
+    message = MessageClass('Build #42 failed')
+    broadcast = MessageBroadcast(message)
+    results = broadcast.send(user_integration_ids, client=yellowant)
+
+    ``targets`` passed to :meth:`send` are either user integration ids, all
+    sent with ``client``, or ``(client, user_integration_id)`` pairs, e.g.
+    with clients taken from a :class:`yellowant.registry.YellowAntRegistry`.
+
+    """
+
+    def __init__(self, message, target_key='requester_application', **params):
+        """
+        :param message: (required) A :class:`MessageClass` or a message dict
+        :param target_key: (optional) Name of the parameter holding the
+        recipient's user integration id
+        :param params: (optional) Extra parameters shared by every call.
+        ``_priority`` and ``_deadline`` are not sent but apply to the calls
+        made by :meth:`send`, as for any Endpoints method
+
+        """
+        if isinstance(message, MessageClass):
+            message = message.get_dict()
+        self.priority = params.pop('_priority', None)
+        self.deadline = params.pop('_deadline', None)
+        shared = dict(message, **params)
+        shared.pop(target_key, None)
+        shared, _ = _transparent_params(shared)
+
+        self.target_key = target_key
+        encoded = codec.dumps_bytes(shared)
+        # Keep everything up to the closing brace so each recipient only
+        # costs encoding its own id
+        self._prefix = encoded[:-1] + (b', ' if shared else b'')
+
+    def __repr__(self):
+        return '<MessageBroadcast: %d bytes>' % len(self._prefix)
+
+    def body_for(self, target):
+        """Returns the serialized request body for one recipient"""
+        tail = '%s: %s}' % (codec.dumps(self.target_key), codec.dumps(target))
+        return self._prefix + tail.encode('utf-8')
+
+    def send(self, targets, client=None, webhook_id=None, webhook_name=None,
+             max_workers=8):
+        """Sends the message to every target concurrently, as
+        ``add_message``, or as ``create_webhook_message`` when a webhook is
+        given. Returns the results in target order; failed calls are
+        represented by the exception they raised.
+
+        :param targets: (required) User integration ids, or
+        ``(client, user_integration_id)`` pairs
+        :param client: (optional) Client used for plain ids
+        :param webhook_id: (optional) Webhook to send the message to
+        :param webhook_name: (optional) Webhook to send the message to
+        :param max_workers: (optional) Maximum number of concurrent calls
+
+        """
+        if webhook_id or webhook_name:
+            endpoint = 'user/application/webhook/%s/' % (webhook_id or
+                                                         webhook_name)
+        else:
+            endpoint = 'user/message/'
+
+        deadline = Deadline.coerce(self.deadline) \
+            if self.deadline is not None else None
+        with Batch(max_workers=max_workers) as batch:
+            # calls submitted within a deadline or priority run within it
+            _call_within(deadline, self.priority, self._submit, batch,
+                         targets, client, endpoint)
+        return batch.results()
+
+    def _submit(self, batch, targets, client, endpoint):
+        for target in targets:
+            if isinstance(target, tuple):
+                target_client, target = target
+            else:
+                target_client = client
+            if target_client is None:
+                raise YellowAntError('A client is required to send to %s.'
+                                     % target)
+            batch.submit(target_client.request, endpoint, 'POST',
+                         body=self.body_for(target))
@@ -8,8 +8,50 @@ This module contains functions that are repeatedly used throughout
 the Twython library.
 """
 
-from .compat import basestring, numeric_types
-import json
+import hashlib
+import logging
+import time
+import zlib
+
+from . import codec
+from .compat import basestring, numeric_types, urlencode
+from .exceptions import YellowAntError, YellowAntAuthError, YellowAntRateLimitError
+
+log = logging.getLogger('yellowant')
+
+#: Accepted values of the ``last_call_capture`` client option
+LAST_CALL_CAPTURE_MODES = ('lazy', 'full', 'headers')
+
+#: Types sent as is when given as a pre-encoded request body
+BODY_TYPES = (bytes, bytearray, memoryview)
+
+#: Window bits selecting the container zlib wraps compressed data in
+COMPRESSION_WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+
+def _compress_body(body, encoding, level=6):
+    """Compress a request body for the given ``Content-Encoding``"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED,
+                                  COMPRESSION_WBITS[encoding])
+    return compressor.compress(body) + compressor.flush()
+
+
+def _split_body(params, body=None):
+    """Separate a pre-encoded JSON body, passed instead of the params or as
+    the ``_body`` parameter of an Endpoints method, from the params"""
+    if isinstance(params, BODY_TYPES):
+        return None, params
+    if isinstance(params, basestring):
+        # serialized JSON text
+        return None, params.encode('utf-8')
+    if params and '_body' in params:
+        params = dict(params)
+        body = params.pop('_body')
+    if body is not None and not isinstance(body, BODY_TYPES):
+        # serialized JSON text
+        body = body.encode('utf-8')
+    return params, body
+
 
 def _transparent_params(_params):
     params = {}
@@ -34,3 +76,238 @@ def _transparent_params(_params):
         else:
             continue  # pragma: no cover
     return params, files
+
+
+def _request_key(url, params, access_token):
+    """Return a key identifying a GET call by url, params and token,
+    without exposing the token"""
+    query = urlencode(sorted(params.items()), doseq=True)
+    raw = '%s?%s#%s' % (url, query, access_token or '')
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _build_request_body(method, params, body=None, compression=None,
+                        compression_threshold=0):
+    """Return the ``(params, data, files, headers)`` of a call. GET calls
+    only have query ``params``. Other calls send ``body`` as is, or else the
+    params JSON encoded, or as form fields when there are files to upload.
+    JSON bodies of at least ``compression_threshold`` bytes are compressed
+    with the ``compression`` ``Content-Encoding``."""
+    headers = {}
+    if body is not None:
+        if method.upper() == 'GET':
+            raise YellowAntError('A request body cannot be sent with GET.')
+        data = body
+        params, files = {}, {}
+    else:
+        params, files = _transparent_params(params or {})
+        if method.upper() == 'GET':
+            return params, None, {}, headers
+        if files:
+            # multipart form fields can only hold text
+            data = dict((k, v if isinstance(v, basestring)
+                         else codec.dumps(v)) for k, v in params.items())
+            return params, data, files, headers
+        data = codec.dumps_bytes(params)
+
+    if compression is not None and len(data) >= compression_threshold:
+        data = _compress_body(data, compression)
+        headers['Content-Encoding'] = compression
+    return params, data, files, headers
+
+
+def _get_content_loader(last_call_capture, load_text):
+    """Return the callable filling in the last call ``content`` in the
+    given ``last_call_capture`` mode, from one decoding the response"""
+    if last_call_capture == 'headers':
+        return None
+    if last_call_capture == 'full':
+        text = load_text()
+        return lambda: text
+    return load_text
+
+
+def _get_retry_delay(retry_policy, method, retries, started, deadline=None,
+                     **kwargs):
+    """Return the seconds to wait before retrying a call, or None if it is
+    not retried, including when the retry could not complete before
+    ``deadline``"""
+    if retry_policy is None:
+        return None
+    delay = retry_policy.get_retry_delay(method, retries,
+                                         time.time() - started, **kwargs)
+    if delay is not None and deadline is not None \
+            and delay >= deadline.remaining():
+        return None
+    return delay
+
+
+def _record_response(client, event, family, status_code, headers, size,
+                     rate_limit_key=None, rate_share=1.0):
+    """Feed a response to the metrics, rate limiter and rate limit headroom
+    check of ``client``"""
+    if event is not None:
+        client.metrics.finish(event, status_code, size)
+    if rate_limit_key is not None:
+        client.rate_limiter.update_from_headers(rate_limit_key, headers,
+                                                rate_share)
+    if client.rate_limit_headroom is not None:
+        _log_rate_limit_headroom(family, headers, client.rate_limit_headroom)
+
+
+def _raise_for_response(status_code, content, headers, last_call):
+    """Raise the YellowAnt exception matching an error response, noting its
+    message in ``last_call``"""
+    if status_code <= 304:
+        return
+    try:
+        decoded = codec.loads(content)
+    except ValueError:
+        # bad json data from YellowAnt for an error
+        decoded = None
+    error_message = _get_error_message(decoded)
+    last_call['api_error'] = error_message
+    try:
+        _raise_for_status(status_code, error_message, headers)
+    except YellowAntError as e:
+        # tells a circuit breaker the endpoint itself answered
+        e.response_received = True
+        raise
+
+
+def _decode_response(status_code, content):
+    """Return the decoded body of a successful response"""
+    if status_code == 204:
+        return content
+    try:
+        return codec.loads(content)
+    except ValueError:
+        error = YellowAntError('Response was not valid JSON. \
+                               Unable to decode.')
+        error.response_received = True
+        raise error
+
+
+def _get_error_message(content):
+    """Parse and return the first error message from a decoded error body"""
+
+    error_message = 'An error occurred processing your request.'
+    try:
+        # {"errors":[{"code":34,"message":"Sorry,
+        # that page does not exist"}]}
+        error_message = content['errors'][0]['message']
+    except TypeError:
+        try:
+            error_message = content['errors']
+        except TypeError:
+            # no decodable error body
+            pass
+    except (KeyError, IndexError):
+        # missing data so fallback to default message
+        pass
+
+    return error_message
+
+
+def _raise_for_status(status_code, error_message, headers):
+    """Raise the YellowAnt exception matching an error status code"""
+    ExceptionType = YellowAntError
+    if status_code == 429:
+        ExceptionType = YellowAntRateLimitError
+    elif status_code == 401 or 'Bad Authentication data' in error_message:
+        ExceptionType = YellowAntAuthError
+
+    raise ExceptionType(
+        error_message,
+        error_code=status_code,
+        retry_after=headers.get('X-Rate-Limit-Reset'))
+
+
+def _endpoint_family(url, api_url):
+    """Return the endpoint family of a call, e.g. ``user/integration`` for
+    ``https://api.yellowant.com/api/user/integration/42/``"""
+    base = api_url % ''
+    if url.startswith(base):
+        path = url[len(base):]
+    else:
+        path = url.split('://', 1)[-1].split('/', 1)[-1]
+    path = path.split('?', 1)[0]
+    return '/'.join([segment for segment in path.split('/') if segment][:2])
+
+
+def _log_slow_call(method, url, family, request_bytes, status_code,
+                   duration, retries, error=None):
+    """Log a call that took longer than the client's slow call threshold,
+    whether it got a response or ended with ``error``. The fields are
+    attached to the record as attributes for structured handlers."""
+    error_type = error.__class__.__name__ if error is not None else None
+    log.warning('Slow YellowAnt call: %s %s took %.3fs (%s)',
+                method.upper(), family, duration,
+                error_type or 'status %s' % status_code,
+                extra={'endpoint': family, 'url': url,
+                       'method': method.upper(),
+                       'request_bytes': request_bytes,
+                       'status_code': status_code, 'duration': duration,
+                       'retries': retries, 'error': error_type})
+
+
+def _log_if_slow(client, method, url, family, request_bytes, status_code,
+                 started, retries, error=None):
+    """Log the call with :func:`_log_slow_call` if it took longer than the
+    ``slow_call_threshold`` of ``client``"""
+    if client.slow_call_threshold is None:
+        return
+    duration = time.time() - started
+    if duration > client.slow_call_threshold:
+        _log_slow_call(method, url, family, request_bytes, status_code,
+                       duration, retries, error)
+
+
+def _log_rate_limit_headroom(family, headers, threshold):
+    """Log a response whose ``x-rate-limit-remaining`` is below
+    ``threshold``"""
+    try:
+        remaining = int(headers.get('x-rate-limit-remaining'))
+    except (TypeError, ValueError):
+        return
+    if remaining < threshold:
+        log.warning('YellowAnt rate limit headroom low on %s: %d remaining',
+                    family, remaining,
+                    extra={'endpoint': family, 'remaining': remaining,
+                           'limit': headers.get('x-rate-limit-limit'),
+                           'reset': headers.get('x-rate-limit-reset')})
+
+
+class _LastCall(dict):
+    """Stash of the last API call whose ``content`` is only decoded when it
+    is first read"""
+
+    def __init__(self, load_content=None, **fields):
+        super(_LastCall, self).__init__(**fields)
+        self._load_content = load_content
+
+    def __missing__(self, key):
+        if key != 'content':
+            raise KeyError(key)
+        load_content, self._load_content = self._load_content, None
+        content = self['content'] = load_content() if load_content else None
+        return content
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def copy(self):
+        self.get('content')
+        return dict(self)
+
+
+def _get_stack(local):
+    """Return the stack of values kept per thread on ``local``, a
+    ``threading.local``, as used by deadlines and priority lanes"""
+    stack = getattr(local, 'stack', None)
+    if stack is None:
+        stack = local.stack = []
+    return stack
@@ -1,4 +1,4 @@
-import json
+from . import codec
 
 
 class MessageClass(object):
@@ -24,7 +24,7 @@ class MessageClass(object):
     @data.setter
     def data(self, data):
         try:
-            data_json = json.dumps(data)
+            data_json = codec.dumps(data)
         except TypeError:
             raise TypeError("'data' must be JSON serializable")
         self._data = data
@@ -43,7 +43,7 @@ class MessageClass(object):
 
     def __repr__(self):
         to_dict = {"message_text": self._message_text}
-        return json.dumps(to_dict)
+        return codec.dumps(to_dict)
 
     def attach(self, attachment):
         """ Checks if attachment is of valid class (MessageAttachmentsClass) and adds
@@ -69,9 +69,9 @@ class MessageClass(object):
                    "message_text": self._message_text, "data": self._data, "error": self._error, "logs": self._logs
                    }
         if kwargs == {}:
-            return json.dumps(message, sort_keys=True, indent=4, separators=(",", ": "))
+            return codec.dumps(message, sort_keys=True, indent=4, separators=(",", ": "))
         else:
-            return json.dumps(message, **kwargs)
+            return codec.dumps(message, **kwargs)
 
     def get_dict(self, **kwargs):
         """ Returns object in dict format.
@@ -234,7 +234,7 @@ class MessageAttachmentsClass(object):
                     "footer": self._footer, "footer_icon": self._footer_icon, "pretext": self._pretext,
                     "title": self._title, "title_link": self._title_link, "status": self._status,
                     "fields": self._fields, "buttons": self._buttons}
-        return json.dumps(_to_dict)
+        return codec.dumps(_to_dict)
 
     def attach_field(self, attachment_field):
         """Checks if passed arg is of class AttachmentFieldsClass, if not raises TypeError else adds Field
@@ -299,7 +299,7 @@ class AttachmentFieldsClass(object):
 
     def __repr__(self):
         to_dict = {"title": self._title, "short": self._short, "value": self._value}
-        return json.dumps(to_dict)
+        return codec.dumps(to_dict)
 
     def get_dict(self):
         """Returns AttachmentFieldsClass object as dictionary object"""
@@ -348,7 +348,7 @@ class MessageButtonsClass(object):
     def __repr__(self):
         to_dict = {"value": self._value, "name": self._name,
                    "text": self._text, "command": self._command}
-        return json.dumps(to_dict)
+        return codec.dumps(to_dict)
 
     def get_dict(self):
         """Returns MessageButtonsClass object as dictionary object"""
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.metrics
+~~~~~~~~~~~~~~~~~
+
+This module contains the metrics collected by :class:`YellowAnt` for every
+HTTP attempt: per endpoint latency histograms, request and response sizes,
+status code, exception and retry counters, plus ``on_request`` and
+``on_response`` callbacks. Metrics render to the Prometheus text format.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+#: Upper bounds, in seconds, of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = ['%s="%s"' % (name, _escape(value))
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{%s}' % ','.join(pairs)
+
+
+class _Histogram(object):
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, buckets, value):
+        self.counts[bisect_left(buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics(object):
+    """Collects metrics of the calls made by one or more clients.
+
+    Metrics are labelled by endpoint family (the first two path segments,
+    e.g. ``user/message``) rather than by url, so ids in urls do not blow up
+    the number of series. Every attempt is measured, retries included.
+
+    from yellowant import YellowAnt
+    from yellowant.metrics import Metrics
+
+    metrics = Metrics()
+
+    @metrics.on_response
+    def log_slow(event):
+        if event['elapsed'] > 1:
+            logger.warning('slow call to %(url)s', event)
+
+    yellowant = YellowAnt(access_token=token, metrics=metrics)
+    ...
+    print(metrics.render())
+
+    """
+
+    def __init__(self, buckets=None, prefix='yellowant'):
+        """
+        :param buckets: (optional) Upper bounds in seconds of the latency
+        histogram buckets, defaults to :data:`DEFAULT_BUCKETS`
+        :param prefix: (optional) Prefix of the exported metric names
+
+        """
+        self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS))
+        self.prefix = prefix
+        self._request_hooks = []
+        self._response_hooks = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self):
+        return '<Metrics: %d requests>' % sum(self._requests.values())
+
+    def reset(self):
+        """Clears every metric collected so far"""
+        with self._lock:
+            self._requests = defaultdict(int)
+            self._exceptions = defaultdict(int)
+            self._retries = defaultdict(int)
+            self._request_bytes = defaultdict(int)
+            self._response_bytes = defaultdict(int)
+            self._latency = {}
+
+    def on_request(self, func):
+        """Registers ``func(event)``, called before every attempt with a dict
+        holding ``method``, ``url``, ``endpoint``, ``attempt`` and
+        ``request_bytes``. Returns ``func`` so it can be used as a
+        decorator."""
+        self._request_hooks.append(func)
+        return func
+
+    def on_response(self, func):
+        """Registers ``func(event)``, called after every attempt with the
+        event passed to :meth:`on_request` updated with ``status_code``
+        (None on exceptions), ``response_bytes``, ``elapsed`` seconds and
+        ``error``. Returns ``func`` so it can be used as a decorator."""
+        self._response_hooks.append(func)
+        return func
+
+    def start(self, method, url, endpoint, request_bytes=0, attempt=0):
+        """Called by the client before an attempt, returns the event to
+        pass to :meth:`finish`"""
+        event = {
+            'method': method.upper(),
+            'url': url,
+            'endpoint': endpoint,
+            'attempt': attempt,
+            'request_bytes': request_bytes,
+        }
+        for hook in self._request_hooks:
+            hook(event)
+        event['started'] = time.time()
+        return event
+
+    def finish(self, event, status_code=None, response_bytes=0, error=None):
+        """Called by the client after an attempt"""
+        elapsed = time.time() - event.pop('started')
+        event.update(status_code=status_code, response_bytes=response_bytes,
+                     elapsed=elapsed, error=error)
+
+        key = (event['endpoint'], event['method'])
+        with self._lock:
+            if error is not None:
+                self._exceptions[key + (error.__class__.__name__,)] += 1
+            else:
+                self._requests[key + (status_code,)] += 1
+            if event['attempt']:
+                self._retries[key] += 1
+            self._request_bytes[key] += event['request_bytes']
+            self._response_bytes[key] += response_bytes
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = _Histogram(self.buckets)
+            histogram.observe(self.buckets, elapsed)
+
+        for hook in self._response_hooks:
+            hook(event)
+
+    def snapshot(self):
+        """Returns the metrics as plain dicts keyed by label tuples"""
+        with self._lock:
+            return {
+                'requests': dict(self._requests),
+                'exceptions': dict(self._exceptions),
+                'retries': dict(self._retries),
+                'request_bytes': dict(self._request_bytes),
+                'response_bytes': dict(self._response_bytes),
+                'latency': dict(
+                    (key, {'count': h.count, 'sum': h.sum,
+                           'buckets': list(h.counts)})
+                    for key, h in self._latency.items()),
+            }
+
+    def _counter(self, lines, name, help_text, label_names, values):
+        name = '%s_%s' % (self.prefix, name)
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s counter' % name)
+        for key in sorted(values, key=str):
+            lines.append('%s%s %s' % (name, _labels(label_names, key),
+                                      values[key]))
+
+    def render(self):
+        """Returns the metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        self._counter(lines, 'requests_total',
+                      'HTTP responses received by status code.',
+                      ('endpoint', 'method', 'status'), snapshot['requests'])
+        self._counter(lines, 'exceptions_total',
+                      'HTTP attempts that raised an exception.',
+                      ('endpoint', 'method', 'exception'),
+                      snapshot['exceptions'])
+        self._counter(lines, 'retries_total', 'HTTP attempts that retried.',
+                      ('endpoint', 'method'), snapshot['retries'])
+        self._counter(lines, 'request_bytes_total', 'Request body bytes sent.',
+                      ('endpoint', 'method'), snapshot['request_bytes'])
+        self._counter(lines, 'response_bytes_total',
+                      'Response body bytes received.',
+                      ('endpoint', 'method'), snapshot['response_bytes'])
+
+        name = '%s_request_duration_seconds' % self.prefix
+        label_names = ('endpoint', 'method')
+        lines.append('# HELP %s Latency of HTTP attempts.' % name)
+        lines.append('# TYPE %s histogram' % name)
+        for key in sorted(snapshot['latency']):
+            histogram = snapshot['latency'][key]
+            cumulative = 0
+            bounds = [repr(float(b)) for b in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, histogram['buckets']):
+                cumulative += count
+                lines.append('%s_bucket%s %d' % (
+                    name, _labels(label_names, key, 'le="%s"' % bound),
+                    cumulative))
+            lines.append('%s_sum%s %r' % (name, _labels(label_names, key),
+                                          histogram['sum']))
+            lines.append('%s_count%s %d' % (name, _labels(label_names, key),
+                                            histogram['count']))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.mirror
+~~~~~~~~~~~~~~~~
+
+This module contains an incremental local mirror of the application logs.
+Each sync only downloads and stores the entries newer than the last one
+mirrored, appending them to gzip compressed JSON Lines segments indexed by
+timestamp.
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+
+from . import codec
+from .cache import _replace
+from .exceptions import YellowAntError
+
+
+class LogMirror(object):
+    """Mirrors ``get_application_logs`` into ``directory``.
+
+    Every :meth:`sync` writes the new entries, oldest first, to a new
+    ``logs-NNNNNN.jsonl.gz`` segment and records it in ``state.json``
+    together with the highest id mirrored so far (the high-water mark) and
+    the time range the segment covers. Entries are written page by page, so
+    a sync never holds more than one page in memory. The state file is
+    replaced atomically after the segment is written, so an interrupted
+    sync leaves the mirror as it was before.
+
+    mirror = LogMirror(yellowant, '/var/lib/yellowant/logs')
+    mirror.sync()
+    for log in mirror.read(since='2018-01-01T00:00:00Z'):
+        load(log)
+
+    """
+
+    STATE_FILE = 'state.json'
+
+    def __init__(self, client, directory, id_key='id', time_key='timestamp',
+                 newest_first=True, page_size=100, **params):
+        """
+        :param client: (required) The :class:`YellowAnt` client to sync with
+        :param directory: (required) Where segments and state are stored
+        :param id_key: (optional) Key of the increasing id of a log entry
+        :param time_key: (optional) Key of the timestamp of a log entry,
+        either a number or an ISO 8601 string
+        :param newest_first: (optional) Whether the API returns the newest
+        entries first, in which case paging stops at the first mirrored id
+        :param page_size: (optional) Number of entries requested per page
+        :param params: (optional) Extra parameters sent with every page
+
+        """
+        self.client = client
+        self.directory = directory
+        self.id_key = id_key
+        self.time_key = time_key
+        self.newest_first = newest_first
+        self.page_size = page_size
+        self.params = params
+        self._lock = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def __repr__(self):
+        return '<LogMirror: %s>' % self.directory
+
+    @property
+    def high_water(self):
+        """Id of the newest entry mirrored, None before the first sync"""
+        return self.get_state()['high_water']
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def get_state(self):
+        try:
+            with open(self._path(self.STATE_FILE)) as f:
+                return codec.loads(f.read())
+        except (IOError, OSError):
+            return {'high_water': None, 'segments': []}
+        except ValueError:
+            raise YellowAntError('Corrupt log mirror state in %s.' %
+                                 self.directory)
+
+    def _set_state(self, state):
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(codec.dumps(state))
+        _replace(path, self._path(self.STATE_FILE))
+
+    def _fetch_new(self, state):
+        """Yields the entries newer than the high-water mark one page at a
+        time, each page sorted oldest first. When the API returns the
+        oldest entries first, the page to resume from is kept in ``state``
+        so the next sync does not page through the whole history again."""
+        high_water = state['high_water']
+        cursor = 1
+        if not self.newest_first and state.get('page_size') == self.page_size:
+            cursor = state.get('cursor') or 1
+        logs = self.client.iter_application_logs(page_size=self.page_size,
+                                                 cursor=cursor, **self.params)
+        for page in logs.pages():
+            entries = [log for log in page if high_water is None or
+                       log[self.id_key] > high_water]
+            entries.sort(key=lambda log: log[self.id_key])
+            if not self.newest_first:
+                # the last page is read again next time, as it may still grow
+                state['cursor'] = logs.cursor
+                state['page_size'] = self.page_size
+            if entries:
+                yield entries
+            if self.newest_first and len(entries) < len(page):
+                return
+
+    def sync(self):
+        """Downloads and stores the entries added since the last sync.
+        Returns the number of new entries."""
+        with self._lock:
+            state = self.get_state()
+            cursor = state.get('cursor')
+            name = 'logs-%06d.jsonl.gz' % (len(state['segments']) + 1)
+            segment = {'name': name, 'count': 0, 'first': None, 'last': None}
+            # every page is spooled to its own gzip member, so at most one
+            # page is held in memory; members concatenate into a valid file
+            chunks = []
+            try:
+                for entries in self._fetch_new(state):
+                    fd, path = tempfile.mkstemp(dir=self.directory,
+                                                suffix='.tmp')
+                    chunks.append(path)
+                    with os.fdopen(fd, 'wb') as raw:
+                        with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                            for log in entries:
+                                f.write(codec.dumps_bytes(log) + b'\n')
+                    self._add_to_segment(segment, entries)
+                    if state['high_water'] is None or \
+                            entries[-1][self.id_key] > state['high_water']:
+                        state['high_water'] = entries[-1][self.id_key]
+
+                if segment['count']:
+                    if self.newest_first:
+                        chunks.reverse()
+                    self._join(chunks, segment['name'])
+                    state['segments'].append(segment)
+                if segment['count'] or state.get('cursor') != cursor:
+                    self._set_state(state)
+                return segment['count']
+            finally:
+                for path in chunks:
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def _add_to_segment(self, segment, entries):
+        times = [log.get(self.time_key) for log in entries
+                 if log.get(self.time_key) is not None]
+        if times:
+            if segment['first'] is None or min(times) < segment['first']:
+                segment['first'] = min(times)
+            if segment['last'] is None or max(times) > segment['last']:
+                segment['last'] = max(times)
+        segment['count'] += len(entries)
+
+    def _join(self, chunks, name):
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                with open(chunk, 'rb') as c:
+                    shutil.copyfileobj(c, f)
+        _replace(path, self._path(name))
+
+    def read(self, since=None, until=None):
+        """Yields mirrored entries, oldest first. Segments whose time range
+        lies outside ``since`` and ``until`` (inclusive) are not opened.
+
+        :param since: (optional) Earliest timestamp to return
+        :param until: (optional) Latest timestamp to return
+
+        """
+        for segment in self.get_state()['segments']:
+            if segment['first'] is not None:
+                if since is not None and segment['last'] < since:
+                    continue
+                if until is not None and segment['first'] > until:
+                    continue
+            with gzip.open(self._path(segment['name']), 'rb') as f:
+                for line in f:
+                    log = codec.loads(line)
+                    timestamp = log.get(self.time_key)
+                    if timestamp is not None:
+                        if since is not None and timestamp < since:
+                            continue
+                        if until is not None and timestamp > until:
+                            continue
+                    yield log
+
+    def __len__(self):
+        return sum(segment['count']
+                   for segment in self.get_state()['segments'])
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.pagination
+~~~~~~~~~~~~~~~~~~~~
+
+This module contains an iterator over paginated list endpoints such as
+``get_application_logs`` and ``get_application_messages``. Items are
+yielded lazily, one page in memory at a time, while the next page is
+fetched in the background.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .deadline import Deadline, get_deadline
+from .priority import get_priority
+
+
+class PageIterator(object):
+    """Iterates over the items of every page of a list endpoint.
+
+    Pages are requested with ``page`` and ``page_size`` parameters. A page
+    is either a list of items or a dict holding them under ``results``; the
+    iteration ends on an empty page, a short page, or a dict whose ``next``
+    is empty.
+
+    :attr:`cursor` is the page currently being consumed. Passing it back as
+    ``cursor`` resumes the iteration at the start of that page, so an
+    interrupted export re-reads at most one page.
+
+    A ``_deadline`` parameter, or the deadline active when iteration starts,
+    covers the whole iteration rather than each page. Likewise the priority
+    lane active when iteration starts applies to every page.
+
+    for log in yellowant.iter_application_logs(page_size=200):
+        export(log)
+
+    """
+
+    def __init__(self, fetch, params=None, page_size=100, cursor=1,
+                 prefetch=True, page_param='page', page_size_param='page_size',
+                 items_key='results'):
+        """
+        :param fetch: (required) Endpoints method returning one page, e.g.
+        ``yellowant.get_application_logs``
+        :param params: (optional) Parameters sent with every page
+        :param page_size: (optional) Number of items requested per page
+        :param cursor: (optional) Page to start from
+        :param prefetch: (optional) Fetch the next page while the current
+        one is consumed
+        :param page_param: (optional) Name of the page number parameter
+        :param page_size_param: (optional) Name of the page size parameter
+        :param items_key: (optional) Key holding the items of dict pages
+
+        """
+        self.fetch = fetch
+        self.params = dict(params or {})
+        self.page_size = page_size
+        self.cursor = cursor
+        self.prefetch = prefetch
+        self.page_param = page_param
+        self.page_size_param = page_size_param
+        self.items_key = items_key
+
+    def __repr__(self):
+        return '<PageIterator: page %s>' % self.cursor
+
+    def __iter__(self):
+        for page in self.pages():
+            for item in page:
+                yield item
+
+    def _fetch_page(self, params, number):
+        params = dict(params)
+        params[self.page_param] = number
+        params[self.page_size_param] = self.page_size
+        content = self.fetch(**params)
+        if isinstance(content, dict):
+            items = content.get(self.items_key) or []
+            has_next = bool(content.get('next')) and bool(items)
+        else:
+            items = content or []
+            has_next = len(items) >= self.page_size
+        return items, has_next
+
+    def pages(self):
+        """Yields the items of each page as a list"""
+        params = dict(self.params)
+        if params.get('_deadline') is not None:
+            params['_deadline'] = Deadline.coerce(params['_deadline'])
+        elif get_deadline() is not None:
+            # passed explicitly, as prefetching runs in another thread
+            params['_deadline'] = get_deadline()
+        if params.get('_priority') is None and get_priority() is not None:
+            params['_priority'] = get_priority()
+
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        try:
+            items, has_next = self._fetch_page(params, self.cursor)
+            while True:
+                upcoming = None
+                if has_next and executor is not None:
+                    upcoming = executor.submit(self._fetch_page, params,
+                                               self.cursor + 1)
+                yield items
+                if not has_next:
+                    return
+                self.cursor += 1
+                if upcoming is not None:
+                    items, has_next = upcoming.result()
+                else:
+                    items, has_next = self._fetch_page(params, self.cursor)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.priority
+~~~~~~~~~~~~~~~~~~
+
+This module contains priority lanes, which keep interactive traffic, such
+as replies to user commands, clear of bulk background traffic, such as log
+exports and broadcasts. Each lane has its own connection pool and its own
+share of the client side rate limit, and high priority calls go first when
+calls queue for a concurrency slot.
+"""
+
+import threading
+from contextlib import contextmanager
+from weakref import WeakKeyDictionary
+
+import requests
+
+from .adapters import YellowAntHTTPAdapter
+from .exceptions import YellowAntError
+from .helpers import _get_stack
+
+_local = threading.local()
+
+
+def get_priority():
+    """Returns the name of the lane selected in this thread, or None"""
+    stack = _get_stack(_local)
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def priority(lane):
+    """Sends the calls made within the ``with`` block through ``lane``.
+    Calls can also pick a lane with the ``_priority`` parameter of any
+    Endpoints method.
+
+    from yellowant.priority import priority
+
+    with priority('bulk'):
+        for log in yellowant.iter_application_logs():
+            export(log)
+
+    """
+    stack = _get_stack(_local)
+    stack.append(lane)
+    try:
+        yield lane
+    finally:
+        stack.pop()
+
+
+class Lane(object):
+    """A priority class of calls"""
+
+    def __init__(self, name, priority=0, pool_maxsize=None, rate_share=1.0):
+        """
+        :param name: (required) Name calls select the lane by
+        :param priority: (optional) Lower numbers go first when calls queue
+        for a concurrency slot
+        :param pool_maxsize: (optional) Size of the lane's own connection
+        pool, None to use the client's session
+        :param rate_share: (optional) Share, between 0 and 1, of the client
+        side rate limit the lane gets
+
+        """
+        self.name = name
+        self.priority = priority
+        self.pool_maxsize = pool_maxsize
+        self.rate_share = rate_share
+
+    def __repr__(self):
+        return '<Lane: %s>' % self.name
+
+
+class PriorityLanes(object):
+    """The lanes of a :class:`YellowAnt` client.
+
+    Every lane with a ``pool_maxsize`` gets its own copy of the client's
+    session with a connection pool of that size, so bulk calls can never
+    hold every pooled connection. With a
+    :class:`yellowant.ratelimit.RateLimiter`, each lane gets its own bucket
+    refilling at ``rate_share`` of the rate. With a
+    :class:`yellowant.concurrency.AdaptiveLimiter`, queued calls are let
+    through in lane priority order.
+
+    Lanes can be shared by many clients, e.g. through the ``kwargs`` of a
+    :class:`yellowant.registry.YellowAntRegistry`; clients sharing a
+    session then share the lane sessions too.
+
+    from yellowant import YellowAnt
+    from yellowant.priority import PriorityLanes
+
+    yellowant = YellowAnt(access_token=token, priority_lanes=PriorityLanes())
+    yellowant.add_message(_priority='bulk', **message)
+
+    """
+
+    def __init__(self, lanes=None, default='interactive'):
+        """
+        :param lanes: (optional) :class:`Lane` instances, defaults to an
+        ``interactive`` lane using the client's session with 70% of the
+        rate limit, and a ``bulk`` lane with a pool of 4 connections and 30%
+        :param default: (optional) Lane of calls that do not select one
+
+        """
+        if lanes is None:
+            lanes = [Lane('interactive', priority=0, rate_share=0.7),
+                     Lane('bulk', priority=1, pool_maxsize=4, rate_share=0.3)]
+        self.lanes = dict((lane.name, lane) for lane in lanes)
+        if default not in self.lanes:
+            raise YellowAntError('Unknown default lane %r.' % default)
+        self.default = default
+        self._sessions = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<PriorityLanes: %s>' % ', '.join(sorted(self.lanes))
+
+    def get_lane(self, name=None):
+        """Returns the :class:`Lane` called ``name``, or the default one"""
+        try:
+            return self.lanes[name if name is not None else self.default]
+        except KeyError:
+            raise YellowAntError('Unknown priority lane %r, expected one of '
+                                 '%s.' % (name, ', '.join(sorted(self.lanes))))
+
+    def get_session(self, session, lane):
+        """Returns the session calls of ``lane`` are sent with, a copy of
+        ``session`` with its own connection pool"""
+        if lane.pool_maxsize is None:
+            return session
+        with self._lock:
+            sessions = self._sessions.get(session)
+            if sessions is None:
+                sessions = self._sessions[session] = {}
+            if lane.name not in sessions:
+                sessions[lane.name] = self._copy_session(session,
+                                                         lane.pool_maxsize)
+            return sessions[lane.name]
+
+    @staticmethod
+    def _copy_session(session, pool_maxsize):
+        copy = requests.Session()
+        for k in ('auth', 'proxies', 'hooks', 'params', 'stream', 'verify',
+                  'cert', 'max_redirects', 'trust_env', 'cookies'):
+            setattr(copy, k, getattr(session, k))
+        copy.headers = session.headers.copy()
+
+        socket_options = getattr(session.get_adapter('https://'),
+                                 'socket_options', None)
+        adapter = YellowAntHTTPAdapter(pool_maxsize=pool_maxsize,
+                                       socket_options=socket_options)
+        copy.mount('https://', adapter)
+        copy.mount('http://', adapter)
+        return copy
+
+    def close(self):
+        """Closes the lane sessions"""
+        with self._lock:
+            for sessions in self._sessions.values():
+                for session in sessions.values():
+                    session.close()
+            self._sessions.clear()
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.ratelimit
+~~~~~~~~~~~~~~~~~~~
+
+This module contains a client side token bucket rate limiter. The client
+checks it before every call so that many threads, or many worker processes
+on one host, stay under the YellowAnt rate limit instead of running into
+429 responses.
+"""
+
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from . import codec
+from .exceptions import YellowAntError, YellowAntDeadlineError, \
+    YellowAntRateLimitError
+
+
+class MemoryBucketStore(object):
+    """Keeps bucket state in memory, shared by all threads of a process"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, func):
+        """Atomically replaces the state of ``key`` with ``func(state)[0]``
+        and returns ``func(state)[1]``"""
+        with self._lock:
+            state, result = func(self._buckets.get(key))
+            self._buckets[key] = state
+            return result
+
+
+class FileBucketStore(object):
+    """Keeps bucket state in a JSON file guarded by an exclusive ``flock``,
+    shared by every process on the host that uses the same path.
+
+    :param path: (required) Location of the state file, e.g.
+    ``/tmp/yellowant-ratelimit.json``
+
+    """
+
+    def __init__(self, path):
+        if fcntl is None:
+            raise YellowAntError('FileBucketStore requires fcntl (Unix only).')
+        self.path = path
+        self._lock = threading.Lock()
+
+    def update(self, key, func):
+        """Atomically replaces the state of ``key`` with ``func(state)[0]``
+        and returns ``func(state)[1]``"""
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, 'r+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    try:
+                        buckets = codec.loads(f.read() or '{}')
+                    except ValueError:
+                        # a corrupt file only costs us the current state
+                        buckets = {}
+                    state, result = func(buckets.get(key))
+                    buckets[key] = state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(codec.dumps(buckets))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            return result
+
+
+class RateLimiter(object):
+    """Token bucket rate limiter keyed per app and endpoint family.
+
+    Every bucket refills at ``rate`` tokens per second up to ``capacity``.
+    The limiter also seeds itself from the ``x-rate-limit-remaining`` and
+    ``x-rate-limit-reset`` response headers, so the first 429 a worker would
+    have seen is avoided rather than retried.
+
+    from yellowant import YellowAnt
+    from yellowant.ratelimit import RateLimiter, FileBucketStore
+
+    limiter = RateLimiter(rate=10, rates={'user/message': 5},
+                          store=FileBucketStore('/tmp/yellowant-ratelimit.json'))
+    yellowant = YellowAnt(access_token=token, rate_limiter=limiter)
+
+    """
+
+    def __init__(self, rate=10, capacity=None, rates=None, store=None,
+                 max_wait=None):
+        """
+        :param rate: (optional) Tokens added per second to every bucket
+        :param capacity: (optional) Maximum burst size, defaults to ``rate``
+        :param rates: (optional) Per endpoint family overrides of ``rate``,
+        e.g. ``{'user/message': 5}``
+        :param store: (optional) Where bucket state lives, defaults to a
+        :class:`MemoryBucketStore`
+        :param max_wait: (optional) Raise :class:`YellowAntRateLimitError`
+        instead of waiting longer than this many seconds for a token
+
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.rates = rates or {}
+        self.store = store or MemoryBucketStore()
+        self.max_wait = max_wait
+
+    def __repr__(self):
+        return '<RateLimiter: %s/s>' % (self.rate)
+
+    def _get_rate(self, key, share=1.0):
+        # keys look like app_key:family, or app_key:family@lane
+        family = key.split(':', 1)[-1].split('@', 1)[0]
+        rate = float(self.rates.get(family, self.rate)) * share
+        return rate, max(self.capacity * rate / self.rate, 1.0)
+
+    def _refill(self, key, state, now, share=1.0):
+        rate, capacity = self._get_rate(key, share)
+        if state is None:
+            return {'tokens': capacity, 'updated': now, 'blocked_until': 0}
+        tokens = min(capacity,
+                     state['tokens'] + (now - state['updated']) * rate)
+        return {'tokens': tokens, 'updated': now,
+                'blocked_until': state['blocked_until']}
+
+    def try_acquire(self, key, share=1.0):
+        """Takes a token for ``key`` if one is available. Returns 0 on
+        success, otherwise the number of seconds until one will be.
+        ``share`` scales the rate, e.g. for a priority lane's bucket."""
+        def take(state):
+            now = time.time()
+            state = self._refill(key, state, now, share)
+            if state['blocked_until'] > now:
+                return state, state['blocked_until'] - now
+            if state['tokens'] >= 1:
+                state['tokens'] -= 1
+                return state, 0
+            rate, _ = self._get_rate(key, share)
+            return state, (1 - state['tokens']) / rate
+        return self.store.update(key, take)
+
+    def acquire(self, key, timeout=None, share=1.0):
+        """Blocks until a token for ``key`` is available, raising
+        :class:`YellowAntDeadlineError` rather than waiting past ``timeout``
+        seconds, the time left before a deadline"""
+        waited = 0
+        while True:
+            wait = self.try_acquire(key, share)
+            if not wait:
+                return waited
+            self.check_wait(waited + wait, timeout)
+            time.sleep(wait)
+            waited += wait
+
+    def check_wait(self, wait, timeout=None):
+        """Raises :class:`YellowAntDeadlineError` if ``wait`` exceeds
+        ``timeout``, or :class:`YellowAntRateLimitError` if it exceeds
+        ``max_wait``"""
+        if timeout is not None and wait > timeout:
+            raise YellowAntDeadlineError(
+                'Deadline would be exceeded waiting %.3fs for a client side '
+                'rate limit token.' % wait)
+        if self.max_wait is not None and wait > self.max_wait:
+            # nothing was sent, so there is no HTTP status to report
+            raise YellowAntRateLimitError(
+                'Client side rate limit exhausted, the call was not sent.',
+                error_code=None, retry_after=int(wait))
+
+    def update_from_headers(self, key, headers, share=1.0):
+        """Aligns the bucket for ``key`` with the rate limit headers of a
+        response"""
+        try:
+            remaining = int(headers.get('x-rate-limit-remaining'))
+        except (TypeError, ValueError):
+            return
+        try:
+            reset = float(headers.get('x-rate-limit-reset'))
+        except (TypeError, ValueError):
+            reset = None
+        if reset is not None and reset < 1e9:
+            # seconds until reset rather than an epoch timestamp
+            reset += time.time()
+
+        def seed(state):
+            now = time.time()
+            state = self._refill(key, state, now, share)
+            state['tokens'] = min(state['tokens'], remaining * share)
+            if remaining <= 0 and reset is not None:
+                state['blocked_until'] = max(state['blocked_until'], reset)
+            return state, None
+        self.store.update(key, seed)
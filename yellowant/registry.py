@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.registry
+~~~~~~~~~~~~~~~~~~
+
+This module contains a registry of per user :class:`YellowAnt` clients that
+all share one session and connection pool, for applications serving many
+user integrations, each with their own OAuth 2 access token.
+"""
+
+import copy
+
+from .api import YellowAnt
+from .cache import MemoryCache
+
+
+class YellowAntRegistry(object):
+    """Hands out lightweight per token :class:`YellowAnt` clients backed by
+    one shared ``requests.Session``.
+
+    Clients are kept in an LRU of at most ``max_clients`` entries, and
+    clients idle for more than ``idle_timeout`` seconds are dropped. Dropping
+    a client only releases its token state, never a connection.
+
+    from yellowant.registry import YellowAntRegistry
+
+    registry = YellowAntRegistry(client_args={'pool_maxsize': 64})
+    registry.get(user_integration.access_token).add_message(**message)
+
+    """
+
+    def __init__(self, app_key=None, app_secret=None, max_clients=1024,
+                 idle_timeout=None, client_args=None, **kwargs):
+        """
+        :param app_key: (optional) Your applications key
+        :param app_secret: (optional) Your applications secret key
+        :param max_clients: (optional) Maximum number of clients kept
+        :param idle_timeout: (optional) Seconds after which an unused client
+        is dropped
+        :param client_args: (optional) Same as for :class:`YellowAnt`,
+        applied once to the shared session
+        :param kwargs: (optional) Any other :class:`YellowAnt` arguments,
+        e.g. ``retry_policy`` or ``rate_limiter``, shared by every client
+
+        """
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.kwargs = kwargs
+
+        # Let a token-less client configure the shared session, then strip
+        # its auth so each client can send its own token.
+        template = YellowAnt(app_key, app_secret,
+                             client_args=copy.deepcopy(client_args or {}),
+                             **kwargs)
+        self.session = template.client
+        self.session.auth = None
+        self.client_args = template.client_args
+
+        self._clients = MemoryCache(max_clients)
+
+    def __repr__(self):
+        return '<YellowAntRegistry: %s (%d clients)>' % (self.app_key,
+                                                        len(self))
+
+    def __len__(self):
+        return len(self._clients)
+
+    def __contains__(self, access_token):
+        return access_token in self._clients
+
+    def get(self, access_token):
+        """Returns the client for ``access_token``, creating it if needed"""
+        client = self._clients.get_or_set(
+            access_token, lambda: self._create_client(access_token))
+        if self.idle_timeout is not None:
+            self._clients.prune(self.idle_timeout)
+        return client
+
+    def _create_client(self, access_token):
+        return YellowAnt(self.app_key, self.app_secret,
+                         access_token=access_token,
+                         client_args=dict(self.client_args),
+                         session=self.session, **self.kwargs)
+
+    def discard(self, access_token):
+        """Drops the client for ``access_token``, e.g. after it is revoked"""
+        self._clients.delete(access_token)
+
+    def clear(self):
+        """Drops every client"""
+        self._clients.clear()
+
+    def close(self):
+        """Drops every client and closes the shared session"""
+        self.clear()
+        self.session.close()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.retry
+~~~~~~~~~~~~~~~
+
+This module contains the retry policy used by :class:`YellowAnt` and
+:class:`AsyncYellowAnt` to transparently retry rate limited, overloaded and
+failed calls with jittered exponential backoff.
+"""
+
+import random
+import time
+
+
+class RetryPolicy(object):
+    """Decides whether and when a failed call is attempted again.
+
+    Rate limited calls (429) are always retried because the server did not
+    process them. Gateway errors (502, 503, 504) and connection errors are
+    only retried for idempotent methods, since the server may already have
+    acted on a POST or PATCH.
+
+    from yellowant import YellowAnt
+    from yellowant.retry import RetryPolicy
+
+    yellowant = YellowAnt(access_token=token,
+                          retry_policy=RetryPolicy(max_retries=5))
+
+    """
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+    RATE_LIMIT_STATUS_CODES = frozenset([429])
+    RETRY_STATUS_CODES = frozenset([502, 503, 504])
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=30,
+                 jitter=True, budget=60, respect_retry_after=True,
+                 methods=None, status_codes=None):
+        """
+        :param max_retries: (optional) Maximum number of retries per call
+        :param backoff_factor: (optional) Base delay in seconds, doubled on
+        every retry
+        :param max_backoff: (optional) Upper bound for a single backoff delay
+        :param jitter: (optional) Randomise delays ("full jitter") so that
+        many clients do not retry in lockstep
+        :param budget: (optional) Maximum number of seconds a call may spend
+        in total, including retries, before giving up
+        :param respect_retry_after: (optional) Wait for the
+        ``X-Rate-Limit-Reset``/``Retry-After`` headers when present
+        :param methods: (optional) Methods considered idempotent
+        :param status_codes: (optional) Status codes retried for idempotent
+        methods
+
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.budget = budget
+        self.respect_retry_after = respect_retry_after
+        self.methods = frozenset(m.upper() for m in methods) \
+            if methods is not None else self.IDEMPOTENT_METHODS
+        self.status_codes = frozenset(status_codes) \
+            if status_codes is not None else self.RETRY_STATUS_CODES
+
+    def __repr__(self):
+        return '<RetryPolicy: max_retries=%s budget=%s>' % (self.max_retries,
+                                                            self.budget)
+
+    def is_retryable(self, method, status_code=None, connection_error=False):
+        """Returns True if a call failing this way may be attempted again"""
+        if status_code in self.RATE_LIMIT_STATUS_CODES:
+            return True
+        if method.upper() not in self.methods:
+            return False
+        return connection_error or status_code in self.status_codes
+
+    def get_backoff(self, retries):
+        """Returns the exponential backoff delay before retry number
+        ``retries + 1``"""
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** retries))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    @staticmethod
+    def parse_retry_after(headers):
+        """Returns the number of seconds the server asked us to wait, or
+        None. ``X-Rate-Limit-Reset`` may be an epoch timestamp or a number
+        of seconds."""
+        if not headers:
+            return None
+        value = headers.get('X-Rate-Limit-Reset') or headers.get('Retry-After')
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        if value > 1e9:
+            # an absolute epoch timestamp
+            value -= time.time()
+        return max(value, 0)
+
+    def get_retry_delay(self, method, retries, elapsed, status_code=None,
+                        headers=None, connection_error=False):
+        """Returns the number of seconds to sleep before the next attempt, or
+        None if the call should not be retried.
+
+        :param method: HTTP method of the call
+        :param retries: Number of retries already made
+        :param elapsed: Seconds spent on the call so far
+        :param status_code: Status code of the failed attempt, if any
+        :param headers: Response headers of the failed attempt, if any
+        :param connection_error: True if no response was received
+
+        """
+        if retries >= self.max_retries:
+            return None
+        if not self.is_retryable(method, status_code, connection_error):
+            return None
+
+        delay = self.get_backoff(retries)
+        if self.respect_retry_after:
+            retry_after = self.parse_retry_after(headers)
+            if retry_after is not None:
+                # spread clients released by the same reset over a short
+                # window instead of letting them all fire at once
+                delay = retry_after + (random.uniform(0, self.backoff_factor)
+                                       if self.jitter else 0)
+
+        if self.budget is not None and elapsed + delay > self.budget:
+            return None
+        return delay
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.singleflight
+~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains a single-flight group that lets concurrent identical
+calls share one execution, so a burst of threads asking for the same
+resource results in one HTTP request.
+"""
+
+import threading
+
+from .deadline import get_deadline
+from .exceptions import YellowAntDeadlineError
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Coalesces concurrent calls with the same key.
+
+    The first caller of :meth:`do` for a key runs the function, and callers
+    arriving while it runs wait and receive the same result, or the same
+    exception. Results are shared, not copied, so callers must not mutate
+    them. Waiting callers give up with :class:`YellowAntDeadlineError` when
+    their own :class:`yellowant.deadline.Deadline` runs out first.
+
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<SingleFlight: %d in flight>' % len(self._calls)
+
+    def do(self, key, func, *args, **kwargs):
+        """Runs ``func(*args, **kwargs)`` unless a call with ``key`` is
+        already in flight, in which case its outcome is returned"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            deadline = get_deadline()
+            if deadline is None:
+                call.done.wait()
+            elif not call.done.wait(max(deadline.remaining(), 0)):
+                raise YellowAntDeadlineError(
+                    'Deadline of %ss exceeded waiting for an identical call '
+                    'in flight.' % deadline.timeout)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
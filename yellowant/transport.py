@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+"""
+yellowant.transport
+~~~~~~~~~~~~~~~~~~~
+
+This module contains the transports :class:`YellowAnt` sends its HTTP
+requests through: the default ``requests`` backend, an HTTP/2 backend
+multiplexing concurrent calls over one connection per host, and an in
+process fake for tests.
+"""
+
+import datetime
+import threading
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+import requests
+from requests.cookies import cookiejar_from_dict
+from requests.structures import CaseInsensitiveDict
+
+from . import codec
+from .exceptions import YellowAntError
+
+
+class Transport(object):
+    """Base class of transports.
+
+    :meth:`send` takes the arguments of ``requests.Session.request`` and
+    returns a ``requests.Response``, raising ``requests.RequestException``
+    subclasses on network errors, so retries and error handling behave the
+    same whatever the backend. ``session`` carries the client's headers,
+    auth and cookies; it is None for calls made outside of the client's
+    session, such as the OAuth 2 token exchange.
+
+    """
+
+    def send(self, method, url, session=None, **kwargs):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return '<%s>' % self.__class__.__name__
+
+    @staticmethod
+    def prepare(method, url, session=None, params=None, data=None,
+                files=None, headers=None, auth=None, **kwargs):
+        """Returns the ``requests.PreparedRequest`` for a call, with the
+        session's headers and auth applied and the body encoded"""
+        request = requests.Request(method.upper(), url, params=params,
+                                   data=data, files=files, headers=headers,
+                                   auth=auth)
+        if session is not None:
+            return session.prepare_request(request)
+        return request.prepare()
+
+    @staticmethod
+    def build_response(request, status_code, headers=None, content=b'',
+                       url=None, reason=None, cookies=None, elapsed=None):
+        """Returns a ``requests.Response`` for a response received by
+        another HTTP library"""
+        response = requests.Response()
+        response.request = request
+        response.status_code = status_code
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers or {})
+        response._content = content
+        response.url = url or request.url
+        response.encoding = requests.utils.get_encoding_from_headers(
+            response.headers)
+        response.cookies = cookiejar_from_dict(cookies or {})
+        response.elapsed = elapsed or datetime.timedelta(0)
+        return response
+
+
+class RequestsTransport(Transport):
+    """Sends calls with ``requests``, through the client's session and its
+    connection pool. This is the default transport."""
+
+    def send(self, method, url, session=None, **kwargs):
+        if session is None:
+            return requests.request(method, url, **kwargs)
+        return session.request(method, url, **kwargs)
+
+
+class HTTP2Transport(Transport):
+    """Sends calls with ``httpx`` over HTTP/2, so concurrent calls to the
+    same host, e.g. from :meth:`YellowAnt.batch` or a
+    :class:`yellowant.fanout.MessageBroadcast`, are multiplexed over one
+    connection instead of each holding a pooled connection of its own.
+
+    Connection level settings such as ``verify``, ``cert``, ``proxy`` or
+    ``limits`` are passed to ``httpx.Client``; per call ``timeout`` and
+    ``allow_redirects`` are honoured.
+
+    from yellowant import YellowAnt
+    from yellowant.transport import HTTP2Transport
+
+    yellowant = YellowAnt(access_token=token, transport=HTTP2Transport())
+
+    """
+
+    def __init__(self, **client_kwargs):
+        """
+        :param client_kwargs: (optional) Arguments of ``httpx.Client``
+
+        """
+        if httpx is None:
+            raise YellowAntError('HTTP2Transport requires the httpx package '
+                                 'with HTTP/2 support (httpx[http2]).')
+        client_kwargs.setdefault('http2', True)
+        self.client = httpx.Client(**client_kwargs)
+
+    def close(self):
+        self.client.close()
+
+    @staticmethod
+    def _get_timeout(timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    def send(self, method, url, session=None, timeout=None,
+             allow_redirects=True, **kwargs):
+        prepared = self.prepare(method, url, session=session, **kwargs)
+        try:
+            response = self.client.request(
+                prepared.method, prepared.url, headers=dict(prepared.headers),
+                content=prepared.body, timeout=self._get_timeout(timeout),
+                follow_redirects=allow_redirects)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e) or e.__class__.__name__)
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e) or e.__class__.__name__)
+        except httpx.HTTPError as e:
+            raise requests.RequestException(str(e) or e.__class__.__name__)
+        return self.build_response(
+            prepared, response.status_code, response.headers.items(),
+            response.content, url=str(response.url),
+            reason=response.reason_phrase, cookies=dict(response.cookies),
+            elapsed=response.elapsed)
+
+
+class FakeTransport(Transport):
+    """In process transport answering calls with canned responses, for
+    testing code built on the SDK without a network.
+
+    Responses are registered per method and endpoint path. Several
+    responses for one route are returned in turn, and the last one keeps
+    being returned. Every call is recorded in :attr:`requests` as a
+    ``requests.PreparedRequest``.
+
+    from yellowant import YellowAnt
+    from yellowant.transport import FakeTransport
+
+    transport = FakeTransport()
+    transport.add('GET', 'user/profile/', json={'id': 1})
+    yellowant = YellowAnt(access_token='token', transport=transport)
+    assert yellowant.get_user_profile() == {'id': 1}
+
+    """
+
+    def __init__(self):
+        self.routes = []
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def add(self, method, path, status=200, json=None, body=b'',
+            headers=None, exception=None):
+        """Registers a response
+
+        :param method: (required) HTTP method, or None to match any
+        :param path: (required) Endpoint path, e.g. ``user/profile/``, or a
+        full url
+        :param status: (optional) Status code of the response
+        :param json: (optional) Object returned JSON encoded
+        :param body: (optional) Raw body, used when ``json`` is not given
+        :param headers: (optional) Response headers
+        :param exception: (optional) Exception raised instead of responding,
+        e.g. ``requests.ConnectionError()``
+
+        """
+        if json is not None:
+            body = codec.dumps_bytes(json)
+        headers = dict({'Content-Type': 'application/json'}, **(headers or {}))
+        response = (status, headers, body, exception)
+        with self._lock:
+            for route in self.routes:
+                if route[:2] == [method and method.upper(), path]:
+                    route[2].append(response)
+                    return
+            self.routes.append([method and method.upper(), path, [response]])
+
+    def _match(self, method, request, path):
+        if method is not None and method != request.method:
+            return False
+        location = request.url.split('?', 1)[0]
+        return location == path or location.endswith('/' + path.lstrip('/'))
+
+    def send(self, method, url, session=None, **kwargs):
+        for k in ('timeout', 'allow_redirects', 'stream', 'verify', 'cert',
+                  'proxies'):
+            kwargs.pop(k, None)
+        prepared = self.prepare(method, url, session=session, **kwargs)
+        with self._lock:
+            self.requests.append(prepared)
+            for route in self.routes:
+                if self._match(route[0], prepared, route[1]):
+                    responses = route[2]
+                    status, headers, body, exception = \
+                        responses.pop(0) if len(responses) > 1 else responses[0]
+                    break
+            else:
+                raise YellowAntError('No fake response registered for %s %s.'
+                                     % (prepared.method, prepared.url))
+        if exception is not None:
+            raise exception
+        return self.build_response(prepared, status, headers, body)
+
+    def reset(self):
+        """Drops every registered response and recorded request"""
+        with self._lock:
+            del self.routes[:]
+            del self.requests[:]